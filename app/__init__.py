@@ -7,38 +7,47 @@ from flask_cors import CORS
 from flask_talisman import Talisman
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from authlib.integrations.flask_client import OAuth
 from datetime import timedelta
 from dotenv import load_dotenv
+from werkzeug.local import LocalProxy
 import os
 
+from app.database import RoutingSession
+from app.oauth import google_client
+from app.serialization import AppJSONProvider
+
 # Load environment variables
 load_dotenv()
 
 # Global extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # read routing, see app/database.py
 bcrypt = Bcrypt()
 jwt = JWTManager()
 migrate = Migrate()
 limiter = Limiter(key_func=get_remote_address, default_limits=["200 per day", "50 per hour"])
-oauth = OAuth()
-google = None
+# registered on first use, see app/oauth.py
+google = LocalProxy(google_client)
 
 
-def create_app():
+def create_app(config_name=None):
     app = Flask(__name__)
-
-
-    #add config_name in function params for testing
-    # if config_name == "testing":
-    #     app.config["TESTING"] = True
-    #     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
-    #     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.json = AppJSONProvider(app)  # ISO timestamps, schema field order (app/serialization.py)
 
     # --- Config ---
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///issues.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['RATELIMIT_ENABLED'] = os.getenv("RATELIMIT_ENABLED", "True") == "True"
+    app.config['RATELIMIT_STORAGE_URI'] = os.getenv("RATELIMIT_STORAGE_URI")
+    app.config['RATELIMIT_FLUSH_SECONDS'] = float(os.getenv("RATELIMIT_FLUSH_SECONDS", 1))
+    app.config['RATELIMIT_LOGIN'] = os.getenv("RATELIMIT_LOGIN", "10 per minute;100 per hour")
+    app.config['RATELIMIT_REGISTER'] = os.getenv("RATELIMIT_REGISTER", "5 per minute;50 per day")
+    # unset: on in development/testing, off in production (app/config.py)
+    app.config['METRICS_ENABLED'] = {"True": True, "False": False}.get(os.getenv("METRICS_ENABLED"))
+    app.config['METRICS_TOKEN'] = os.getenv("METRICS_TOKEN")
+    app.config['QUERY_DIAGNOSTICS_SAMPLE_RATE'] = float(os.getenv("QUERY_DIAGNOSTICS_SAMPLE_RATE", 0))
+    app.config['QUERY_REPEAT_THRESHOLD'] = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))
+    app.config['SLOW_QUERY_MS'] = float(os.getenv("SLOW_QUERY_MS", 100))
 
     # JWT Config
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY')
@@ -49,48 +58,96 @@ def create_app():
         seconds=int(os.getenv("JWT_REFRESH_TOKEN_EXPIRES", 604800))
     )
 
+    # Password hashing (work factor + offload pool, see app/hashing.py)
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+    app.config['BCRYPT_OFFLOAD'] = os.getenv("BCRYPT_OFFLOAD", "process")
+    app.config['BCRYPT_POOL_SIZE'] = int(os.getenv("BCRYPT_POOL_SIZE", 0)) or None
+    app.config['BCRYPT_QUEUE_SIZE'] = int(os.getenv("BCRYPT_QUEUE_SIZE")) if os.getenv("BCRYPT_QUEUE_SIZE") else None
+    app.config['BCRYPT_QUEUE_TIMEOUT'] = float(os.getenv("BCRYPT_QUEUE_TIMEOUT", 0))
+
     # Google OAuth2 Config
     app.config['GOOGLE_CLIENT_ID'] = os.getenv("GOOGLE_CLIENT_ID")
     app.config['GOOGLE_CLIENT_SECRET'] = os.getenv("GOOGLE_CLIENT_SECRET")
     app.config['OAUTHLIB_INSECURE_TRANSPORT'] = os.getenv("OAUTHLIB_INSECURE_TRANSPORT") == "True"
 
+    # Named profile on top of the environment (app/config.py)
+    from app import config
+    profile = config.profile_name(config_name)
+    config.apply(app, profile)
+
+    # Engine profile: pool sizing, SQLite pragmas, optional read bind (app/database.py)
+    from app import database
+    app.config['DB_READ_ROUTING'] = os.getenv("DB_READ_ROUTING", "False") == "True"
+    app.config['READ_DATABASE_URL'] = os.getenv("READ_DATABASE_URL")
+    database.configure(app, os.getenv("DB_ENGINE_PROFILE") or profile)
+
+    # Limiter counters shared by all workers on the host (app/ratelimit.py)
+    from app import ratelimit
+    if not app.config['RATELIMIT_STORAGE_URI']:
+        app.config['RATELIMIT_STORAGE_URI'] = ratelimit.default_storage_uri(app)
+    if app.config['RATELIMIT_STORAGE_URI'].startswith(ratelimit.SCHEME + "://"):
+        app.config['RATELIMIT_STORAGE_OPTIONS'] = {"flush_interval": app.config['RATELIMIT_FLUSH_SECONDS']}
+
     # --- Security ---
-    Talisman(app, content_security_policy=None)  # basic CSP
+    Talisman(app, content_security_policy=None, force_https=not app.testing)  # basic CSP
     CORS(app, origins=["http://localhost:3000"], supports_credentials=True)  # allow frontend dev
 
     # --- Init extensions ---
     db.init_app(app)
+    database.init_app(app, db)
     bcrypt.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
     limiter.init_app(app)
-    oauth.init_app(app)
 
     # --- JWT Token Blocklist (Revocation Check) ---
+    # served from an in-process cache; see app/revocation.py
+    from app import revocation
+    revocation.init_app(app)
+
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        from app.models import TokenBlocklist
-        jti = jwt_payload["jti"]
-        token = TokenBlocklist.query.filter_by(jti=jti).first()
-        return token is not None
-    
-# Register Google login provider 
-    global google
-    google = oauth.register(
-        name='google',
-        client_id = app.config['GOOGLE_CLIENT_ID'], #Your application's public identifier issued by google, it tells which application is requesting access.
-        client_secret=app.config['GOOGLE_CLIENT_SECRET'], #Your application's confidential secret key issued by google, It proves that the request for tokens is coming from a legitimate, trusted application.
-        access_token_url='https://oauth2.googleapis.com/token', #URL where your Client Application's backend sends the authorization_code (along with client_id and client_secret) to exchange it for access_token and id_token.
-        access_token_params=None,
-        authorize_url='https://accounts.google.com/o/oauth2/auth', #the URL to which your Client Application redirects the user's browser to initiate the OAuth flow and obtain user consent
-        authorize_params=None, #Part of the authorization request
-        api_base_url='https://www.googleapis.com/oauth2/v1/', #after we obtained access token our google.get('userinfo') call implicitly uses this base URL 
-        server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",  # <--- IMPORTANT
-        userinfo_endpoint='https://www.googleapis.com/oauth2/v1/userinfo',  # required #While id_token carries basic claims, this endpoint provides the canonical user profile
-        client_kwargs={
-            'scope': 'openid email profile' #mandatory scope for OpenID Connect, signaling that you want to perform authentication and receive an id_token
-        }
-    )
+        return revocation.get_cache().is_revoked(jwt_payload["jti"])
+
+    # Team membership claims + versioned fallback cache (app/membership.py)
+    from app import membership
+    membership.init_app(app, jwt)
+
+    # bcrypt offload pool (app/hashing.py)
+    from app import hashing
+    hashing.init_app(app)
+
+    # Request/process user identity cache (app/identity.py)
+    from app import identity
+    identity.init_app(app)
+
+    # Response cache for team issue listings (app/cache.py)
+    from app import cache
+    cache.init_app(app)
+
+    # Per-team issue status counters (app/counters.py)
+    from app import counters
+    counters.init_app(app)
+
+    # Full-text search index (app/search.py)
+    from app import search
+    search.init_app(app)
+
+    # Synthetic data generator CLI (app/datagen.py)
+    from app import datagen
+    datagen.init_app(app)
+
+    # Per-team Server-Sent Events fed from the team_event outbox (app/events.py)
+    from app import events
+    events.init_app(app)
+
+    # Request/SQL/pool/bcrypt metrics on /metrics (app/metrics.py)
+    from app import metrics
+    metrics.init_app(app)
+
+    # Sampled N+1 / slow-query diagnostics (app/querylog.py)
+    from app import querylog
+    querylog.init_app(app)
 
     # Register Error Handlers
     from app.routes.error_handlers import register_error_handlers
@@ -112,4 +169,4 @@ def create_app():
     return app
 
 
-__all__ = ['db', 'bcrypt', 'limiter', 'oauth', 'google']
+__all__ = ['db', 'bcrypt', 'limiter', 'google']
@@ -0,0 +1,233 @@
+# app/cache.py
+# Small in-process caches shared by the app's hot paths, and the response
+# cache for team issue listings.
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class LRUCache:
+    """Thread-safe bounded LRU with an optional per-entry TTL (seconds)."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# -------------------------
+# Response cache for team issue listings
+# -------------------------
+# Entries are grouped by team so a write to one team's issues drops exactly
+# that team's cached pages. Writers call invalidate_teams_on_commit() (through
+# versions.bump_teams); the invalidation itself runs after the transaction
+# commits, so a concurrent reader can't re-cache the pre-commit state.
+#
+# Backends (RESPONSE_CACHE_BACKEND):
+#   memory - per-process LRU; invalidation bumps a per-team generation so
+#            stale pages stop being reachable and age out. Each worker warms
+#            its own copy.
+#   sqlite - a local SQLite file (WAL) shared by every worker on the host
+#   null   - caching disabled
+
+class NullBackend:
+    def get(self, team_id, key):
+        return None
+
+    def set(self, team_id, key, value):
+        pass
+
+    def invalidate_team(self, team_id):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=2048, ttl=None):
+        self._entries = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def _key(self, team_id, key):
+        return team_id, self._generations.get(team_id, 0), key
+
+    def get(self, team_id, key):
+        return self._entries.get(self._key(team_id, key))
+
+    def set(self, team_id, key, value):
+        self._entries.set(self._key(team_id, key), value)
+
+    def invalidate_team(self, team_id):
+        with self._lock:
+            self._generations[team_id] = self._generations.get(team_id, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SQLiteBackend:
+    def __init__(self, path, ttl=60, max_rows=100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " team_id INTEGER NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, PRIMARY KEY (team_id, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_expires ON response_cache (expires_at)")
+
+    def _connect(self):
+        # one connection per thread, reopened after a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, team_id, key):
+        row = self._connect().execute(
+            "SELECT value FROM response_cache WHERE team_id = ? AND key = ? AND expires_at > ?",
+            (team_id, key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, team_id, key, value):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (team_id, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (team_id, key, json.dumps(value), time.time() + self.ttl),
+        )
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self._prune(conn)
+
+    def _prune(self, conn):
+        conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM response_cache WHERE rowid IN (SELECT rowid FROM response_cache"
+            " ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        )
+
+    def invalidate_team(self, team_id):
+        self._connect().execute("DELETE FROM response_cache WHERE team_id = ?", (team_id,))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM response_cache")
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, team_id, key):
+        value = self.backend.get(team_id, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, team_id, key, value):
+        self.backend.set(team_id, key, value)
+
+    def invalidate_team(self, team_id):
+        self.invalidations += 1
+        self.backend.invalidate_team(team_id)
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+def response_cache():
+    return current_app.extensions["response_cache"]
+
+
+def invalidate_teams_on_commit(*team_ids):
+    """Drop these teams' cached listings once the current transaction commits."""
+    from app import db
+    pending = db.session.info.setdefault("invalidate_teams", set())
+    pending.update(tid for tid in team_ids if tid is not None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    team_ids = session.info.pop("invalidate_teams", None)
+    if team_ids and has_app_context() and "response_cache" in current_app.extensions:
+        cache = response_cache()
+        for team_id in team_ids:
+            cache.invalidate_team(team_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("invalidate_teams", None)
+
+
+def init_app(app):
+    backend_name = app.config.get("RESPONSE_CACHE_BACKEND", "memory")
+    ttl = app.config.get("RESPONSE_CACHE_TTL", 60)
+    if backend_name == "sqlite":
+        path = app.config.get("RESPONSE_CACHE_PATH") or os.path.join(app.instance_path, "response_cache.db")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        backend = SQLiteBackend(path, ttl=ttl, max_rows=app.config.get("RESPONSE_CACHE_SIZE", 100000))
+    elif backend_name == "memory":
+        backend = MemoryBackend(maxsize=app.config.get("RESPONSE_CACHE_SIZE", 2048), ttl=ttl)
+    else:
+        backend = NullBackend()
+    app.extensions["response_cache"] = ResponseCache(backend)
@@ -0,0 +1,61 @@
+# app/config.py
+# Named config profiles applied by create_app on top of the environment.
+#
+# create_app(name) reads settings from the environment first, then applies
+# the profile `name` (or APP_CONFIG, defaulting to development):
+#
+#   development  local defaults; secrets may be missing
+#   testing      in-memory SQLite, cheap bcrypt, no rate limiting
+#   production   secrets are required, session cookies are https-only,
+#                /metrics is off unless METRICS_ENABLED=True
+#
+# A value is either a constant, or a callable taking the current value for
+# "fill in only if unset" defaults (e.g. testing secrets).
+import os
+
+def _default(default):
+    return lambda value: default if value is None else value
+
+
+CONFIG_PROFILES = {
+    "development": {
+        "METRICS_ENABLED": _default(True),
+    },
+    "testing": {
+        "TESTING": True,
+        "METRICS_ENABLED": _default(True),
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "SECRET_KEY": lambda value: value or "testing-secret",
+        "JWT_SECRET_KEY": lambda value: value or "testing-jwt-secret",
+        "RATELIMIT_ENABLED": False,
+        "RATELIMIT_STORAGE_URI": lambda value: value or "memory://",
+        "BCRYPT_LOG_ROUNDS": 4,
+        "BCRYPT_OFFLOAD": "inline",
+    },
+    "production": {
+        "SESSION_COOKIE_SECURE": True,
+        "SESSION_COOKIE_HTTPONLY": True,
+        "SESSION_COOKIE_SAMESITE": "Lax",
+        # request/SQL/pool stats aren't for the public internet
+        "METRICS_ENABLED": _default(False),
+    },
+}
+
+# refuse to boot a production worker that would sign tokens with None
+REQUIRED = {"production": ("SECRET_KEY", "JWT_SECRET_KEY")}
+
+
+def profile_name(config_name=None):
+    return config_name or os.getenv("APP_CONFIG") or "development"
+
+
+def apply(app, name):
+    """Apply profile `name` to app.config."""
+    if name not in CONFIG_PROFILES:
+        raise ValueError(f"unknown config profile {name!r}; expected one of {', '.join(CONFIG_PROFILES)}")
+    for key, value in CONFIG_PROFILES[name].items():
+        app.config[key] = value(app.config.get(key)) if callable(value) else value
+    missing = [key for key in REQUIRED.get(name, ()) if not app.config.get(key)]
+    if missing:
+        raise RuntimeError(f"{', '.join(missing)} must be set for the {name} profile")
+    app.config["CONFIG_PROFILE"] = name
@@ -0,0 +1,140 @@
+# app/counters.py
+# Materialized "N open / M working / K resolved" counts per team.
+#
+# Every write that creates issues or changes their status adjusts the
+# team_issue_counts row in the same transaction, so dashboards read one row
+# per team instead of running a COUNT(*) per status. If a team has no row yet
+# (or a bulk change makes per-row deltas impractical) the row is recomputed
+# from the issue table.
+#
+# Issue.comment_count works the same way one level down: add_comment bumps
+# it in the UPDATE that already bumps the issue's version stamp, so listings
+# and the detail view show counts without a COUNT(*) over comments. Since
+# the listing shows the count, the team's stamp is bumped as well.
+#
+# `flask repair-counters` recomputes both and reports any drift it fixed.
+from collections import Counter
+
+import click
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db, versions
+from app.models import ISSUE_STATUSES, Comment, Issue, Team, TeamIssueCounts
+
+
+def add(team_id, **deltas):
+    """Apply per-status deltas, e.g. add(team_id, open=1) (caller commits)."""
+    values = {
+        status: getattr(TeamIssueCounts, status) + n
+        for status, n in deltas.items()
+        if status in ISSUE_STATUSES and n
+    }
+    if not values:
+        return
+    result = db.session.execute(
+        update(TeamIssueCounts).where(TeamIssueCounts.team_id == team_id).values(**values),
+        execution_options={"synchronize_session": False},
+    )
+    if result.rowcount == 0:
+        recount(team_id)
+
+
+def move(team_id, old_status, new_status):
+    if old_status != new_status:
+        add(team_id, **{old_status: -1, new_status: 1})
+
+
+def add_comments(issue_id, team_id, n=1):
+    """Count n new comments on an issue and bump its stamp (caller commits).
+
+    The count is part of the team listing, so the team's stamp (and its
+    cached listing pages) change too.
+    """
+    db.session.execute(
+        update(Issue)
+        .where(Issue.id == issue_id)
+        .values(comment_count=Issue.comment_count + n, **versions.issue_bump_values()),
+        execution_options={"synchronize_session": False},
+    )
+    versions.bump_teams(team_id)
+
+
+def count_statuses(team_id=None):
+    """{team_id: Counter(status -> n)} straight from the issue table."""
+    stmt = select(Issue.team_id, Issue.status, func.count()).group_by(Issue.team_id, Issue.status)
+    if team_id is not None:
+        stmt = stmt.where(Issue.team_id == team_id)
+    counts = {}
+    for tid, status, n in db.session.execute(stmt):
+        counts.setdefault(tid, Counter())[status] = n
+    return counts
+
+
+_UPSERT_DIALECTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def _store(team_id, counts):
+    values = {status: counts.get(status, 0) for status in ISSUE_STATUSES}
+    # one statement, so two first writes to a new team can't both try to
+    # INSERT the row
+    dialect = db.session.get_bind(mapper=TeamIssueCounts.__mapper__).dialect.name
+    stmt = _UPSERT_DIALECTS[dialect](TeamIssueCounts).values(team_id=team_id, **values)
+    db.session.execute(
+        stmt.on_conflict_do_update(index_elements=[TeamIssueCounts.team_id], set_=values),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def recount(team_id):
+    """Recompute one team's counters from scratch (caller commits)."""
+    _store(team_id, count_statuses(team_id).get(team_id, Counter()))
+
+
+def repair():
+    """Recompute every team's counters; returns the team ids that had drifted."""
+    actual = count_statuses()
+    stored = {row.team_id: row.as_dict() for row in TeamIssueCounts.query}
+    drifted = []
+    for (team_id,) in db.session.execute(select(Team.id)):
+        counts = actual.get(team_id, Counter())
+        expected = {status: counts.get(status, 0) for status in ISSUE_STATUSES}
+        if stored.get(team_id) != expected:
+            drifted.append(team_id)
+            _store(team_id, counts)
+    db.session.commit()
+    return drifted
+
+
+def repair_comment_counts():
+    """Recompute Issue.comment_count where it drifted; returns how many issues changed."""
+    actual = (
+        select(func.count()).where(Comment.issue_id == Issue.id).correlate(Issue).scalar_subquery()
+    )
+    team_ids = db.session.execute(
+        update(Issue)
+        .where(Issue.comment_count != actual)
+        .values(comment_count=actual, **versions.issue_bump_values())
+        .returning(Issue.team_id),
+        execution_options={"synchronize_session": False},
+    ).scalars().all()
+    versions.bump_teams(*team_ids)
+    db.session.commit()
+    return len(team_ids)
+
+
+def init_app(app):
+    @app.cli.command("repair-counters")
+    def repair_counters_command():
+        """Recompute per-team status counters and per-issue comment counts."""
+        drifted = repair()
+        if drifted:
+            click.echo(f"Repaired counters for {len(drifted)} team(s): {', '.join(map(str, drifted))}")
+        else:
+            click.echo("All team counters are consistent.")
+        fixed = repair_comment_counts()
+        if fixed:
+            click.echo(f"Repaired comment counts on {fixed} issue(s).")
+        else:
+            click.echo("All comment counts are consistent.")
@@ -0,0 +1,211 @@
+# app/database.py
+# Engine profiles, SQLite connection pragmas and read/write routing.
+#
+# create_app picks an engine profile (DB_ENGINE_PROFILE, defaulting to the
+# config name) which sets pool sizing for server databases and the pragmas
+# every new SQLite connection gets. WAL lets readers run alongside the single
+# writer, and busy_timeout makes writers wait for the lock instead of failing
+# with "database is locked".
+#
+# Read routing (DB_READ_ROUTING=True) adds a read-only engine. Views that call
+# use_read_replica() - the GET handlers of the issues API - run their queries
+# there while flushes and writes stay on the primary. READ_DATABASE_URL
+# points at a real replica; for a SQLite file the primary is reopened
+# read-only instead.
+#
+# Forked workers (gunicorn --preload) drop the pooled connections they
+# inherit from the master without closing them - the master still owns
+# them - and open their own on first use. Tables are created by
+# `flask init-db`, never at import or app creation.
+import os
+import weakref
+
+import click
+from flask import current_app, g, has_request_context
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+ENGINE_PROFILES = {
+    "development": {
+        "engine": {"pool_size": 5, "max_overflow": 10, "pool_recycle": 3600, "pool_pre_ping": True},
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -16000,       # KiB, i.e. 16 MB
+            "mmap_size": 64 * 1024 * 1024,
+            "temp_store": "MEMORY",
+        },
+    },
+    "testing": {
+        "engine": {},
+        "sqlite_pragmas": {"busy_timeout": 5000},
+    },
+    "production": {
+        "engine": {"pool_size": 10, "max_overflow": 20, "pool_recycle": 1800,
+                   "pool_timeout": 10, "pool_pre_ping": True},
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 10000,
+            "cache_size": -64000,       # 64 MB
+            "mmap_size": 256 * 1024 * 1024,
+            "temp_store": "MEMORY",
+        },
+    },
+    # serve.py: thousands of greenlets share a few connections. The pool is a
+    # hard cap (no overflow) and, with threading monkey-patched, a request
+    # waiting for a connection just yields to the others; keep it about the
+    # number of statements one process can usefully run at once.
+    "gevent": {
+        "engine": {"pool_size": 10, "max_overflow": 0, "pool_recycle": 1800,
+                   "pool_timeout": 30, "pool_pre_ping": True},
+        "sqlite_pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            # a busy wait blocks the whole event loop, not one request
+            "busy_timeout": 2000,
+            "cache_size": -64000,
+            "mmap_size": 256 * 1024 * 1024,
+            "temp_store": "MEMORY",
+        },
+    },
+}
+
+# pool sizing can be tuned per deployment without a new profile
+ENGINE_ENV_OVERRIDES = {
+    "pool_size": "DB_POOL_SIZE",
+    "max_overflow": "DB_MAX_OVERFLOW",
+    "pool_recycle": "DB_POOL_RECYCLE",
+    "pool_timeout": "DB_POOL_TIMEOUT",
+}
+
+
+def _is_sqlite(url):
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_sqlite_memory(url):
+    url = make_url(url)
+    return _is_sqlite(url) and url.database in (None, "", ":memory:")
+
+
+def _read_only_sqlite_url(url):
+    url = make_url(url)
+    database = url.database
+    if not url.query.get("uri"):
+        database = f"file:{database}"
+    return url.set(database=database).update_query_dict({"mode": "ro", "uri": "true"})
+
+
+def configure(app, profile_name):
+    """Set engine options before db.init_app runs."""
+    profile = ENGINE_PROFILES.get(profile_name, ENGINE_PROFILES["development"])
+    app.config["DB_ENGINE_PROFILE"] = profile_name
+    app.config["SQLITE_PRAGMAS"] = dict(profile["sqlite_pragmas"])
+
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    options = dict(profile["engine"])
+    for option, env in ENGINE_ENV_OVERRIDES.items():
+        if os.getenv(env):
+            options[option] = int(os.getenv(env))
+    if _is_sqlite_memory(uri):
+        # a single shared StaticPool connection; pool sizing doesn't apply
+        options = {}
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**options, **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
+
+
+def _pragma_listener(pragmas, read_only):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if read_only and name == "journal_mode":
+                continue  # a read-only connection can't change the journal mode
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return set_pragmas
+
+
+def _install_pragmas(app, engine):
+    pragmas = app.config.get("SQLITE_PRAGMAS")
+    if pragmas and engine.dialect.name == "sqlite":
+        read_only = engine.url.query.get("mode") == "ro"
+        event.listen(engine, "connect", _pragma_listener(pragmas, read_only))
+
+
+def _read_engine(app, primary):
+    read_uri = app.config.get("READ_DATABASE_URL")
+    if not read_uri:
+        if primary.dialect.name != "sqlite" or _is_sqlite_memory(primary.url):
+            return None
+        # the primary's URL is already resolved to an absolute path here
+        read_uri = _read_only_sqlite_url(primary.url)
+    return create_engine(read_uri, **app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+
+
+# every engine built by init_app; weak so discarded apps' engines can go
+_ENGINES = weakref.WeakSet()
+
+
+def _dispose_in_child():
+    for engine in list(_ENGINES):
+        # close=False: the sockets/file handles belong to the parent
+        engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_in_child)
+
+
+def _track(engine):
+    # an in-memory SQLite database lives in its one connection; a child
+    # can't reopen it, so leave it shared
+    if not _is_sqlite_memory(engine.url):
+        _ENGINES.add(engine)
+
+
+def init_app(app, db):
+    """Install the pragmas and, with DB_READ_ROUTING, the read-only engine.
+
+    The read engine is kept out of SQLALCHEMY_BINDS on purpose: binds get
+    their own metadata and create_all/drop_all would run against them.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            _install_pragmas(app, engine)
+            _track(engine)
+        read_engine = _read_engine(app, db.engine) if app.config.get("DB_READ_ROUTING") else None
+    if read_engine is not None:
+        _install_pragmas(app, read_engine)
+        _track(read_engine)
+    app.extensions["db_read_engine"] = read_engine
+
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create missing tables and the search index (idempotent)."""
+        db.create_all()
+        click.echo("Database tables created.")
+
+
+def read_engine():
+    return current_app.extensions.get("db_read_engine")
+
+
+def use_read_replica():
+    """Route this request's ORM reads to the read bind, if one is configured."""
+    g.db_read_only = True
+
+
+class RoutingSession(FlaskSQLAlchemySession):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and has_request_context()
+            and g.get("db_read_only")
+        ):
+            engine = read_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
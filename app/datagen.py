@@ -0,0 +1,189 @@
+# app/datagen.py
+# Synthetic data for reproducing scale problems locally.
+#
+#   flask generate-data --users 20000 --teams 2000 --issues 10000000 --skew 1.1
+#
+# Team sizes follow a Zipf-like curve (team k gets a share proportional to
+# 1 / k**skew), so a few teams end up with most of the issues and members
+# and the rest form a long tail; --skew 0 spreads everything evenly. Rows go
+# in through core executemany inserts with explicit ids, committed every
+# --commit-every rows, and the full-text triggers are dropped during the load
+# and the index rebuilt once at the end. The same seed on an empty database
+# always produces the same rows.
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import func, insert, select
+
+from app import db, counters, search
+from app.hashing import hash_password
+from app.models import Comment, Issue, Team, TeamMember, User
+
+STATUS_WEIGHTS = {"open": 4, "working": 2, "resolved": 4}
+START = datetime(2023, 1, 1)
+SPAN_SECONDS = 2 * 365 * 24 * 3600
+
+
+def zipf_shares(total, buckets, skew, minimum=0):
+    """Split `total` into `buckets` integer parts with Zipf-like weights."""
+    weights = [1 / (rank ** skew) for rank in range(1, buckets + 1)]
+    scale = max(total - minimum * buckets, 0) / sum(weights)
+    shares = [minimum + int(w * scale) for w in weights]
+    # hand out what flooring left over, biggest buckets first
+    for i in range(total - sum(shares)):
+        shares[i % buckets] += 1
+    return shares
+
+
+class _Writer:
+    """Buffers rows per table and inserts them in batches, committing periodically."""
+
+    def __init__(self, connection, batch_size, commit_every):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.buffers = {}
+        self.written = {}
+        self._since_commit = 0
+
+    def add(self, table, row):
+        buffer = self.buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(table)
+
+    def flush(self, table=None):
+        for t in [table] if table is not None else list(self.buffers):
+            rows = self.buffers.get(t)
+            if not rows:
+                continue
+            self.connection.execute(insert(t), rows)
+            self.written[t.name] = self.written.get(t.name, 0) + len(rows)
+            self._since_commit += len(rows)
+            self.buffers[t] = []
+        if self._since_commit >= self.commit_every:
+            self.connection.commit()
+            self._since_commit = 0
+
+
+def _next_id(connection, model):
+    return (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def generate(connection, users, teams, issues, comments_per_issue=1.0, skew=1.0, seed=0,
+             batch_size=10000, commit_every=500000, password="password", progress=None):
+    """Insert the synthetic dataset through `connection`; returns rows written per table."""
+    rng = random.Random(seed)
+    writer = _Writer(connection, batch_size, commit_every)
+    user_t, team_t, member_t = User.__table__, Team.__table__, TeamMember.__table__
+    issue_t, comment_t = Issue.__table__, Comment.__table__
+
+    first_user, first_team = _next_id(connection, User), _next_id(connection, Team)
+    issue_id, comment_id = _next_id(connection, Issue), _next_id(connection, Comment)
+
+    # one hash shared by every generated account keeps bcrypt out of the load
+    pw_hash = hash_password(password)
+    user_ids = range(first_user, first_user + users)
+    for uid in user_ids:
+        writer.add(user_t, {"id": uid, "username": f"user{uid}", "email": f"user{uid}@example.test",
+                            "password_hash": pw_hash, "created_at": START})
+
+    # about one membership per user plus a manager per team
+    member_counts = zipf_shares(users + teams, teams, skew, minimum=1)
+    issue_counts = zipf_shares(issues, teams, skew)
+    status_names, status_weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    # floor(Exp(rate)) is geometric with mean 1 / (e**rate - 1)
+    comment_rate = math.log(1 + 1 / comments_per_issue) if comments_per_issue > 0 else 0
+
+    for rank in range(teams):
+        team_id = first_team + rank
+        writer.add(team_t, {"id": team_id, "name": f"team{team_id}", "invite_code": f"gen{seed}-{team_id}",
+                            "created_at": START, "issues_version": 1, "issues_updated_at": START})
+        members = rng.sample(user_ids, min(member_counts[rank], users))
+        for i, uid in enumerate(members):
+            writer.add(member_t, {"user_id": uid, "team_id": team_id,
+                                  "role": "manager" if i == 0 else "member", "joined_at": START})
+
+        created = START + timedelta(seconds=rng.uniform(0, SPAN_SECONDS / 10))
+        mean_gap = SPAN_SECONDS * 0.9 / max(issue_counts[rank], 1)
+        statuses = rng.choices(status_names, status_weights, k=issue_counts[rank])
+        for status in statuses:
+            created += timedelta(seconds=rng.expovariate(1 / mean_gap))
+            author = rng.choice(members)
+            n_comments = int(rng.expovariate(comment_rate)) if comment_rate else 0
+            writer.add(issue_t, {
+                "id": issue_id, "title": f"Issue {issue_id} in team {team_id}",
+                "description": f"Generated issue {issue_id} (seed {seed})", "status": status,
+                "created_at": created, "version": 1, "updated_at": created,
+                "comment_count": n_comments, "user_id": author, "team_id": team_id,
+            })
+            for c in range(n_comments):
+                writer.add(comment_t, {
+                    "id": comment_id, "content": f"Comment {c + 1} on issue {issue_id}",
+                    "created_at": created + timedelta(minutes=c + 1),
+                    "user_id": rng.choice(members), "issue_id": issue_id,
+                })
+                comment_id += 1
+            issue_id += 1
+        if progress is not None:
+            progress(rank + 1, teams)
+
+    writer.flush()
+    connection.commit()
+    return writer.written
+
+
+def init_app(app):
+    @app.cli.command("generate-data")
+    @click.option("--users", default=1000, show_default=True)
+    @click.option("--teams", default=100, show_default=True)
+    @click.option("--issues", default=100000, show_default=True)
+    @click.option("--comments-per-issue", default=1.0, show_default=True, help="Average; geometric spread.")
+    @click.option("--skew", default=1.0, show_default=True, help="Zipf exponent for team sizes, 0 = uniform.")
+    @click.option("--seed", default=0, show_default=True)
+    @click.option("--batch-size", default=10000, show_default=True, help="Rows per executemany.")
+    @click.option("--commit-every", default=500000, show_default=True, help="Rows per transaction.")
+    @click.option("--password", default="password", show_default=True, help="Password of every generated user.")
+    def generate_data_command(users, teams, issues, comments_per_issue, skew, seed,
+                              batch_size, commit_every, password):
+        """Bulk-generate users, teams, memberships, issues and comments."""
+        if teams < 1 or users < 1:
+            raise click.BadParameter("need at least one user and one team")
+        started = time.perf_counter()
+        db.create_all()
+        with db.engine.connect() as connection:
+            sqlite = search.is_supported(connection)
+            if sqlite:
+                # durability doesn't matter for a scratch load; the triggers
+                # would index row by row, the rebuild below does it in one pass
+                connection.exec_driver_sql("PRAGMA synchronous=OFF")
+                for name in ("issue_fts_ai", "comment_fts_ai"):
+                    connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+                connection.commit()
+
+            step = max(teams // 20, 1)
+
+            def progress(done, total):
+                if done % step == 0 or done == total:
+                    click.echo(f"  {done}/{total} teams ({time.perf_counter() - started:.0f}s)")
+
+            try:
+                written = generate(connection, users, teams, issues, comments_per_issue, skew, seed,
+                                   batch_size, commit_every, password, progress)
+            finally:
+                # also on errors and Ctrl-C: without the triggers every later
+                # write would silently be missing from search
+                if sqlite:
+                    connection.rollback()
+                    click.echo("Rebuilding the search index...")
+                    search.rebuild(connection)
+                    connection.commit()
+                    connection.exec_driver_sql("PRAGMA synchronous=NORMAL")
+
+        click.echo("Recomputing team counters...")
+        counters.repair()
+        summary = ", ".join(f"{n} {table}" for table, n in written.items())
+        click.echo(f"Generated {summary} in {time.perf_counter() - started:.1f}s")
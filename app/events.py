@@ -0,0 +1,343 @@
+# app/events.py
+# Per-team push of issue changes over Server-Sent Events.
+#
+# Writers call publish() inside their own transaction; it only adds a row to
+# the team_event outbox table, so an event exists exactly when the change
+# it describes was committed, and every worker process sees it. Bulk writes
+# publish one event per team with "issue_ids" instead of "issue_id", so a
+# thousand-issue batch can't overflow the subscriber queues. Streaming
+# is done by one EventHub per process:
+#
+#   - each open /events stream is a Subscription: a small bounded queue
+#     registered under its team_id
+#   - a single dispatcher thread polls the outbox (id > last seen, like the
+#     revocation cache in app/revocation.py) and puts each new event on the
+#     queues of that team's subscribers
+#
+# An idle stream therefore costs a queue and a blocked generator - no DB
+# connection, no per-connection polling - and a burst of writes is one
+# query per poll interval however many clients are listening. A subscriber
+# that stops reading is cut off when its queue fills; the browser's
+# EventSource reconnects with Last-Event-ID and replays what it missed from
+# the outbox.
+#
+# Rows older than EVENTS_RETENTION_SECONDS are deleted on a background
+# thread, started from publish() (and the dispatcher's poll) at most once
+# every tenth of the retention period, so the table stays bounded even in a
+# process nobody subscribes to; `flask prune-events` does the same by hand.
+#
+# Streams are long-lived, so serve them from an async worker (gevent); with
+# threaded workers each open stream holds a thread.
+#
+# Config:
+#   EVENTS_POLL_SECONDS       outbox poll interval (default 0.5)
+#   EVENTS_KEEPALIVE_SECONDS  comment frame sent on idle streams (default 15)
+#   EVENTS_QUEUE_SIZE         events buffered per subscriber (default 256)
+#   EVENTS_RETENTION_SECONDS  how long events stay replayable (default 3600)
+#   EVENTS_REPLAY_LIMIT       most events replayed on reconnect (default 500)
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from sqlalchemy import delete, func, select
+
+logger = logging.getLogger("app.events")
+
+RETRY_MS = 3000
+# a dispatch batch; more waiting rows are picked up on the next poll
+POLL_LIMIT = 1000
+_OVERFLOW = object()
+
+
+def publish(team_id, kind, **data):
+    """Queue an event for the team's subscribers; sent once the caller commits."""
+    from app import db
+    from app.models import TeamEvent
+    db.session.add(TeamEvent(team_id=team_id, kind=kind,
+                             payload=json.dumps(data, default=str, separators=(",", ":"))))
+    hub().maybe_prune()
+
+
+def format_event(event_id, kind, payload):
+    return f"id: {event_id}\nevent: {kind}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    def __init__(self, team_id, size):
+        self.team_id = team_id
+        self.queue = queue.Queue(size)
+
+    def offer(self, frame):
+        """Non-blocking put; a full queue ends the stream instead of stalling the hub."""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self):
+        # make room for the sentinel so the stream wakes up and ends
+        while True:
+            try:
+                self.queue.put_nowait(_OVERFLOW)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+class EventHub:
+    def __init__(self, app):
+        self.app = app
+        self.poll_seconds = float(app.config.get("EVENTS_POLL_SECONDS", 0.5))
+        self.keepalive_seconds = float(app.config.get("EVENTS_KEEPALIVE_SECONDS", 15))
+        self.queue_size = int(app.config.get("EVENTS_QUEUE_SIZE", 256))
+        self.retention_seconds = float(app.config.get("EVENTS_RETENTION_SECONDS", 3600))
+        self.replay_limit = int(app.config.get("EVENTS_REPLAY_LIMIT", 500))
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._last_id = None
+        self._thread = None
+        self._pid = None
+        self._pruner = None
+        # a fresh process has nothing of its own to expire yet
+        self._next_prune = time.monotonic() + self.prune_interval()
+
+    # ---- subscribers --------------------------------------------------------
+
+    def subscribe(self, team_id):
+        self._ensure_dispatcher()
+        sub = Subscription(team_id, self.queue_size)
+        with self._lock:
+            self._subscribers[team_id].add(sub)
+            start = self._last_id is None
+        if start:
+            # first subscriber since the hub went idle: dispatch from "now"
+            current = self._max_id()
+            with self._lock:
+                if self._last_id is None:
+                    self._last_id = current
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.team_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.team_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    # ---- dispatcher ---------------------------------------------------------
+
+    def _ensure_dispatcher(self):
+        # one thread per process; a forked worker inherits the object but not the thread
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                self._subscribers.clear()
+                self._last_id = None
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name="team-events", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.poll()
+            except Exception:  # keep streaming; the next poll retries
+                self.app.logger.exception("team event poll failed")
+
+    def _max_id(self):
+        from app import db
+        from app.models import TeamEvent
+        with self.app.app_context(), db.engine.connect() as conn:
+            return conn.execute(select(func.coalesce(func.max(TeamEvent.id), 0))).scalar()
+
+    def poll(self):
+        """Fan out events committed since the last poll; returns how many were sent."""
+        from app import db
+        from app.models import TeamEvent
+        with self._lock:
+            if not self._subscribers:
+                # nobody to tell; the next subscriber starts from "now"
+                self._last_id = None
+                return 0
+            last_id = self._last_id
+        if last_id is None:
+            return 0
+        with self.app.app_context(), db.engine.connect() as conn:
+            rows = conn.execute(
+                select(TeamEvent.id, TeamEvent.team_id, TeamEvent.kind, TeamEvent.payload)
+                .where(TeamEvent.id > last_id)
+                .order_by(TeamEvent.id)
+                .limit(POLL_LIMIT)
+            ).all()
+        if rows:
+            with self._lock:
+                if self._last_id is not None:
+                    self._last_id = rows[-1].id
+            self._dispatch(rows)
+        self.maybe_prune()
+        return len(rows)
+
+    def _dispatch(self, rows):
+        with self._lock:
+            targets = {team_id: list(subs) for team_id, subs in self._subscribers.items()}
+        for row in rows:
+            subs = targets.get(row.team_id)
+            if not subs:
+                continue
+            # formatted once, shared by every subscriber of the team
+            frame = (row.id, format_event(row.id, row.kind, row.payload))
+            for sub in subs:
+                if not sub.offer(frame):
+                    self.unsubscribe(sub)
+                    sub.close()
+
+    # ---- retention ----------------------------------------------------------
+
+    def prune_interval(self):
+        return max(self.retention_seconds / 10, self.poll_seconds)
+
+    def maybe_prune(self):
+        """Start a prune if one is due; cheap enough to call on every publish."""
+        now = time.monotonic()
+        if now < self._next_prune:
+            return None
+        with self._lock:
+            if now < self._next_prune:
+                return None
+            self._next_prune = now + self.prune_interval()
+        return self.start_prune()
+
+    def start_prune(self):
+        """Prune on a background thread; returns it (or None if one is running)."""
+        with self._lock:
+            if self._pruner is not None and self._pruner.is_alive():
+                return None
+            self._pruner = threading.Thread(target=self._prune, name="team-events-prune", daemon=True)
+        self._pruner.start()
+        return self._pruner
+
+    def _prune(self):
+        try:
+            prune(self.app, self.retention_seconds)
+        except Exception:
+            logger.exception("pruning team events failed")
+
+    # ---- streams ------------------------------------------------------------
+
+    def replay(self, team_id, after_id):
+        from app import db
+        from app.models import TeamEvent
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                select(TeamEvent.id, TeamEvent.kind, TeamEvent.payload)
+                .where(TeamEvent.team_id == team_id, TeamEvent.id > after_id)
+                .order_by(TeamEvent.id)
+                .limit(self.replay_limit)
+            ).all()
+        return [(row.id, format_event(row.id, row.kind, row.payload)) for row in rows]
+
+    def stream(self, team_id, last_event_id=None):
+        """Subscribe now and return the SSE body generator.
+
+        Subscribing (and replaying) happens before the generator is handed to
+        the server, so nothing committed in between is missed; the generator
+        itself needs no request context or database session.
+        """
+        sub = self.subscribe(team_id)
+        try:
+            backlog = self.replay(team_id, last_event_id) if last_event_id is not None else []
+        except Exception:
+            self.unsubscribe(sub)
+            raise
+        keepalive = self.keepalive_seconds
+
+        def body():
+            sent = last_event_id or 0
+            try:
+                yield f"retry: {RETRY_MS}\n\n"
+                for event_id, frame in backlog:
+                    sent = event_id
+                    yield frame
+                while True:
+                    try:
+                        item = sub.queue.get(timeout=keepalive)
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+                        continue
+                    if item is _OVERFLOW:
+                        return
+                    event_id, frame = item
+                    if event_id > sent:  # already replayed
+                        sent = event_id
+                        yield frame
+            finally:
+                self.unsubscribe(sub)
+
+        return body()
+
+
+def prune(app, retention_seconds):
+    from app import db
+    from app.models import TeamEvent
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=retention_seconds)
+    with app.app_context(), db.engine.begin() as conn:
+        return conn.execute(delete(TeamEvent).where(TeamEvent.created_at < cutoff)).rowcount
+
+
+def hub():
+    return current_app.extensions["event_hub"]
+
+
+def last_event_id(request):
+    """The Last-Event-ID header (EventSource reconnects) or ?last_event_id=."""
+    value = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def event_stream(team_id, request):
+    """The text/event-stream response for one team."""
+    from app import db
+    # the view's session (auth, membership) is done with; hand its connection
+    # back before the hub takes one, or a burst of subscribers can hold the
+    # whole pool while each waits for a second connection
+    db.session.close()
+    return current_app.response_class(
+        hub().stream(team_id, last_event_id(request)),
+        mimetype="text/event-stream",
+        # X-Accel-Buffering: proxies must pass frames through as they're written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def init_app(app):
+    app.extensions["event_hub"] = event_hub = EventHub(app)
+
+    @app.cli.command("prune-events")
+    def prune_events_command():
+        """Delete team events older than EVENTS_RETENTION_SECONDS."""
+        deleted = prune(app, event_hub.retention_seconds)
+        click.echo(f"Pruned {deleted} expired team events.")
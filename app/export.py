@@ -0,0 +1,84 @@
+# app/export.py
+# Streaming export of a team's issues as NDJSON or CSV.
+#
+# Rows come off a server-side cursor (yield_per) in fixed-size partitions and
+# are written out as they arrive, so memory stays flat regardless of team
+# size and the first bytes leave before the query has finished. Comments,
+# when requested, are fetched with one IN query per partition.
+import csv
+import io
+import json
+from itertools import groupby
+
+from sqlalchemy import select
+
+from app import db
+from app.models import Comment, Issue, User
+from app.serialization import iso
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+CSV_FIELDS = ["id", "title", "description", "status", "user_id", "username", "created_at"]
+
+
+def iter_issues(team_id, with_comments=False, chunk_size=1000):
+    """Yield one dict per issue of the team, oldest first."""
+    stmt = (
+        select(Issue.id, Issue.title, Issue.description, Issue.status,
+               Issue.user_id, User.username, Issue.created_at)
+        .outerjoin(User, User.id == Issue.user_id)
+        .where(Issue.team_id == team_id)
+        .order_by(Issue.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = db.session.execute(stmt)
+    for chunk in result.partitions():
+        comments = {}
+        if with_comments:
+            rows = db.session.execute(
+                select(Comment.issue_id, Comment.id, Comment.content, User.username, Comment.created_at)
+                .outerjoin(User, User.id == Comment.user_id)
+                .where(Comment.issue_id.in_([row.id for row in chunk]))
+                .order_by(Comment.issue_id, Comment.id)
+            )
+            for issue_id, group in groupby(rows, key=lambda r: r.issue_id):
+                comments[issue_id] = [
+                    {"id": c.id, "content": c.content, "author": c.username,
+                     "created_at": iso(c.created_at)}
+                    for c in group
+                ]
+
+        for row in chunk:
+            item = row._asdict()
+            item["created_at"] = iso(item["created_at"])
+            if with_comments:
+                item["comments"] = comments.get(row.id, [])
+            yield item
+
+
+def ndjson_lines(items):
+    for item in items:
+        yield json.dumps(item, separators=(",", ":")) + "\n"
+
+
+def csv_lines(items, with_comments=False):
+    fields = CSV_FIELDS + (["comments"] if with_comments else [])
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    yield _drain(buffer)
+    for item in items:
+        if with_comments:
+            item["comments"] = json.dumps(item["comments"], separators=(",", ":"))
+        writer.writerow(item)
+        yield _drain(buffer)
+
+
+def _drain(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
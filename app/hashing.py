@@ -0,0 +1,137 @@
+# app/hashing.py
+# bcrypt hashing/verification off the request workers.
+#
+# bcrypt is deliberately CPU-heavy. Run inline, a burst of logins pins every
+# request thread and cheap reads queue behind it. Here the work goes to a
+# small dedicated process pool with a bounded queue: when the pool and its
+# queue are full the request fails fast with 503 + Retry-After instead of
+# holding a worker hostage.
+#
+# Under gevent (serve.py) a "thread" offload is the better fit: bcrypt
+# releases the GIL, so hashing on gevent's pool of real OS threads keeps the
+# event loop free while the waiting greenlet simply yields - no pickling and
+# no extra processes. Without gevent it is a plain thread pool.
+#
+# Config:
+#   BCRYPT_LOG_ROUNDS   work factor (Flask-Bcrypt's setting, per environment)
+#   BCRYPT_OFFLOAD      "process" (default), "thread" or "inline"
+#   BCRYPT_POOL_SIZE    hashing processes/threads (default: half the CPUs)
+#   BCRYPT_QUEUE_SIZE   extra jobs allowed to wait for a process
+#   BCRYPT_QUEUE_TIMEOUT seconds to wait for a slot before giving up
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import flask_bcrypt
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+
+
+def _thread_pool(size):
+    try:
+        from gevent.monkey import is_module_patched
+    except ImportError:
+        is_module_patched = None
+    if is_module_patched is not None and is_module_patched("threading"):
+        # patched threads are greenlets; bcrypt must run on real ones
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+        return NativeThreadPoolExecutor(max_workers=size)
+    return ThreadPoolExecutor(max_workers=size, thread_name_prefix="bcrypt")
+
+
+class HasherBusy(ServiceUnavailable):
+    description = "Authentication is busy, please retry shortly."
+
+
+def _hash(password, rounds):
+    return flask_bcrypt.generate_password_hash(password, rounds).decode("utf-8")
+
+
+def _check(pw_hash, password):
+    return flask_bcrypt.check_password_hash(pw_hash, password)
+
+
+class PasswordHasher:
+    def __init__(self, rounds=12, offload="process", pool_size=None, queue_size=None, queue_timeout=0.0):
+        self.rounds = rounds
+        self.offload = offload
+        self.pool_size = pool_size or max(1, (os.cpu_count() or 2) // 2)
+        self.queue_size = self.pool_size * 2 if queue_size is None else queue_size
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.pool_size + self.queue_size)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self.busy_rejections = 0
+        self.calls = 0
+        self.seconds = 0.0  # cumulative time spent hashing/verifying (incl. queueing)
+
+    def _executor(self):
+        # created lazily, and again after a fork: pools don't survive fork
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    if self.offload == "thread":
+                        self._pool = _thread_pool(self.pool_size)
+                    else:
+                        methods = multiprocessing.get_all_start_methods()
+                        ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                        self._pool = ProcessPoolExecutor(max_workers=self.pool_size, mp_context=ctx)
+                    self._pool_pid = os.getpid()
+                    atexit.register(self._pool.shutdown, wait=False, cancel_futures=True)
+        return self._pool
+
+    def _run(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            if self.offload == "inline":
+                return fn(*args)
+            if self.queue_timeout:
+                acquired = self._slots.acquire(timeout=self.queue_timeout)
+            else:
+                acquired = self._slots.acquire(blocking=False)
+            if not acquired:
+                self.busy_rejections += 1
+                raise HasherBusy(retry_after=1)
+            try:
+                return self._executor().submit(fn, *args).result()
+            finally:
+                self._slots.release()
+        finally:
+            self.calls += 1
+            self.seconds += time.perf_counter() - started
+
+    def hash(self, password):
+        if not password:
+            raise ValueError("Password must be non-empty.")
+        return self._run(_hash, password, self.rounds)
+
+    def check(self, pw_hash, password):
+        if not pw_hash or not password:
+            return False
+        return self._run(_check, pw_hash, password)
+
+
+def hasher():
+    return current_app.extensions["password_hasher"]
+
+
+def hash_password(password):
+    return hasher().hash(password)
+
+
+def check_password(pw_hash, password):
+    return hasher().check(pw_hash, password)
+
+
+def init_app(app):
+    app.extensions["password_hasher"] = PasswordHasher(
+        rounds=app.config.get("BCRYPT_LOG_ROUNDS", 12),
+        offload=app.config.get("BCRYPT_OFFLOAD", "process"),
+        pool_size=app.config.get("BCRYPT_POOL_SIZE"),
+        queue_size=app.config.get("BCRYPT_QUEUE_SIZE"),
+        queue_timeout=app.config.get("BCRYPT_QUEUE_TIMEOUT", 0.0),
+    )
@@ -0,0 +1,86 @@
+# app/identity.py
+# Single place to resolve "who is making this request".
+#
+# current_user() works for both the JWT API and the session-based web views.
+# The result is memoized on flask.g for the rest of the request, and backed
+# by a bounded per-process cache of lightweight UserRecord tuples so
+# authenticated reads don't hit the users table every time. Any update or
+# delete of a User drops its cache entry; the TTL bounds how long another
+# worker's write can go unnoticed.
+from collections import namedtuple
+
+from flask import current_app, g, has_app_context, session
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, select
+
+from app import db
+from app.cache import LRUCache
+from app.models import User
+
+UserRecord = namedtuple("UserRecord", ["id", "username", "email"])
+
+_MISSING = object()
+
+
+def _cache():
+    return current_app.extensions["identity_cache"]
+
+
+def _current_user_id():
+    # API requests carry a verified JWT, web requests a session cookie
+    try:
+        uid = get_jwt_identity()
+    except RuntimeError:
+        uid = None
+    if uid is None:
+        uid = session.get("user_id")
+    return int(uid) if uid is not None else None
+
+
+def load_user(user_id):
+    """Return the UserRecord for user_id (cached), or None if it doesn't exist."""
+    cache = _cache()
+    record = cache.get(user_id)
+    if record is not None:
+        return record
+
+    row = db.session.execute(
+        select(User.id, User.username, User.email).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    record = UserRecord(*row)
+    cache.set(user_id, record)
+    return record
+
+
+def current_user():
+    """The authenticated user for this request as a UserRecord, or None."""
+    user = g.get("_identity_user", _MISSING)
+    if user is _MISSING:
+        uid = _current_user_id()
+        user = load_user(uid) if uid is not None else None
+        g._identity_user = user
+    return user
+
+
+def invalidate_user(user_id):
+    if not has_app_context() or "identity_cache" not in current_app.extensions:
+        return
+    _cache().delete(user_id)
+    user = g.get("_identity_user", None)
+    if user is not None and user.id == user_id:
+        g.pop("_identity_user")
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+def init_app(app):
+    app.extensions["identity_cache"] = LRUCache(
+        maxsize=app.config.get("IDENTITY_CACHE_SIZE", 10000),
+        ttl=app.config.get("IDENTITY_CACHE_TTL", 300),
+    )
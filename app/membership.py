@@ -0,0 +1,161 @@
+# app/membership.py
+# Team membership checks for the JWT API without a query per request.
+#
+# Access tokens carry the caller's teams as claims, {"teams": {team_id:
+# role}, "mv": version}, added by an additional-claims loader at login and
+# refresh. User.membership_version is bumped in the same transaction as any
+# insert, update or delete of the user's TeamMember rows, so a token always
+# says which membership state it was issued from.
+#
+# require(team_id) answers from the newest membership state this worker
+# knows about, with no query:
+#   - the token claims, unless this worker has seen a newer version for the
+#     user (a local membership change, or a fallback load), in which case
+#   - the versioned per-process cache, {user_id: (version, teams)}.
+# Only a team missing from that state (a team joined after the token was
+# issued, or a genuine non-member) goes to the database: one primary-key
+# read of the version, plus a reload of the user's memberships when the
+# cached version is stale. A change committed by this worker replaces the
+# cache entry right away, so newly joined teams work without a new token.
+#
+# Grants are trusted for as long as the state they came from: a membership
+# removed in another worker stops counting here when the cached entry
+# expires (MEMBERSHIP_CACHE_TTL) and, for the token claims, when the access
+# token does. Nothing removes or downgrades memberships today; a path that
+# does should also revoke the user's tokens (app/revocation.py).
+#
+# Config:
+#   MEMBERSHIP_CACHE_SIZE    users kept in the fallback cache (default 10000)
+#   MEMBERSHIP_CACHE_TTL     seconds a cached entry is trusted (default 300)
+#   MEMBERSHIP_CLAIMS_MAX    teams embedded in a token; users in more teams
+#                            always use the fallback (default 100)
+from collections import namedtuple
+
+from flask import abort, current_app, g, has_app_context
+from flask_jwt_extended import get_jwt
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.cache import LRUCache
+from app.models import TeamMember, User
+
+# teams is {str(team_id): role}, or None when only the version is known
+Memberships = namedtuple("Memberships", ["version", "teams"])
+
+
+def _cache():
+    return current_app.extensions["membership_cache"]
+
+
+def _load(user_id):
+    """(version, teams) straight from the database, in one statement."""
+    rows = db.session.execute(
+        select(User.membership_version, TeamMember.team_id, TeamMember.role)
+        .outerjoin(TeamMember, TeamMember.user_id == User.id)
+        .where(User.id == user_id)
+    ).all()
+    if not rows:
+        return None
+    teams = {str(team_id): role for _, team_id, role in rows if team_id is not None}
+    found = Memberships(rows[0].membership_version, teams)
+    _cache().set(user_id, found)
+    return found
+
+
+def lookup(user_id):
+    """The user's current memberships, checked against the stored version."""
+    version = db.session.scalar(select(User.membership_version).where(User.id == user_id))
+    if version is None:
+        return None
+    cached = _cache().get(user_id)
+    if cached is not None and cached.version == version and cached.teams is not None:
+        return cached
+    return _load(user_id)
+
+
+def claims(identity):
+    """Additional claims for a new token: the user's teams and their version."""
+    user_id = int(identity)
+    # login issues an access and a refresh token; load once for both
+    found = g.get("_membership_claims")
+    if found is None or found[0] != user_id:
+        found = g._membership_claims = (user_id, _load(user_id))
+    memberships = found[1]
+    if memberships is None:
+        return {}
+    if len(memberships.teams) > current_app.config.get("MEMBERSHIP_CLAIMS_MAX", 100):
+        return {"mv": memberships.version}
+    return {"teams": memberships.teams, "mv": memberships.version}
+
+
+def role(team_id):
+    """The JWT caller's role in team_id, or None if they aren't a member."""
+    token = get_jwt()
+    user_id = int(token["sub"])
+    key = str(team_id)
+
+    teams = token.get("teams")
+    cached = _cache().get(user_id)
+    if cached is not None and cached.version > token.get("mv", -1):
+        teams = cached.teams  # newer than the token; None means "reload"
+    if teams is not None and key in teams:
+        return teams[key]
+
+    # bulk endpoints check several teams; verify against the database once
+    found = g.get("_membership_lookup")
+    if found is None or found[0] != user_id:
+        found = g._membership_lookup = (user_id, lookup(user_id))
+    memberships = found[1]
+    return memberships.teams.get(key) if memberships is not None else None
+
+
+def require(team_id):
+    """Abort with 403 unless the JWT caller belongs to team_id; returns the role."""
+    member_role = role(team_id)
+    if member_role is None:
+        abort(403, description="Not a member of this team")
+    return member_role
+
+
+# -------------------------
+# Version bumps
+# -------------------------
+def _bump(connection, session, user_id):
+    version = connection.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(membership_version=User.membership_version + 1)
+        .returning(User.membership_version)
+    ).scalar()
+    if session is not None and version is not None:
+        session.info.setdefault("membership_versions", {})[user_id] = version
+
+
+@event.listens_for(TeamMember, "after_insert")
+@event.listens_for(TeamMember, "after_update")
+@event.listens_for(TeamMember, "after_delete")
+def _membership_changed(mapper, connection, target):
+    _bump(connection, object_session(target), target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_after_commit(session):
+    versions = session.info.pop("membership_versions", None)
+    if versions and has_app_context() and "membership_cache" in current_app.extensions:
+        cache = _cache()
+        for user_id, version in versions.items():
+            cache.set(user_id, Memberships(version, None))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("membership_versions", None)
+
+
+def init_app(app, jwt):
+    app.extensions["membership_cache"] = LRUCache(
+        maxsize=app.config.get("MEMBERSHIP_CACHE_SIZE", 10000),
+        ttl=app.config.get("MEMBERSHIP_CACHE_TTL", 300),
+    )
+    jwt.additional_claims_loader(claims)
@@ -0,0 +1,297 @@
+# app/metrics.py
+# Request, SQL, connection pool and bcrypt metrics on /metrics.
+#
+# Hooks on the Flask request lifecycle and on SQLAlchemy engine events feed
+# a few counters and histograms kept in process memory; /metrics renders
+# them in the Prometheus text exposition format. Each observation is a
+# perf_counter() call and a short locked update, cheap enough to leave on.
+# Every worker process keeps its own numbers - scrape each worker, or sum
+# them in the query.
+#
+# The endpoint is for scrapers, not users: with METRICS_TOKEN set it answers
+# only requests carrying "Authorization: Bearer <token>". Production leaves
+# it off unless METRICS_ENABLED is set, and warns when it's on without a token.
+#
+# Config:
+#   METRICS_ENABLED   install the hooks and the endpoint (default: on in
+#                     development/testing, off in production)
+#   METRICS_TOKEN     bearer token required to read /metrics (default none)
+#   METRICS_PATH      where to serve them (default /metrics)
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from flask import abort, current_app, g, got_request_exception, has_request_context, request
+from sqlalchemy import event
+
+# seconds; requests and SQL statements share one bucket layout
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(entry)) for labels, entry in self._values.items()]
+        for labels, entry in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), entry[:-1]):
+                cumulative += n
+                le = ("le", bound if bound == "+Inf" else repr(float(bound)))
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, [le])} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {entry[-1]}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Gauge:
+    """A value computed at scrape time by `collect() -> {labels: value}`."""
+    kind = "gauge"
+
+    def __init__(self, name, help, collect, labels=(), kind="gauge"):
+        self.name, self.help, self.labelnames = name, help, tuple(labels)
+        self.collect = collect
+        self.kind = kind
+
+    def samples(self):
+        for labels, value in self.collect().items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class AppMetrics:
+    def __init__(self):
+        self.registry = r = Registry()
+        self.request_seconds = r.register(Histogram(
+            "http_request_duration_seconds", "Request latency by endpoint.", ["method", "endpoint"]))
+        self.requests = r.register(Counter(
+            "http_requests_total", "Responses by endpoint and status code.", ["method", "endpoint", "status"]))
+        self.exceptions = r.register(Counter(
+            "http_request_exceptions_total", "Unhandled exceptions raised by views.", ["endpoint", "exception"]))
+        self.sql_statements = r.register(Counter(
+            "sql_statements_total", "SQL statements executed, by endpoint.", ["endpoint"]))
+        self.sql_seconds = r.register(Counter(
+            "sql_statement_seconds_total", "Time spent executing SQL, by endpoint.", ["endpoint"]))
+        self.sql_latency = r.register(Histogram(
+            "sql_statement_duration_seconds", "SQL statement latency."))
+        self.pool_wait = r.register(Histogram(
+            "db_pool_checkout_wait_seconds", "Time waiting for a pooled connection.", ["engine"]))
+
+
+def metrics():
+    return current_app.extensions["metrics"]
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or "<unmatched>"
+    return "<none>"
+
+
+# -------------------------
+# Request lifecycle
+# -------------------------
+def _install_request_hooks(app, m):
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("_metrics_started", None)
+        if started is not None:
+            endpoint = _endpoint()
+            m.request_seconds.observe(time.perf_counter() - started, request.method, endpoint)
+            m.requests.inc(request.method, endpoint, str(response.status_code))
+        return response
+
+    def _record_exception(sender, exception, **extra):
+        m.exceptions.inc(_endpoint(), type(exception).__name__)
+
+    got_request_exception.connect(_record_exception, app, weak=False)
+
+
+# -------------------------
+# SQLAlchemy engines
+# -------------------------
+def _instrument_pool(engine, m, name):
+    # QueuePool has no "before checkout" event, so time the pool's own getter;
+    # this covers waiting for a free connection and opening a new one
+    pool = engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            m.pool_wait.observe(time.perf_counter() - started, name)
+
+    pool._do_get = timed_do_get
+
+
+def _instrument_engine(engine, m, name):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("_metrics_started")
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+        endpoint = _endpoint()
+        m.sql_statements.inc(endpoint)
+        m.sql_seconds.inc(endpoint, amount=elapsed)
+        m.sql_latency.observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        stack = context.connection.info.get("_metrics_started") if context.connection else None
+        if stack:
+            stack.pop()
+
+    _instrument_pool(engine, m, name)
+    # dispose() swaps in a fresh pool
+    event.listen(engine, "engine_disposed", lambda engine: _instrument_pool(engine, m, name))
+
+
+def _pool_gauges(app):
+    from app import db
+    from app.database import read_engine
+
+    def engines():
+        with app.app_context():
+            found = {"primary": db.engine}
+            if read_engine() is not None:
+                found["read"] = read_engine()
+        return found
+
+    def checked_out():
+        return {(name,): getattr(engine.pool, "checkedout", lambda: 0)() for name, engine in engines().items()}
+
+    return Gauge("db_pool_checked_out_connections", "Connections currently checked out.",
+                 checked_out, ["engine"])
+
+
+def _hasher_metrics(app):
+    def hasher():
+        return app.extensions["password_hasher"]
+
+    return [
+        Gauge("bcrypt_seconds_total", "Time spent hashing/verifying passwords.",
+              lambda: {(): hasher().seconds}, kind="counter"),
+        Gauge("bcrypt_operations_total", "Password hashes and checks.",
+              lambda: {(): hasher().calls}, kind="counter"),
+        Gauge("bcrypt_busy_rejections_total", "Logins refused because the hashing pool was full.",
+              lambda: {(): hasher().busy_rejections}, kind="counter"),
+    ]
+
+
+def _cache_metrics(app):
+    def stat(key):
+        return lambda: {(): app.extensions["response_cache"].stats()[key]}
+
+    return [
+        Gauge("response_cache_hits_total", "Listing cache hits.", stat("hits"), kind="counter"),
+        Gauge("response_cache_misses_total", "Listing cache misses.", stat("misses"), kind="counter"),
+    ]
+
+
+def init_app(app):
+    """Install the hooks and the endpoint; call after the other extensions."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    from app import db, limiter
+    from app.database import read_engine
+
+    m = app.extensions["metrics"] = AppMetrics()
+    _install_request_hooks(app, m)
+    with app.app_context():
+        _instrument_engine(db.engine, m, "primary")
+        if read_engine() is not None:
+            _instrument_engine(read_engine(), m, "read")
+
+    m.registry.register(_pool_gauges(app))
+    for metric in _hasher_metrics(app) + _cache_metrics(app):
+        m.registry.register(metric)
+
+    token = app.config.get("METRICS_TOKEN")
+    if not token and app.config.get("CONFIG_PROFILE") == "production":
+        logging.getLogger("app.metrics").warning(
+            "METRICS_ENABLED without METRICS_TOKEN: %s is readable by anyone",
+            app.config.get("METRICS_PATH", "/metrics"))
+
+    @limiter.exempt
+    def metrics_view():
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            abort(401)
+        return current_app.response_class(
+            metrics().registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    app.add_url_rule(app.config.get("METRICS_PATH", "/metrics"), "metrics", metrics_view)
@@ -1,9 +1,12 @@
 # app/models.py
-from datetime import datetime
-from app import db, bcrypt
+from datetime import datetime, timezone
+from app import db
+from app.hashing import hash_password, check_password
 from zoneinfo import ZoneInfo
 import secrets
 
+ISSUE_STATUSES = ("open", "working", "resolved")
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -11,15 +14,22 @@ class User(db.Model):
     password_hash = db.Column(db.String(128), nullable=True)  # nullable for OAuth users
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(ZoneInfo('Asia/Kolkata')))
 
-    issues = db.relationship("Issue", backref="author", lazy=True)
-    comments = db.relationship("Comment", backref="author", lazy=True)
+    # bumped whenever the user's TeamMember rows change (app/membership.py)
+    membership_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # author is read on every issue/comment we serialize or render, so the
+    # many-to-one side is joined in eagerly instead of lazy-loaded per row
+    issues = db.relationship("Issue", backref=db.backref("author", lazy="joined"), lazy=True)
+    comments = db.relationship("Comment", backref=db.backref("author", lazy="joined"), lazy=True)
     teams = db.relationship("TeamMember", back_populates="user", cascade="all, delete")
 
+    # bcrypt runs on the bounded hashing pool (app/hashing.py); raises
+    # HasherBusy (503) when the pool is saturated
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return check_password(self.password_hash, password)
     
 class Team(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -27,9 +37,14 @@ class Team(db.Model):
     invite_code = db.Column(db.String(32), unique=True, default=lambda: secrets.token_urlsafe(16))
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(ZoneInfo("Asia/Kolkata")))
 
+    # bumped whenever an issue of this team is created or changes (app/versions.py)
+    issues_version = db.Column(db.Integer, nullable=False, default=1)
+    issues_updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
     # Relationships
     members = db.relationship("TeamMember", back_populates="team", cascade="all, delete")
     issues = db.relationship("Issue", backref="team", lazy=True, cascade="all, delete")
+    counts = db.relationship("TeamIssueCounts", uselist=False, cascade="all, delete-orphan")
 
 class TeamMember(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -39,7 +54,7 @@ class TeamMember(db.Model):
     joined_at = db.Column(db.DateTime, default=lambda: datetime.now(ZoneInfo("Asia/Kolkata")))
 
     user = db.relationship("User", back_populates="teams")
-    team = db.relationship("Team", back_populates="members")
+    team = db.relationship("Team", back_populates="members", lazy="joined")
 
     __table_args__ = (
         db.UniqueConstraint("user_id", "team_id", name="uq_user_team"),
@@ -53,10 +68,35 @@ class Issue(db.Model):
     status = db.Column(db.String(20), default="open")  # open, in-progress, closed
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(ZoneInfo('Asia/Kolkata')))
 
+    # bumped whenever the issue or its comments change (app/versions.py)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # maintained by add_comment (app/counters.py), so listings never count comments
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     team_id = db.Column(db.Integer, db.ForeignKey("team.id"), nullable=False)
     comments = db.relationship("Comment", backref="issue", lazy=True, cascade="all, delete")
 
+    # keyset pagination indexes for the team listing (see app/pagination.py)
+    __table_args__ = (
+        db.Index("ix_issue_team_status_created", "team_id", "status", "created_at", "id"),
+        db.Index("ix_issue_team_created", "team_id", "created_at", "id"),
+    )
+
+class TeamIssueCounts(db.Model):
+    """Per-team issue counts by status, maintained on the write path (app/counters.py)."""
+    __tablename__ = "team_issue_counts"
+
+    team_id = db.Column(db.Integer, db.ForeignKey("team.id", ondelete="CASCADE"), primary_key=True)
+    open = db.Column(db.Integer, nullable=False, default=0)
+    working = db.Column(db.Integer, nullable=False, default=0)
+    resolved = db.Column(db.Integer, nullable=False, default=0)
+
+    def as_dict(self):
+        return {status: getattr(self, status) for status in ISSUE_STATUSES}
+
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -65,7 +105,31 @@ class Comment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     issue_id = db.Column(db.Integer, db.ForeignKey("issue.id"), nullable=False)
 
+    # keyset pagination of an issue's comments, newest first
+    __table_args__ = (
+        db.Index("ix_comment_issue_created", "issue_id", "created_at", "id"),
+    )
+
 class TokenBlocklist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, index=True)
+    token_type = db.Column(db.String(10), nullable=True)  # access / refresh
+    user_id = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(ZoneInfo('Asia/Kolkata')))
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)  # rows past this are pruned
+
+    # ids must never be reused: workers track new revocations by id (app/revocation.py)
+    __table_args__ = {"sqlite_autoincrement": True}
+
+class TeamEvent(db.Model):
+    """Outbox of issue changes pushed to team subscribers (app/events.py)."""
+    __tablename__ = "team_event"
+
+    id = db.Column(db.Integer, primary_key=True)
+    team_id = db.Column(db.Integer, nullable=False, index=True)
+    kind = db.Column(db.String(30), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    # ids must never be reused: subscribers resume from the last id they saw
+    __table_args__ = {"sqlite_autoincrement": True}
@@ -0,0 +1,51 @@
+# app/oauth.py
+# Google sign-in client, built on first use.
+#
+# Registering the client eagerly imported Authlib (and its crypto stack) in
+# every worker and tied app start-up to Google's discovery document. Now the
+# first request that needs it (the /login/google redirect or its callback)
+# imports Authlib, registers the client on a per-app OAuth registry, and
+# keeps it in app.extensions; the discovery document is fetched by Authlib
+# when that first redirect is built. Workers that never see a Google login
+# never pay for any of it.
+#
+# Config:
+#   GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET   OAuth client credentials
+import threading
+
+from flask import current_app
+
+_lock = threading.Lock()
+
+
+def _register(app):
+    from authlib.integrations.flask_client import OAuth
+
+    registry = OAuth(app)
+    return registry.register(
+        name="google",
+        client_id=app.config["GOOGLE_CLIENT_ID"],  # Your application's public identifier issued by google
+        client_secret=app.config["GOOGLE_CLIENT_SECRET"],  # proves the token request comes from this app
+        access_token_url="https://oauth2.googleapis.com/token",  # where the authorization_code is exchanged for tokens
+        access_token_params=None,
+        authorize_url="https://accounts.google.com/o/oauth2/auth",  # where the browser is sent for user consent
+        authorize_params=None,
+        api_base_url="https://www.googleapis.com/oauth2/v1/",  # base of google.get('userinfo')
+        server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
+        userinfo_endpoint="https://www.googleapis.com/oauth2/v1/userinfo",  # the canonical user profile
+        client_kwargs={
+            "scope": "openid email profile"  # OpenID Connect: we want an id_token
+        },
+    )
+
+
+def google_client():
+    """The app's Google OAuth client, registered on first call."""
+    app = current_app._get_current_object()
+    client = app.extensions.get("google_oauth")
+    if client is None:
+        with _lock:
+            client = app.extensions.get("google_oauth")
+            if client is None:
+                client = app.extensions["google_oauth"] = _register(app)
+    return client
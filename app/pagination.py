@@ -0,0 +1,74 @@
+# app/pagination.py
+# Keyset (cursor) pagination helpers.
+#
+# A cursor is an opaque, url-safe token wrapping the (created_at, id) of the
+# last (or first) row the client has seen. Paging "after" a cursor is a range
+# scan on the (team_id, status, created_at, id) index, so deep pages cost the
+# same as the first one - no OFFSET walk and no COUNT(*).
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def keyset_page(query, model, per_page, after=None, before=None, descending=True):
+    """Fetch one page of `query` ordered by (created_at, id).
+
+    `after` continues in the listing direction, `before` walks back towards
+    the start. Returns (rows, next_cursor, prev_cursor); a cursor is None when
+    there is nothing further in that direction.
+    """
+    key = tuple_(model.created_at, model.id)
+    backwards = before is not None
+    token = before if backwards else after
+
+    if token is not None:
+        bound = decode_cursor(token)
+        # walking backwards flips both the comparison and the scan order
+        if descending != backwards:
+            query = query.filter(key < bound)
+        else:
+            query = query.filter(key > bound)
+
+    if descending != backwards:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+
+    # one extra row tells us whether another page exists without counting
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first, last = rows[0], rows[-1]
+        if backwards:
+            prev_cursor = encode_cursor(first.created_at, first.id) if has_more else None
+            next_cursor = encode_cursor(last.created_at, last.id)
+        else:
+            next_cursor = encode_cursor(last.created_at, last.id) if has_more else None
+            prev_cursor = encode_cursor(first.created_at, first.id) if token is not None else None
+
+    return rows, next_cursor, prev_cursor
@@ -0,0 +1,146 @@
+# app/querylog.py
+# Per-request N+1 and slow-query diagnostics.
+#
+# For a sampled fraction of requests every SQL statement is fingerprinted
+# (literals, bound parameters and IN-lists collapsed to "?"), counted and
+# timed. When the request ends, one structured log record is written per
+# finding:
+#
+#   {"event": "n_plus_one", "fingerprint": ..., "count": 25, ...}
+#       the same statement shape ran more than QUERY_REPEAT_THRESHOLD times,
+#       typically a lazy relationship loaded once per row
+#   {"event": "slow_query", "duration_ms": ..., "plan": [...], ...}
+#       a statement ran longer than SLOW_QUERY_MS; the plan comes from
+#       EXPLAIN QUERY PLAN (SQLite) / EXPLAIN, run after the response is done
+#
+# Records go to the "app.querylog" logger as single-line JSON. Bound
+# parameter values are never logged.
+#
+# Config:
+#   QUERY_DIAGNOSTICS_SAMPLE_RATE  fraction of requests inspected (default 0 = off)
+#   QUERY_REPEAT_THRESHOLD         same-shape statements allowed per request (default 5)
+#   SLOW_QUERY_MS                  slow statement threshold (default 100)
+#   QUERY_EXPLAIN                  attach query plans to slow statements (default True)
+import json
+import logging
+import random
+import re
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger("app.querylog")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\?|%\(\w+\)s|%s|(?<!:):\w+|\$\d+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement):
+    """The statement's shape: literals and parameters replaced by '?'."""
+    shape = _STRING.sub("?", statement)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class RequestQueries:
+    def __init__(self, repeat_threshold, slow_seconds):
+        self.repeat_threshold = repeat_threshold
+        self.slow_seconds = slow_seconds
+        self.shapes = {}  # fingerprint -> [count, seconds]
+        self.slow = []    # (engine, statement, parameters, seconds)
+        self.paused = False
+
+    def record(self, engine, statement, parameters, executemany, seconds):
+        shape = fingerprint(statement)
+        entry = self.shapes.setdefault(shape, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        if seconds >= self.slow_seconds and not executemany:
+            self.slow.append((engine, statement, parameters, seconds))
+
+    def repeated(self):
+        return [(shape, n, seconds) for shape, (n, seconds) in self.shapes.items()
+                if n > self.repeat_threshold]
+
+
+def explain(engine, statement, parameters):
+    sqlite = engine.dialect.name == "sqlite"
+    try:
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + statement,
+                                        parameters or ())
+            # SQLite rows are (id, parent, notused, detail)
+            return [row[-1] if sqlite else " ".join(str(col) for col in row) for row in rows]
+    except Exception as e:  # a plan is a nice-to-have, never fail the request over it
+        return [f"unavailable: {type(e).__name__}"]
+
+
+def _log(event_name, **fields):
+    logger.warning(json.dumps({"event": event_name, **fields}, default=str, separators=(",", ":")))
+
+
+def _current():
+    if has_request_context():
+        diag = g.get("_query_diagnostics")
+        if diag is not None and not diag.paused:
+            return diag
+    return None
+
+
+def _install_engine_hooks(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current() is not None:
+            conn.info.setdefault("_querylog_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        diag = _current()
+        stack = conn.info.get("_querylog_started")
+        if diag is None or not stack:
+            return
+        diag.record(conn.engine, statement, parameters, executemany, time.perf_counter() - stack.pop())
+
+
+def init_app(app):
+    rate = float(app.config.get("QUERY_DIAGNOSTICS_SAMPLE_RATE", 0) or 0)
+    if rate <= 0:
+        return
+    from app import db
+    from app.database import read_engine
+
+    threshold = int(app.config.get("QUERY_REPEAT_THRESHOLD", 5))
+    slow_seconds = float(app.config.get("SLOW_QUERY_MS", 100)) / 1000
+    with_plans = app.config.get("QUERY_EXPLAIN", True)
+
+    with app.app_context():
+        _install_engine_hooks(db.engine)
+        if read_engine() is not None:
+            _install_engine_hooks(read_engine())
+
+    @app.before_request
+    def _sample_request():
+        if rate >= 1 or random.random() < rate:
+            g._query_diagnostics = RequestQueries(threshold, slow_seconds)
+
+    @app.teardown_request
+    def _report(exc):
+        diag = g.pop("_query_diagnostics", None)
+        if diag is None:
+            return
+        diag.paused = True
+        where = {"endpoint": request.endpoint, "method": request.method, "path": request.path}
+        for shape, count, seconds in diag.repeated():
+            _log("n_plus_one", **where, fingerprint=shape, count=count,
+                 total_ms=round(seconds * 1000, 2), threshold=threshold)
+        for engine, statement, parameters, seconds in diag.slow:
+            fields = {"fingerprint": fingerprint(statement), "duration_ms": round(seconds * 1000, 2)}
+            if with_plans:
+                fields["plan"] = explain(engine, statement, parameters)
+            _log("slow_query", **where, **fields)
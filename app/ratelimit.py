@@ -0,0 +1,231 @@
+# app/ratelimit.py
+# Rate-limit counters shared by every worker, without a Redis/memcached.
+#
+# Flask-Limiter's default memory:// storage is per process, so N workers
+# allow N times the configured limits. BatchedSQLiteStorage keeps the
+# fixed-window counters in a small SQLite (WAL) file next to the app that
+# all workers on the host open, but it doesn't write on every request:
+#
+#   - hits are counted in process memory and added to the shared row by a
+#     background flush every RATELIMIT_FLUSH_SECONDS, in one transaction
+#   - the value a request is checked against is the shared count read at the
+#     last flush plus this worker's unflushed hits
+#
+# So a request costs a dict update under a lock; the file is touched once
+# per flush interval per worker, plus once when a key is first seen (or its
+# window rolled over). The price is bounded staleness: hits made by *other*
+# workers during the last interval aren't visible yet, so a limit can be
+# overshot by at most (workers - 1) x (hits per worker per interval).
+#
+# Registered with limits as "batched+sqlite://<path>"; only the fixed-window
+# strategy (Flask-Limiter's default) is supported.
+#
+# Config:
+#   RATELIMIT_STORAGE_URI     default batched+sqlite:///<instance path>/ratelimit.db
+#   RATELIMIT_FLUSH_SECONDS   flush interval (default 1)
+#   RATELIMIT_LOGIN           limit shared by API + web login (default "10 per minute;100 per hour")
+#   RATELIMIT_REGISTER        limit shared by API + web register (default "5 per minute;50 per day")
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+from limits.storage import Storage
+
+SCHEME = "batched+sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit (
+    key        TEXT PRIMARY KEY,
+    count      INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+# add `amount` to the shared counter, starting a new window if the old one expired
+UPSERT = """
+INSERT INTO rate_limit (key, count, expires_at) VALUES (:key, :amount, :expires_at)
+ON CONFLICT (key) DO UPDATE SET
+    count = CASE WHEN rate_limit.expires_at <= :now THEN :amount ELSE rate_limit.count + :amount END,
+    expires_at = CASE WHEN rate_limit.expires_at <= :now THEN :expires_at ELSE rate_limit.expires_at END
+RETURNING count, expires_at
+"""
+
+
+class _Window:
+    __slots__ = ("shared", "pending", "expires_at", "expiry")
+
+    def __init__(self, shared, expires_at, expiry):
+        self.shared = shared      # shared count as of the last flush, including our hits
+        self.pending = 0          # our hits not flushed yet
+        self.expires_at = expires_at
+        self.expiry = expiry
+
+    @property
+    def count(self):
+        return self.shared + self.pending
+
+
+class BatchedSQLiteStorage(Storage):
+    STORAGE_SCHEME = [SCHEME]
+
+    def __init__(self, uri, wrap_exceptions=False, flush_interval=1.0, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        path = uri.split("://", 1)[1]
+        self.path = path[1:] if path.startswith("/") else path
+        self.flush_interval = float(flush_interval)
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._conns = {}
+        self._pid = None
+        self._flusher = None
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    # ---- shared file ---------------------------------------------------------
+
+    def _open(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(SCHEMA)
+        return conn
+
+    def _connection(self, role="requests"):
+        # opened lazily and again after fork: a SQLite handle must not cross
+        # processes. Requests (under self._lock) and the flusher use separate
+        # handles so a flush transaction never blocks a request.
+        if self._pid != os.getpid():
+            self._conns = {}
+            self._pid = os.getpid()
+            self._windows = {}
+            self._flusher = None
+        if role not in self._conns:
+            self._conns[role] = self._open()
+        return self._conns[role]
+
+    def _upsert(self, conn, key, amount, expiry, now):
+        return conn.execute(UPSERT, {"key": key, "amount": amount, "now": now,
+                                     "expires_at": now + expiry}).fetchone()
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._run, name="ratelimit-flush", daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error:  # counted again on the next flush
+                pass
+
+    def flush(self):
+        """Write pending hits to the shared file and pick up everyone else's."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection("flush")
+            # drop windows that have expired; a new hit re-reads the shared row
+            for key in [k for k, w in self._windows.items() if w.expires_at <= now]:
+                del self._windows[key]
+            batch = [(key, w.pending, w.expiry) for key, w in self._windows.items()]
+            for key, _, _ in batch:
+                self._windows[key].pending = 0
+        if not batch:
+            return
+        results = {}
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for key, amount, expiry in batch:
+                if amount:
+                    results[key] = self._upsert(conn, key, amount, expiry, now)
+                else:
+                    results[key] = conn.execute(
+                        "SELECT count, expires_at FROM rate_limit WHERE key = ?", (key,)).fetchone()
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            with self._lock:  # put the hits back for the next attempt
+                for key, amount, _ in batch:
+                    if key in self._windows:
+                        self._windows[key].pending += amount
+            raise
+        with self._lock:
+            for key, row in results.items():
+                window = self._windows.get(key)
+                if window is None:
+                    continue
+                if row is None:  # cleared meanwhile
+                    del self._windows[key]
+                else:
+                    window.shared, window.expires_at = row
+
+    # ---- limits.storage.Storage ----------------------------------------------
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None and window.expires_at > now:
+                window.pending += amount
+                return window.count
+            conn = self._connection()
+            # first hit in this worker's window: count it in the shared row right away
+            count, expires_at = self._upsert(conn, key, amount, expiry, now)
+            self._windows[key] = _Window(count, expires_at, expiry)
+        self._ensure_flusher()
+        return count
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None and window.expires_at > now:
+                return window.count
+            row = self._connection().execute(
+                "SELECT count, expires_at FROM rate_limit WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None and row[1] > now else 0
+
+    def get_expiry(self, key):
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None:
+                return window.expires_at
+            row = self._connection().execute(
+                "SELECT expires_at FROM rate_limit WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else time.time()
+
+    def check(self):
+        with self._lock:
+            self._connection().execute("SELECT 1")
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+            return self._connection().execute("DELETE FROM rate_limit").rowcount
+
+    def clear(self, key):
+        with self._lock:
+            self._windows.pop(key, None)
+            self._connection().execute("DELETE FROM rate_limit WHERE key = ?", (key,))
+
+
+def default_storage_uri(app):
+    # beside Flask-SQLAlchemy's default home for relative sqlite:/// files
+    return f"{SCHEME}:///{os.path.join(app.instance_path, 'ratelimit.db')}"
+
+
+def login_limit():
+    return current_app.config.get("RATELIMIT_LOGIN", "10 per minute;100 per hour")
+
+
+def register_limit():
+    return current_app.config.get("RATELIMIT_REGISTER", "5 per minute;50 per day")
@@ -0,0 +1,236 @@
+# app/revocation.py
+# In-process cache in front of the TokenBlocklist table.
+#
+# check_if_token_revoked runs on every authenticated API request, so the
+# common case (token not revoked) must not touch the database:
+#   - a bloom filter holds every revoked jti we know about; a miss there is
+#     a definite "not revoked"
+#   - a bounded LRU of revoked jti -> expiry answers the positive case
+#   - anything the bloom filter lets through but the LRU doesn't know about
+#     (false positive or evicted entry) falls back to a single indexed lookup
+#
+# Each worker pulls rows added by other workers every REVOCATION_REFRESH_SECONDS
+# (tracked by TokenBlocklist.id), so a token revoked on another worker is
+# honoured here within that window. Expired rows are pruned from the table on
+# a schedule (and via `flask prune-tokens`), after which the filter is rebuilt.
+# The scheduled prune runs on a background thread: the DELETE and the full
+# rebuild scan grow with the table, and the request that happens to find the
+# prune due only starts it and carries on with the cheap incremental refresh.
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import click
+from flask import current_app
+from sqlalchemy import delete, func, select
+
+logger = logging.getLogger("app.revocation")
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationCache:
+    def __init__(self, app):
+        self.lru_size = app.config.get("REVOCATION_LRU_SIZE", 10000)
+        self.refresh_seconds = app.config.get("REVOCATION_REFRESH_SECONDS", 5)
+        self.prune_seconds = app.config.get("REVOCATION_PRUNE_SECONDS", 3600)
+        self.min_capacity = app.config.get("REVOCATION_BLOOM_CAPACITY", 100000)
+        self.error_rate = app.config.get("REVOCATION_BLOOM_ERROR_RATE", 0.01)
+
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(self.min_capacity, self.error_rate)
+        self._revoked = OrderedDict()  # jti -> expiry (epoch seconds) or None
+        self._high_water = 0  # largest TokenBlocklist.id seen so far
+        self._next_refresh = 0.0
+        self._next_prune = time.monotonic() + self.prune_seconds
+        self._pruner = None
+
+    # ---- lookups -----------------------------------------------------------
+
+    def is_revoked(self, jti):
+        self._maybe_refresh()
+        if jti not in self._bloom:
+            return False
+        if self._lookup(jti):
+            return True
+
+        # bloom false positive or an entry evicted from the LRU
+        from app import db
+        from app.models import TokenBlocklist
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(TokenBlocklist.expires_at).where(TokenBlocklist.jti == jti).limit(1)
+            ).first()
+        if row is None:
+            return False
+        self._remember(jti, _to_epoch(row.expires_at))
+        return True
+
+    def _lookup(self, jti):
+        with self._lock:
+            if jti not in self._revoked:
+                return False
+            expires = self._revoked[jti]
+            if expires is not None and expires < time.time():
+                # the token itself has expired; nothing left to block
+                del self._revoked[jti]
+                return False
+            self._revoked.move_to_end(jti)
+            return True
+
+    def _remember(self, jti, expires):
+        with self._lock:
+            self._revoked[jti] = expires
+            self._revoked.move_to_end(jti)
+            while len(self._revoked) > self.lru_size:
+                self._revoked.popitem(last=False)
+
+    # ---- writes ------------------------------------------------------------
+
+    def add(self, jti, expires=None):
+        """Record a revocation made by this worker; visible immediately."""
+        with self._lock:
+            self._bloom.add(jti)
+        self._remember(jti, expires)
+
+    # ---- coherence across workers ------------------------------------------
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        with self._lock:
+            if now < self._next_refresh:
+                return
+            self._next_refresh = now + self.refresh_seconds
+            prune = now >= self._next_prune
+            if prune:
+                self._next_prune = now + self.prune_seconds
+        if prune:
+            self.start_prune()
+        self.refresh()
+
+    def start_prune(self):
+        """Prune and rebuild on a background thread; returns it (or None if one is running)."""
+        with self._lock:
+            if self._pruner is not None and self._pruner.is_alive():
+                return None
+            app = current_app._get_current_object()
+            self._pruner = threading.Thread(target=self._prune, args=(app,),
+                                            name="revocation-prune", daemon=True)
+        self._pruner.start()
+        return self._pruner
+
+    def _prune(self, app):
+        try:
+            with app.app_context():
+                prune_expired(self)
+        except Exception:
+            logger.exception("pruning the token blocklist failed")
+
+    def refresh(self):
+        """Pull revocations recorded since the last refresh (by any worker)."""
+        from app import db
+        from app.models import TokenBlocklist
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                select(TokenBlocklist.id, TokenBlocklist.jti, TokenBlocklist.expires_at)
+                .where(TokenBlocklist.id > self._high_water)
+                .order_by(TokenBlocklist.id)
+            ).all()
+        if not rows:
+            return
+        with self._lock:
+            if self._bloom.count + len(rows) > self._bloom.capacity:
+                grow = True
+            else:
+                grow = False
+                for row in rows:
+                    self._bloom.add(row.jti)
+                self._high_water = max(self._high_water, rows[-1].id)
+        if grow:
+            self.rebuild()
+            return
+        for row in rows:
+            self._remember(row.jti, _to_epoch(row.expires_at))
+
+    def rebuild(self):
+        """Rebuild the bloom filter from the table (after pruning or growth)."""
+        from app import db
+        from app.models import TokenBlocklist
+        with db.engine.connect() as conn:
+            total, high_water = conn.execute(
+                select(func.count(TokenBlocklist.id), func.max(TokenBlocklist.id))
+            ).one()
+            bloom = BloomFilter(max(self.min_capacity, (total or 0) * 2), self.error_rate)
+            for (jti,) in conn.execute(select(TokenBlocklist.jti)):
+                bloom.add(jti)
+        with self._lock:
+            # keep anything revoked locally while the table was being scanned
+            for jti in self._revoked:
+                bloom.add(jti)
+            self._bloom = bloom
+            self._high_water = max(self._high_water, high_water or 0)
+
+
+def _to_epoch(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def prune_expired(cache=None):
+    """Delete blocklist rows whose tokens have expired, then rebuild the filter."""
+    from app import db
+    from app.models import TokenBlocklist
+    now = datetime.now(timezone.utc)
+    with db.engine.begin() as conn:
+        deleted = conn.execute(
+            delete(TokenBlocklist).where(TokenBlocklist.expires_at < now)
+        ).rowcount
+    cache = cache or get_cache()
+    cache.rebuild()
+    cache.refresh()
+    return deleted
+
+
+def get_cache():
+    return current_app.extensions["revocation_cache"]
+
+
+def init_app(app):
+    app.extensions["revocation_cache"] = RevocationCache(app)
+
+    @app.cli.command("prune-tokens")
+    def prune_tokens_command():
+        """Delete expired rows from the token blocklist."""
+        deleted = prune_expired()
+        click.echo(f"Pruned {deleted} expired revoked tokens.")
@@ -1,6 +1,6 @@
 # app/api_auth.py
 from flask import Blueprint, request, jsonify
-from app import db, jwt
+from app import db, jwt, limiter
 from app.models import User, TokenBlocklist
 from flask_jwt_extended import (
     create_access_token,
@@ -9,21 +9,28 @@ from flask_jwt_extended import (
     get_jwt_identity,
     get_jwt
 )
-from datetime import datetime
+from app.identity import current_user
+from app.ratelimit import login_limit, register_limit
+from app.revocation import get_cache as revocation_cache
+from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
 api_auth_bp = Blueprint("api_auth", __name__, url_prefix="/api/auth")
 
-# helper to revoke token (store jti)
-def revoke_token(jti, token_type, user_id=None):
-    tb = TokenBlocklist(jti=jti, token_type=token_type, user_id=user_id, created_at=datetime.utcnow())
+# helper to revoke token (store jti, then update this worker's revocation cache)
+def revoke_token(jti, token_type, user_id=None, expires=None):
+    expires_at = datetime.fromtimestamp(expires, timezone.utc) if expires else None
+    tb = TokenBlocklist(jti=jti, token_type=token_type, user_id=user_id,
+                        created_at=datetime.utcnow(), expires_at=expires_at)
     db.session.add(tb)
     db.session.commit()
+    revocation_cache().add(jti, expires)
 
 # -------------------------
 # Register
 # -------------------------
 @api_auth_bp.route("/register", methods=["POST"])
+@limiter.shared_limit(register_limit, scope="register")
 def register():
     data = request.get_json() or {}
     username = data.get("username")
@@ -48,6 +55,7 @@ def register():
 # Login -> returns access & refresh tokens
 # -------------------------
 @api_auth_bp.route("/login", methods=["POST"])
+@limiter.shared_limit(login_limit, scope="login")  # bcrypt per attempt; shared with the web form
 def login():
     data = request.get_json() or {}
     email = data.get("email")
@@ -87,9 +95,9 @@ def refresh():
 @api_auth_bp.route("/logout_access", methods=["DELETE"])
 @jwt_required()  # requires valid access token
 def logout_access():
-    jti = get_jwt()["jti"]
+    token = get_jwt()
     identity = get_jwt_identity()
-    revoke_token(jti=jti, token_type="access", user_id=identity)
+    revoke_token(jti=token["jti"], token_type="access", user_id=identity, expires=token.get("exp"))
     return jsonify({"message": "Access token revoked"}), 200
 
 
@@ -99,9 +107,9 @@ def logout_access():
 @api_auth_bp.route("/logout_refresh", methods=["DELETE"])
 @jwt_required(refresh=True)
 def logout_refresh():
-    jti = get_jwt()["jti"]
+    token = get_jwt()
     identity = get_jwt_identity()
-    revoke_token(jti=jti, token_type="refresh", user_id=identity)
+    revoke_token(jti=token["jti"], token_type="refresh", user_id=identity, expires=token.get("exp"))
     return jsonify({"message": "Refresh token revoked"}), 200
 
 
@@ -111,8 +119,7 @@ def logout_refresh():
 @api_auth_bp.route("/me", methods=["GET"])
 @jwt_required()
 def me():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_user()
     if not user:
         return jsonify({"error": "User not found"}), 404
     return jsonify({"id": user.id, "username": user.username, "email": user.email}), 200
@@ -1,55 +1,198 @@
-from flask import Blueprint, request, jsonify
+from collections import Counter
+from flask import Blueprint, request, jsonify, current_app, abort, Response, stream_with_context
 from app import db
-from app.models import Issue, Comment, User
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models import Issue, Comment, Team, TeamMember, TeamIssueCounts, User
+from app.cache import response_cache
+from app.identity import current_user
+from app.pagination import keyset_page, InvalidCursor
+from app import search, export, versions, counters, events, membership
+from app.database import use_read_replica
+from app.serialization import Schema
+from app.transitions import STATUSES, toggle_issue_status, set_status_bulk
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func, insert, select
 
 api_issues_bp = Blueprint("api_issues", __name__, url_prefix="/api")
 
-# Helper to fetch current user
-def current_user():
-    uid = get_jwt_identity()
-    return User.query.get(uid)
+
+@api_issues_bp.before_request
+def route_reads_to_replica():
+    # GET handlers only read; with DB_READ_ROUTING they run on the read bind
+    if request.method == "GET":
+        use_read_replica()
+
+
+# Response shapes (app/serialization.py): the read endpoints select exactly
+# these columns and dump the row tuples, without loading ORM objects
+ISSUE_ROW = Schema(
+    issue_id=Issue.id, title=Issue.title, description=Issue.description, status=Issue.status,
+    user_id=Issue.user_id, username=User.username, created_at=Issue.created_at,
+    comment_count=Issue.comment_count,
+)
+ISSUE_DETAIL = Schema(
+    id=Issue.id, title=Issue.title, description=Issue.description, status=Issue.status,
+    created_at=Issue.created_at, author=User.username, team_id=Issue.team_id,
+    comment_count=Issue.comment_count,
+)
+COMMENT_ROW = Schema(id=Comment.id, content=Comment.content, author=User.username, created_at=Comment.created_at)
+TEAM_ROW = Schema(id=Team.id, name=Team.name, role=TeamMember.role, joined_at=TeamMember.joined_at)
+
+
+def issue_rows():
+    """Query for ISSUE_ROW tuples; filter and order it like Issue.query."""
+    return db.session.query(*ISSUE_ROW.columns).outerjoin(User, User.id == Issue.user_id)
+
+
+def comment_rows(issue_id):
+    """Query for an issue's COMMENT_ROW tuples, to be paged with keyset_page."""
+    return (
+        db.session.query(*COMMENT_ROW.columns)
+        .outerjoin(User, User.id == Comment.user_id)
+        .filter(Comment.issue_id == issue_id)
+    )
 
 @api_issues_bp.route("/teams", methods=["GET"])
 @jwt_required()
 def teams_dashboard():
-    uid = get_jwt_identity()
-    user = User.query.get(uid)
+    user = current_user()
 
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    # Fetch all teams via TeamMember relationship
-    teams = [
-                {
-                    "id": member.team.id,
-                    "name": member.team.name,
-                    "role": member.role,
-                    "joined_at": member.joined_at.isoformat()
-                }
-                for member in user.teams
-            ]
+    # The user's teams with the materialized per-status issue counts joined
+    # in (app/counters.py); a team without a counters row counts as zeros
+    rows = db.session.execute(
+        select(*TEAM_ROW.columns, *(func.coalesce(getattr(TeamIssueCounts, s), 0) for s in STATUSES))
+        .join(Team, Team.id == TeamMember.team_id)
+        .outerjoin(TeamIssueCounts, TeamIssueCounts.team_id == Team.id)
+        .where(TeamMember.user_id == user.id)
+        .order_by(TeamMember.id)
+    )
+    teams = []
+    for row in rows:
+        team = TEAM_ROW.dump(row)
+        team["issue_counts"] = dict(zip(STATUSES, row[len(TEAM_ROW.keys):]))
+        teams.append(team)
 
     return jsonify({"teams": teams}), 200
     
 
 # List issues by team
+#
+# Two modes:
+#   - offset (default): ?page=&per_page=, returns total/pages
+#   - cursor: ?cursor=1 for the first page, then ?after=<next_cursor> or
+#     ?before=<prev_cursor>. Ordered by (created_at, id); the total is only
+#     counted when ?include_total=1 is passed.
+#
+# Responses carry an ETag/Last-Modified derived from the team's issue version
+# stamp, and matching conditional requests get a 304 before any listing query.
+# Rendered pages are kept in the response cache (app/cache.py) until a write
+# to the team's issues invalidates them, keyed by the parsed parameters
+# (listing_params) rather than the raw query string, so "?cursor" and no
+# cursor at all can never share a page.
+def listing_params():
+    """The listing's query parameters, parsed and normalized once."""
+    args = request.args
+    after = args.get("after", None, type=str)
+    before = args.get("before", None, type=str)
+    cursor_mode = "cursor" in args or after is not None or before is not None
+    per_page = args.get("per_page", 10, type=int)
+    params = {
+        "mode": "cursor" if cursor_mode else "offset",
+        "status": args.get("status", "", type=str),
+        "sort": args.get("sort", "created_at", type=str),
+        "order": args.get("order", "desc", type=str),
+    }
+    if cursor_mode:
+        params.update(
+            per_page=max(1, min(per_page, 100)), after=after, before=before,
+            include_total=args.get("include_total", "").lower() in ("1", "true", "yes"),
+        )
+    else:
+        params.update(page=args.get("page", 1, type=int), per_page=per_page)
+    return params
+
+
 @api_issues_bp.route("teams/<int:team_id>", methods=["GET"])
 @jwt_required()
 def api_dashboard(team_id):
-    # Query parameters
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 10, type=int)
-    status_filter = request.args.get("status", None, type=str)
-    sort_field = request.args.get("sort", "created_at", type=str)
-    sort_order = request.args.get("order", "desc", type=str)
+    membership.require(team_id)
+    params = listing_params()
+    stamp = versions.team_stamp(team_id)
+    if stamp is None:
+        return issue_listing(team_id, params)
+
+    version, last_modified = stamp
+    etag = versions.make_etag("team", team_id, version, request.query_string.decode())
+    cached = versions.not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    # the stamp is part of the key, so a write seen by another worker can
+    # never be answered from this worker's stale pages
+    cache = response_cache()
+    key = f"v{version}?" + "&".join(f"{name}={value}" for name, value in params.items())
+    body = cache.get(team_id, key)
+    if body is not None:
+        response, status = current_app.response_class(body, mimetype="application/json"), 200
+    else:
+        response, status = issue_listing(team_id, params)
+        if status == 200:
+            cache.set(team_id, key, response.get_data(as_text=True))
+
+    if status == 200:
+        versions.add_validators(response, etag, last_modified)
+    return response, status
+
+
+@api_issues_bp.route("cache/stats", methods=["GET"])
+@jwt_required()
+def cache_stats():
+    return jsonify(response_cache().stats()), 200
+
 
-    query = Issue.query.filter_by(team_id=team_id)
+def issue_listing(team_id, params):
+    per_page = params["per_page"]
+    status_filter = params["status"]
+    sort_field = params["sort"]
+    sort_order = params["order"]
+
+    query = issue_rows().filter(Issue.team_id == team_id)
 
     # Apply filter
     if status_filter:
         query = query.filter(Issue.status == status_filter)
 
+    if params["mode"] == "cursor":
+        after, before = params["after"], params["before"]
+        if sort_field != "created_at":
+            return jsonify({"error": "cursor pagination only supports sort=created_at"}), 400
+        if after and before:
+            return jsonify({"error": "use either after or before, not both"}), 400
+
+        total = None
+        if params["include_total"]:
+            total = query.order_by(None).count()
+
+        try:
+            issues, next_cursor, prev_cursor = keyset_page(
+                query, Issue, per_page, after=after, before=before,
+                descending=(sort_order == "desc")
+            )
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        body = {
+            "per_page": per_page,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+            "issues": ISSUE_ROW.dump_all(issues)
+        }
+        if total is not None:
+            body["total"] = total
+        return jsonify(body), 200
+
     # Apply sorting (default: created_at desc)
     if hasattr(Issue, sort_field):
         sort_col = getattr(Issue, sort_field)
@@ -58,7 +201,7 @@ def api_dashboard(team_id):
         query = query.order_by(sort_col)
 
     # Pagination
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    pagination = query.paginate(page=params["page"], per_page=per_page, error_out=False)
     issues = pagination.items
 
     return jsonify({
@@ -66,43 +209,161 @@ def api_dashboard(team_id):
         "page": pagination.page,
         "per_page": pagination.per_page,
         "pages": pagination.pages,
-        "issues": [{
-            "issue_id": issue.id,
-            "title": issue.title,
-            "description": issue.description,
-            "status": issue.status,
-            "user_id": issue.user_id,
-            "username": issue.author.username if issue.author else None,
-            "created_at": issue.created_at
-        } for issue in issues]
+        "issues": ISSUE_ROW.dump_all(issues)
     }), 200
 
 
 
+# -------------------------
+# Full-text search within a team (ranked, paginated)
+# -------------------------
+@api_issues_bp.route("teams/<int:team_id>/search", methods=["GET"])
+@jwt_required()
+def search_issues(team_id):
+    membership.require(team_id)
+    q = request.args.get("q", "", type=str).strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = max(1, min(request.args.get("per_page", 10, type=int), 100))
+
+    if not q:
+        return jsonify({"error": "q required"}), 400
+    if not search.is_supported(db.engine):
+        return jsonify({"error": "Search is not available on this database"}), 501
+
+    # one extra hit tells us whether there is another page
+    hits = search.search_issue_ids(team_id, q, limit=per_page + 1, offset=(page - 1) * per_page)
+    has_more = len(hits) > per_page
+    hits = hits[:per_page]
+
+    issues = {row.id: row for row in issue_rows().filter(Issue.id.in_([i for i, _ in hits]))}
+    results = []
+    for issue_id, score in hits:
+        if issue_id in issues:
+            results.append(dict(ISSUE_ROW.dump(issues[issue_id]), score=score))
+
+    return jsonify({
+        "query": q,
+        "page": page,
+        "per_page": per_page,
+        "has_more": has_more,
+        "issues": results
+    }), 200
+
+
+# -------------------------
+# Streaming export of a team's issues (?format=ndjson|csv&comments=1)
+# -------------------------
+@api_issues_bp.route("teams/<int:team_id>/export", methods=["GET"])
+@jwt_required()
+def export_issues(team_id):
+    membership.require(team_id)
+    fmt = request.args.get("format", "ndjson", type=str)
+    with_comments = request.args.get("comments", "").lower() in ("1", "true", "yes")
+
+    if fmt not in export.FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(export.FORMATS)}"}), 400
+
+    items = export.iter_issues(team_id, with_comments=with_comments)
+    if fmt == "csv":
+        body = export.csv_lines(items, with_comments=with_comments)
+    else:
+        body = export.ndjson_lines(items)
+
+    return Response(
+        stream_with_context(body),
+        mimetype=export.FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=team-{team_id}-issues.{fmt}"}
+    )
+
+
+# -------------------------
+# Live team updates (Server-Sent Events, app/events.py)
+# -------------------------
+@api_issues_bp.route("teams/<int:team_id>/events", methods=["GET"])
+@jwt_required(locations=["headers", "query_string"])  # EventSource can't set headers
+def team_events(team_id):
+    membership.require(team_id)
+    return events.event_stream(team_id, request)
+
+
 # -------------------------
 # Get issue detail
+#
+# Carries the newest page of comments only (COMMENTS_PER_PAGE, newest
+# first) plus comment_count; "comments_next_cursor" continues with older
+# ones on the comments endpoint below.
 # -------------------------
 @api_issues_bp.route("teams/issue_detail/<int:issue_id>", methods=["GET"])
 @jwt_required()
 def get_issue(issue_id):
-    issue = Issue.query.get_or_404(issue_id)
-    return jsonify({
-        "id": issue.id,
-        "title": issue.title,
-        "description": issue.description,
-        "status": issue.status,
-        "created_at": issue.created_at.isoformat(),
-        "author": issue.author.username,
-        "team_id": issue.team_id,
-        "comments": [
-            {
-                "id": c.id,
-                "content": c.content,
-                "author": c.author.username,
-                "created_at": c.created_at.isoformat()
-            } for c in issue.comments
-        ]
-    }), 200
+    stamp = versions.issue_stamp(issue_id)
+    if stamp is None:
+        abort(404)
+    version, last_modified, team_id = stamp
+    membership.require(team_id)
+    etag = versions.make_etag("issue", issue_id, version)
+    cached = versions.not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    row = db.session.execute(
+        select(*ISSUE_DETAIL.columns).outerjoin(User, User.id == Issue.user_id).where(Issue.id == issue_id)
+    ).first()
+    if row is None:
+        abort(404)
+    comments, next_cursor, _ = keyset_page(
+        comment_rows(issue_id), Comment, current_app.config.get("COMMENTS_PER_PAGE", 20)
+    )
+    response = jsonify(dict(
+        ISSUE_DETAIL.dump(row),
+        comments=COMMENT_ROW.dump_all(comments),
+        comments_next_cursor=next_cursor,
+    ))
+    return versions.add_validators(response, etag, last_modified), 200
+
+
+# -------------------------
+# Comments of an issue, newest first (?per_page=&after=|before=)
+#
+# Cursor pages over (created_at, id) like the cursor-mode listing; the
+# issue's version stamp changes with every new comment, so the same
+# ETag/304 handling as get_issue applies.
+# -------------------------
+@api_issues_bp.route("issue_detail/<int:issue_id>/comments", methods=["GET"])
+@jwt_required()
+def list_comments(issue_id):
+    stamp = versions.issue_stamp(issue_id)
+    if stamp is None:
+        abort(404)
+    version, last_modified, team_id = stamp
+    membership.require(team_id)
+    etag = versions.make_etag("comments", issue_id, version, request.query_string.decode())
+    cached = versions.not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+
+    after = request.args.get("after", None, type=str)
+    before = request.args.get("before", None, type=str)
+    if after and before:
+        return jsonify({"error": "use either after or before, not both"}), 400
+    per_page = request.args.get("per_page", current_app.config.get("COMMENTS_PER_PAGE", 20), type=int)
+    per_page = max(1, min(per_page, 100))
+
+    try:
+        comments, next_cursor, prev_cursor = keyset_page(
+            comment_rows(issue_id), Comment, per_page, after=after, before=before
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    response = jsonify({
+        "issue_id": issue_id,
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "comments": COMMENT_ROW.dump_all(comments),
+    })
+    return versions.add_validators(response, etag, last_modified), 200
 
 
 # -------------------------
@@ -122,9 +383,15 @@ def create_issue():
 
     if not (title and description and team_id):
         return jsonify({"error": "title, description, and team_id required"}), 400
+    membership.require(team_id)
 
     issue = Issue(title=title, description=description, user_id=user.id, team_id=team_id)
     db.session.add(issue)
+    db.session.flush()
+    versions.bump_teams(team_id)
+    counters.add(team_id, open=1)
+    events.publish(team_id, "issue_created", issue_id=issue.id, title=issue.title,
+                   status=issue.status, author=user.username)
     db.session.commit()
 
     return jsonify({
@@ -140,6 +407,82 @@ def create_issue():
     }), 201
 
 
+# -------------------------
+# Bulk create issues (one transaction)
+# -------------------------
+@api_issues_bp.route("teams/create/bulk", methods=["POST"])
+@jwt_required()
+def create_issues_bulk():
+    user = current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    data = request.get_json() or {}
+    items = data.get("issues") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "issues must be a non-empty array"}), 400
+
+    max_items = current_app.config.get("BULK_ISSUE_MAX", 1000)
+    if len(items) > max_items:
+        return jsonify({"error": f"at most {max_items} issues per request"}), 413
+
+    # validate everything before touching the database
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "issue must be an object"})
+            continue
+        title = item.get("title")
+        description = item.get("description")
+        team_id = item.get("team_id")
+        if not (title and description and team_id):
+            errors.append({"index": index, "error": "title, description, and team_id required"})
+        elif not (isinstance(title, str) and isinstance(description, str)):
+            errors.append({"index": index, "error": "title and description must be strings"})
+        elif not isinstance(team_id, int) or isinstance(team_id, bool):
+            errors.append({"index": index, "error": "team_id must be an integer"})
+        elif len(title) > Issue.title.type.length:
+            errors.append({"index": index, "error": "title too long"})
+        else:
+            rows.append({"index": index, "title": title, "description": description,
+                         "user_id": user.id, "team_id": team_id})
+
+    # a membership implies the team exists; teams the caller isn't in get the
+    # same error as missing ones, so the endpoint can't be used to probe ids
+    team_ids = {row["team_id"] for row in rows}
+    allowed = {tid for tid in team_ids if membership.role(tid) is not None}
+    for row in rows:
+        if row["team_id"] not in allowed:
+            errors.append({"index": row["index"], "error": "team not found"})
+
+    if errors:
+        return jsonify({"error": "validation failed", "errors": sorted(errors, key=lambda e: e["index"])}), 400
+
+    # batched multi-row INSERT ... RETURNING (executemany style), committed once.
+    # Ids are handed out in VALUES order inside the transaction, so sorting the
+    # returned ids lines them up with the request; asking SQLAlchemy for
+    # ordered RETURNING would make it fall back to one statement per row.
+    for row in rows:
+        row.pop("index")
+    result = db.session.execute(insert(Issue).returning(Issue.id), rows)
+    ids = sorted(result.scalars())
+    versions.bump_teams(*team_ids)
+    for team_id, n in Counter(row["team_id"] for row in rows).items():
+        counters.add(team_id, open=n)
+    # one event per team for the whole batch (app/events.py)
+    created = {}
+    for issue_id, row in zip(ids, rows):
+        created.setdefault(row["team_id"], []).append(issue_id)
+    for team_id, issue_ids in created.items():
+        events.publish(team_id, "issue_created", issue_ids=issue_ids, status="open", author=user.username)
+    db.session.commit()
+
+    return jsonify({
+        "message": f"{len(ids)} issues created successfully",
+        "ids": ids
+    }), 201
+
+
 # -------------------------
 # Add comment
 # -------------------------
@@ -151,14 +494,19 @@ def add_comment(issue_id):
         return jsonify({"error": "Unauthorized"}), 401
 
     issue = Issue.query.get_or_404(issue_id)
+    membership.require(issue.team_id)
     data = request.get_json() or {}
     content = data.get("content")
 
     if not content:
         return jsonify({"error": "content required"}), 400
 
-    comment = Comment(content=content, author=user, issue=issue)
+    comment = Comment(content=content, user_id=user.id, issue=issue)
     db.session.add(comment)
+    db.session.flush()
+    counters.add_comments(issue.id, issue.team_id)
+    events.publish(issue.team_id, "comment_added", issue_id=issue.id, comment_id=comment.id,
+                   author=user.username)
     db.session.commit()
 
     return jsonify({
@@ -183,16 +531,15 @@ def toggle_status(issue_id):
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
-    issue = Issue.query.get_or_404(issue_id)
+    # authorize before the UPDATE takes the write lock
+    stamp = versions.issue_stamp(issue_id)
+    if stamp is None:
+        abort(404)
+    membership.require(stamp[2])
 
-    if issue.status == "open":
-        issue.status = "working"
-    elif issue.status == "working":
-        issue.status = "resolved"
-    else:
-        issue.status = "open"
-
-    db.session.commit()
+    issue = toggle_issue_status(issue_id)
+    if issue is None:
+        abort(404)
 
     return jsonify({
         "message": "Status updated",
@@ -202,3 +549,49 @@ def toggle_status(issue_id):
             "status": issue.status
         }
     }), 200
+
+
+# -------------------------
+# Bulk status change: a list of ids, or every issue matching a filter
+# -------------------------
+@api_issues_bp.route("teams/<int:team_id>/status/bulk", methods=["POST"])
+@jwt_required()
+def bulk_status(team_id):
+    user = current_user()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+    membership.require(team_id)
+
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "body must be an object"}), 400
+    status = data.get("status")
+    issue_ids = data.get("issue_ids")
+    filter_ = data.get("filter") or {}
+    if not isinstance(filter_, dict):
+        return jsonify({"error": "filter must be an object"}), 400
+    from_status = filter_.get("status")
+
+    if status not in STATUSES:
+        return jsonify({"error": f"status must be one of {', '.join(STATUSES)}"}), 400
+    if from_status is not None and from_status not in STATUSES:
+        return jsonify({"error": f"filter.status must be one of {', '.join(STATUSES)}"}), 400
+    if issue_ids is None and from_status is None:
+        return jsonify({"error": "issue_ids or filter required"}), 400
+    if issue_ids is not None:
+        if not isinstance(issue_ids, list) or not all(
+            isinstance(i, int) and not isinstance(i, bool) for i in issue_ids
+        ):
+            return jsonify({"error": "issue_ids must be an array of integers"}), 400
+        max_items = current_app.config.get("BULK_ISSUE_MAX", 1000)
+        if len(issue_ids) > max_items:
+            return jsonify({"error": f"at most {max_items} issue_ids per request"}), 413
+
+    changed = set_status_bulk(team_id, status, issue_ids=issue_ids, from_status=from_status)
+
+    return jsonify({
+        "message": "Status updated",
+        "status": status,
+        "updated": len(changed),
+        "issue_ids": changed
+    }), 200
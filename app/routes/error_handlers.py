@@ -6,13 +6,18 @@ import traceback
 def register_error_handlers(app):
     @app.errorhandler(HTTPException)
     def handle_http_exception(e):
-        return jsonify({
+        response = jsonify({
             "error" : {
                 "code" : e.code,
                 "name" : e.name,
                 "description" : e.description
             }
-        }), e.code
+        })
+        # keep headers like Retry-After (e.g. HasherBusy) from the exception
+        for name, value in e.get_headers():
+            if name.lower() != "content-type":
+                response.headers[name] = value
+        return response, e.code
     
     @app.errorhandler(Exception)
     def handle_generic_exception(e):
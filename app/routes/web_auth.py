@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash, session
-from app import db, bcrypt, google
+from app import db, bcrypt, google, limiter
+from app.ratelimit import login_limit, register_limit
 from app.models import User
 from flask_jwt_extended import create_access_token, create_refresh_token
 from datetime import timedelta
@@ -8,6 +9,7 @@ from datetime import timedelta
 web_auth_bp = Blueprint("web_auth", __name__)
 
 @web_auth_bp.route("/register", methods=["GET", "POST"])
+@limiter.shared_limit(register_limit, scope="register", methods=["POST"])
 def register():
     if request.method == "POST":
         username = request.form["username"]
@@ -28,6 +30,7 @@ def register():
     return render_template("register.html")
 
 @web_auth_bp.route("/", methods=["GET", "POST"])
+@limiter.shared_limit(login_limit, scope="login", methods=["POST"])
 def login():
     if request.method == "POST":
         email = request.form["email"]
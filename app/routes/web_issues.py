@@ -1,12 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, session
-from app import db
-from app.models import Issue, Comment, User
+from flask import Blueprint, render_template, redirect, url_for, request, flash, session, abort, current_app
+from app import db, versions, counters, events
+from app.models import Issue, Comment, TeamMember
+from app.identity import current_user
+from app.pagination import keyset_page, InvalidCursor
+from app.transitions import toggle_issue_status
+from sqlalchemy import select
 
 web_issues_bp = Blueprint("web_issues", __name__)
 
-def current_user():
-    return User.query.get(session["user_id"]) if "user_id" in session else None
-
 @web_issues_bp.route("/teams/<int:team_id>/dashboard")
 def dashboard(team_id):
     userid = session["user_id"]
@@ -19,12 +20,32 @@ def dashboard(team_id):
 
     return render_template("issues.html", issues=issues)
 
+@web_issues_bp.route("/teams/<int:team_id>/events")
+def team_events(team_id):
+    user = current_user()
+    if not user:
+        abort(401)
+    member = db.session.scalar(
+        select(TeamMember.id).where(TeamMember.user_id == user.id, TeamMember.team_id == team_id)
+    )
+    if member is None:
+        abort(403)
+    return events.event_stream(team_id, request)
+
 @web_issues_bp.route("/issue/<int:issue_id>")
 def issue_detail(issue_id):
     if not current_user():
         return redirect(url_for("web_auth.login"))
-    issue = Issue.query.get_or_404(issue_id)
-    return render_template("issue_detail.html", issue=issue)
+    issue = Issue.query.filter_by(id=issue_id).first_or_404()
+    # newest comments first, one page at a time (?after= walks to older ones)
+    try:
+        comments, older, _ = keyset_page(
+            Comment.query.filter_by(issue_id=issue_id), Comment,
+            current_app.config.get("COMMENTS_PER_PAGE", 20), after=request.args.get("after"),
+        )
+    except InvalidCursor:
+        abort(400)
+    return render_template("issue_detail.html", issue=issue, comments=comments, older=older)
 
 @web_issues_bp.route("/issue/create", methods=["GET", "POST"])
 def create_issue():
@@ -39,6 +60,11 @@ def create_issue():
         description = request.form["description"]
         issue = Issue(title=title, description=description, user_id = userid, team_id = teamid)
         db.session.add(issue)
+        db.session.flush()
+        versions.bump_teams(teamid)
+        counters.add(teamid, open=1)
+        events.publish(teamid, "issue_created", issue_id=issue.id, title=issue.title,
+                       status=issue.status, author=current_user().username)
         db.session.commit()
         flash("Issue created successfully!", "success")
         return redirect(url_for("web_issues.dashboard", team_id = teamid))
@@ -46,12 +72,17 @@ def create_issue():
 
 @web_issues_bp.route("/issue/<int:issue_id>/comment", methods=["POST"])
 def add_comment(issue_id):
-    if not current_user():
+    user = current_user()
+    if not user:
         return redirect(url_for("web_auth.login"))
     issue = Issue.query.get_or_404(issue_id)
     content = request.form["content"]
-    comment = Comment(content=content, author=current_user(), issue=issue)
+    comment = Comment(content=content, user_id=user.id, issue=issue)
     db.session.add(comment)
+    db.session.flush()
+    counters.add_comments(issue.id, issue.team_id)
+    events.publish(issue.team_id, "comment_added", issue_id=issue.id, comment_id=comment.id,
+                   author=user.username)
     db.session.commit()
     flash("Comment added!", "success")
     return redirect(url_for("web_issues.issue_detail", issue_id=issue_id))
@@ -60,17 +91,7 @@ def add_comment(issue_id):
 def toggle_status(issue_id):
     if not current_user():
         return redirect(url_for("web_auth.login"))
-    
-    issue = Issue.query.get_or_404(issue_id)
 
-    if issue:
-        if issue.status == "open":
-            issue.status = "working"
-        elif issue.status == "working":
-            issue.status = "resolved"
-        else:
-            issue.status = "open"
-        db.session.commit()
-    return redirect(url_for('web_issues.issue_detail', issue_id = issue.id))
-        
-            
+    if toggle_issue_status(issue_id) is None:
+        abort(404)
+    return redirect(url_for('web_issues.issue_detail', issue_id = issue_id))
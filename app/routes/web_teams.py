@@ -1,15 +1,12 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from app import db
-from app.models import Team, TeamMember, Issue, Comment, User
+from app.models import Team, TeamMember, Issue, Comment
 
 web_teams_bp = Blueprint("web_teams", __name__)
 
 # ----------------------------
 # Create a Team
 # ----------------------------
-def current_user():
-    return User.query.get(session["user_id"]) if "user_id" in session else None 
-
 @web_teams_bp.route("/team/create", methods=["GET", "POST"])
 def create_team():
     userid = session["user_id"]
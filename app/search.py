@@ -0,0 +1,132 @@
+# app/search.py
+# Full-text search over issues and comments (SQLite FTS5).
+#
+# issue_fts mirrors issue.title/description (rowid = issue.id) and
+# comment_fts mirrors comment.content (rowid = comment.id). Both are kept
+# current by triggers on the base tables, so every write path - ORM, bulk
+# core inserts, raw SQL - updates the index incrementally in the same
+# transaction. `flask rebuild-search` recreates and repopulates both tables.
+import re
+
+import click
+from sqlalchemy import event, text
+
+from app import db
+
+SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS issue_fts USING fts5(
+        title, description, team_id UNINDEXED, tokenize='porter unicode61')""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS comment_fts USING fts5(
+        content, issue_id UNINDEXED, team_id UNINDEXED, tokenize='porter unicode61')""",
+
+    """CREATE TRIGGER IF NOT EXISTS issue_fts_ai AFTER INSERT ON issue BEGIN
+        INSERT INTO issue_fts(rowid, title, description, team_id)
+        VALUES (new.id, new.title, new.description, new.team_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS issue_fts_au AFTER UPDATE OF title, description, team_id ON issue BEGIN
+        DELETE FROM issue_fts WHERE rowid = old.id;
+        INSERT INTO issue_fts(rowid, title, description, team_id)
+        VALUES (new.id, new.title, new.description, new.team_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS issue_fts_ad AFTER DELETE ON issue BEGIN
+        DELETE FROM issue_fts WHERE rowid = old.id;
+    END""",
+
+    """CREATE TRIGGER IF NOT EXISTS comment_fts_ai AFTER INSERT ON comment BEGIN
+        INSERT INTO comment_fts(rowid, content, issue_id, team_id)
+        VALUES (new.id, new.content, new.issue_id,
+                (SELECT team_id FROM issue WHERE id = new.issue_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comment_fts_au AFTER UPDATE OF content ON comment BEGIN
+        DELETE FROM comment_fts WHERE rowid = old.id;
+        INSERT INTO comment_fts(rowid, content, issue_id, team_id)
+        VALUES (new.id, new.content, new.issue_id,
+                (SELECT team_id FROM issue WHERE id = new.issue_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comment_fts_ad AFTER DELETE ON comment BEGIN
+        DELETE FROM comment_fts WHERE rowid = old.id;
+    END""",
+]
+
+# title matches weigh more than description matches
+SEARCH_SQL = text("""
+    WITH hits AS (
+        SELECT rowid AS issue_id, bm25(issue_fts, 10.0, 1.0) AS score
+        FROM issue_fts WHERE issue_fts MATCH :q AND team_id = :team_id
+        UNION ALL
+        SELECT issue_id, bm25(comment_fts) AS score
+        FROM comment_fts WHERE comment_fts MATCH :q AND team_id = :team_id
+    )
+    SELECT issue_id, MIN(score) AS score FROM hits
+    GROUP BY issue_id
+    ORDER BY score, issue_id DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+
+def is_supported(bind):
+    return bind.dialect.name == "sqlite"
+
+
+def create_schema(connection):
+    for statement in SCHEMA:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create_search_schema(target, connection, **kw):
+    if is_supported(connection):
+        create_schema(connection)
+
+
+@event.listens_for(db.metadata, "after_drop")
+def _drop_search_schema(target, connection, **kw):
+    if is_supported(connection):
+        connection.exec_driver_sql("DROP TABLE IF EXISTS issue_fts")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS comment_fts")
+
+
+def rebuild(connection):
+    """Recreate and repopulate the search index from the base tables."""
+    connection.exec_driver_sql("DROP TABLE IF EXISTS issue_fts")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS comment_fts")
+    create_schema(connection)
+    connection.exec_driver_sql(
+        "INSERT INTO issue_fts(rowid, title, description, team_id) "
+        "SELECT id, title, description, team_id FROM issue"
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO comment_fts(rowid, content, issue_id, team_id) "
+        "SELECT comment.id, comment.content, comment.issue_id, issue.team_id "
+        "FROM comment JOIN issue ON issue.id = comment.issue_id"
+    )
+    connection.exec_driver_sql("INSERT INTO issue_fts(issue_fts) VALUES ('optimize')")
+    connection.exec_driver_sql("INSERT INTO comment_fts(comment_fts) VALUES ('optimize')")
+
+
+def build_match(q):
+    """Turn free text into a safe FTS5 query: every word must match (as a prefix)."""
+    words = re.findall(r"\w+", q or "")
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search_issue_ids(team_id, q, limit, offset=0):
+    """Ranked [(issue_id, score)] for a team; lower score is a better match."""
+    match = build_match(q)
+    if not match:
+        return []
+    rows = db.session.execute(
+        SEARCH_SQL, {"q": match, "team_id": team_id, "limit": limit, "offset": offset}
+    )
+    return [(row.issue_id, row.score) for row in rows]
+
+
+def init_app(app):
+    @app.cli.command("rebuild-search")
+    def rebuild_search_command():
+        """Rebuild the full-text search index for issues and comments."""
+        with db.engine.begin() as connection:
+            if not is_supported(connection):
+                raise click.ClickException("Full-text search requires SQLite (FTS5).")
+            rebuild(connection)
+        click.echo("Search index rebuilt.")
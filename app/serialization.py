@@ -0,0 +1,56 @@
+# app/serialization.py
+# Column-projected row serialization and the app's JSON provider.
+#
+# A Schema names the columns a response needs. Views select exactly those
+# columns (schema.columns) and get plain row tuples back - no ORM identity
+# map, no per-row object construction, no relationship loading - and
+# schema.dump() turns each row into the response dict. The key order and
+# the positions needing conversion (timestamps) are worked out once when the
+# schema is defined, so dumping a row is a zip plus a few isoformat() calls.
+#
+# AppJSONProvider writes every datetime as ISO 8601 (Flask's default is an
+# HTTP date) and skips key sorting, so responses keep the schema's field
+# order and don't pay for a sort per object.
+import datetime
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime
+
+
+def iso(value):
+    return value.isoformat() if value is not None else None
+
+
+class Schema:
+    """An ordered mapping of response keys to columns."""
+
+    def __init__(self, **fields):
+        self.keys = tuple(fields)
+        self.columns = tuple(fields.values())
+        self._convert = tuple(
+            i for i, column in enumerate(self.columns)
+            if isinstance(column.type, (DateTime, Date))
+        )
+
+    def dump(self, row):
+        if not self._convert:
+            return dict(zip(self.keys, row))
+        values = list(row)
+        for i in self._convert:
+            if values[i] is not None:
+                values[i] = values[i].isoformat()
+        return dict(zip(self.keys, values))
+
+    def dump_all(self, rows):
+        return [self.dump(row) for row in rows]
+
+
+class AppJSONProvider(DefaultJSONProvider):
+    sort_keys = False
+    compact = True
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime.datetime, datetime.date)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
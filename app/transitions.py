@@ -0,0 +1,81 @@
+# app/transitions.py
+# Issue status changes done as single conditional UPDATE statements.
+#
+# The next status is computed by the database (UPDATE ... SET status = CASE
+# ...), so two users clicking "Change" at the same time each advance the
+# issue one step instead of both writing the same value, and the new state
+# comes back through RETURNING instead of a separate read.
+from sqlalchemy import case, update
+
+from app import db, versions, counters, events
+from app.models import Issue, ISSUE_STATUSES
+
+STATUSES = ISSUE_STATUSES
+
+PREVIOUS_STATUS = {"working": "open", "resolved": "working", "open": "resolved"}
+
+NEXT_STATUS = case(
+    (Issue.status == "open", "working"),
+    (Issue.status == "working", "resolved"),
+    else_="open",
+)
+
+
+def toggle_issue_status(issue_id):
+    """Advance open -> working -> resolved -> open. Returns the updated row or None.
+
+    RETURNING only gives the new status, which pins down the old one only
+    while the status was one of ISSUE_STATUSES. Any other value (legacy
+    "closed" rows) is reset to open by a second UPDATE, and the team's
+    counters are recounted instead of moved.
+    """
+    returning = (Issue.id, Issue.title, Issue.status, Issue.team_id)
+    row = db.session.execute(
+        update(Issue)
+        .where(Issue.id == issue_id, Issue.status.in_(ISSUE_STATUSES))
+        .values(status=NEXT_STATUS, **versions.issue_bump_values())
+        .returning(*returning)
+    ).first()
+    known = row is not None
+    if not known:
+        row = db.session.execute(
+            update(Issue)
+            .where(Issue.id == issue_id)
+            .values(status="open", **versions.issue_bump_values())
+            .returning(*returning)
+        ).first()
+    if row is not None:
+        versions.bump_teams(row.team_id)
+        if known:
+            counters.move(row.team_id, PREVIOUS_STATUS[row.status], row.status)
+        else:
+            counters.recount(row.team_id)
+        events.publish(row.team_id, "status_changed", issue_id=row.id, status=row.status)
+    db.session.commit()
+    return row
+
+
+def set_status_bulk(team_id, status, issue_ids=None, from_status=None):
+    """Move issues of a team to `status` in one statement.
+
+    Targets either the given issue_ids, or every issue currently in
+    from_status (or the whole team when neither is given). Returns the ids
+    that were changed.
+    """
+    stmt = update(Issue).where(Issue.team_id == team_id, Issue.status != status)
+    if issue_ids is not None:
+        stmt = stmt.where(Issue.id.in_(issue_ids))
+    if from_status is not None:
+        stmt = stmt.where(Issue.status == from_status)
+    rows = db.session.execute(
+        stmt.values(status=status, **versions.issue_bump_values()).returning(Issue.id),
+        execution_options={"synchronize_session": False},
+    )
+    changed = sorted(rows.scalars())
+    if changed:
+        versions.bump_teams(team_id)
+        # issues came from mixed statuses; recount the team within this transaction
+        counters.recount(team_id)
+        events.publish(team_id, "status_changed", issue_ids=changed, status=status)
+    db.session.commit()
+    return changed
@@ -0,0 +1,104 @@
+# app/versions.py
+# Version stamps for conditional GETs.
+#
+# Team.issues_version changes whenever an issue of the team is created or
+# changes status; Issue.version changes when the issue itself or its
+# comments change. The write paths bump them inside their own transaction,
+# and the GET endpoints read just the stamp (a primary-key lookup) to answer
+# If-None-Match / If-Modified-Since with 304 before running the real query.
+import hashlib
+from datetime import datetime, timezone
+
+from flask import request, make_response
+from sqlalchemy import select, update
+
+from app import db
+from app.cache import invalidate_teams_on_commit
+from app.models import Issue, Team
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def bump_teams(*team_ids):
+    """Mark the issue listings of these teams as changed (caller commits).
+
+    Also drops the teams' cached listing pages once the transaction commits.
+    """
+    ids = {tid for tid in team_ids if tid is not None}
+    if ids:
+        invalidate_teams_on_commit(*ids)
+        db.session.execute(
+            update(Team)
+            .where(Team.id.in_(ids))
+            .values(issues_version=Team.issues_version + 1, issues_updated_at=utcnow()),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def bump_issues(*issue_ids):
+    """Mark these issues' detail views as changed (caller commits)."""
+    if issue_ids:
+        db.session.execute(
+            update(Issue)
+            .where(Issue.id.in_(issue_ids))
+            .values(**issue_bump_values()),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def issue_bump_values():
+    """Column values that bump an issue's stamp, for use inside another UPDATE."""
+    return {"version": Issue.version + 1, "updated_at": utcnow()}
+
+
+def team_stamp(team_id):
+    row = db.session.execute(
+        select(Team.issues_version, Team.issues_updated_at).where(Team.id == team_id)
+    ).first()
+    return tuple(row) if row else None
+
+
+def issue_stamp(issue_id):
+    # (version, updated_at, team_id): the team lets callers authorize before a 304
+    row = db.session.execute(
+        select(Issue.version, Issue.updated_at, Issue.team_id).where(Issue.id == issue_id)
+    ).first()
+    return tuple(row) if row else None
+
+
+def make_etag(kind, key, version, vary=""):
+    # the listing etag also covers the query string (filter, sort, page...)
+    digest = hashlib.blake2b(vary.encode("utf-8"), digest_size=6).hexdigest() if vary else "0"
+    return f"{kind}-{key}-{version}-{digest}"
+
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def not_modified(etag, last_modified):
+    """A 304 response if the client's validators still match, else None."""
+    last_modified = _as_utc(last_modified)
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        matched = last_modified <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    response = make_response("", 304)
+    return add_validators(response, etag, last_modified)
+
+
+def add_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    return response
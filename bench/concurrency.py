@@ -0,0 +1,222 @@
+"""gevent server vs. thread-per-request under many idle connections.
+
+Seeds a throwaway SQLite database, then for each server mode:
+
+  gevent   python serve.py (bounded greenlet pool, capped DB pool, bcrypt on
+           native threads)
+  threads  werkzeug's threaded server, one OS thread per connection, with
+           the production engine profile and the bcrypt process pool
+
+opens --idle /events streams that stay open and silent (the "thousands of
+mostly idle API clients" case), then drives --requests authenticated reads
+plus a few logins from --concurrency client threads, and reports read
+latency, throughput, how many idle streams the server accepted, and the
+server's thread count and memory.
+
+    python -m bench.concurrency
+    python -m bench.concurrency --idle 3000 --requests 5000 --modes gevent
+"""
+import argparse
+import http.client
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.loadtest import free_port, wait_until_up
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "gevent": {"DB_ENGINE_PROFILE": "gevent", "BCRYPT_OFFLOAD": "thread"},
+    "threads": {"DB_ENGINE_PROFILE": "production", "BCRYPT_OFFLOAD": "process"},
+}
+
+
+def server_env(db_path, args):
+    return {
+        **os.environ,
+        "APP_CONFIG": "production",
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench",
+        "JWT_SECRET_KEY": "bench-jwt",
+        "RATELIMIT_ENABLED": "False",
+        "RATELIMIT_STORAGE_URI": "memory://",
+        "BCRYPT_LOG_ROUNDS": str(args.rounds),
+        "BCRYPT_OFFLOAD": "inline",  # seeding; each mode sets its own
+        # idle streams should stay silent for the whole run
+        "EVENTS_KEEPALIVE_SECONDS": "300",
+    }
+
+
+def seed(db_path, args):
+    """A datagen dataset; returns (team id, member email, access token)."""
+    os.environ.update(server_env(db_path, args))
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import select
+
+    from app import counters, create_app, datagen, db
+    from app.models import TeamMember, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with db.engine.connect() as connection:
+            datagen.generate(connection, users=200, teams=5, issues=5000, seed=1)
+        counters.repair()
+        member = db.session.execute(
+            select(TeamMember.team_id, User.id, User.email).join(User).order_by(TeamMember.team_id)
+        ).first()
+        token = create_access_token(identity=str(member.id))
+        db.engine.dispose()
+    return member.team_id, member.email, token
+
+
+def serve_threads(port):
+    import logging
+
+    from werkzeug.serving import run_simple
+
+    from app import create_app
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    run_simple("127.0.0.1", port, create_app(), threaded=True)
+
+
+def start(mode, port, env, args):
+    if mode == "gevent":
+        command = [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+                   "--pool-size", str(args.pool_size)]
+    else:
+        command = [sys.executable, "-m", "bench.concurrency", "--serve-threads", str(port)]
+    # own process group, so helper processes (bcrypt pool) go down with it
+    return subprocess.Popen(command, cwd=ROOT, env={**env, **MODES[mode]}, start_new_session=True)
+
+
+def open_idle_streams(port, team_id, token, n):
+    """Connect n /events streams and wait for each one's first frame."""
+    request = (f"GET /api/issues/teams/{team_id}/events?jwt={token} HTTP/1.1\r\n"
+               f"Host: 127.0.0.1\r\nX-Forwarded-Proto: https\r\nAccept: text/event-stream\r\n\r\n").encode()
+    streams, accepted = [], 0
+    for _ in range(n):
+        try:
+            s = socket.create_connection(("127.0.0.1", port), timeout=5)
+            s.sendall(request)
+            streams.append(s)
+        except OSError:
+            break
+    for s in streams:
+        try:
+            if b"retry:" in s.recv(4096) or b"retry:" in s.recv(4096):
+                accepted += 1
+        except OSError:
+            pass
+    return streams, accepted
+
+
+def drive(port, team_id, email, token, args):
+    """Reads (plus one login per --login-every) from a client thread pool."""
+    local = threading.local()
+    headers = {"Authorization": f"Bearer {token}", "X-Forwarded-Proto": "https"}
+    login_body = f'{{"email": "{email}", "password": "password"}}'
+
+    def one(i):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        started = time.perf_counter()
+        try:
+            if args.login_every and i % args.login_every == 0:
+                conn.request("POST", "/api/auth/login", body=login_body,
+                             headers={"Content-Type": "application/json", "X-Forwarded-Proto": "https"})
+                kind = "login"
+            else:
+                conn.request("GET", f"/api/issues/teams/{team_id}?per_page=20&page={i % 50 + 1}", headers=headers)
+                kind = "read"
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except OSError:
+            local.conn = None
+            kind, ok = "read", False
+        return kind, ok, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    reads = sorted(ms for kind, ok, ms in results if kind == "read" and ok)
+    return {
+        "rps": len(results) / elapsed,
+        "errors": sum(1 for _, ok, _ in results if not ok),
+        "read_p50_ms": statistics.median(reads) if reads else float("nan"),
+        "read_p95_ms": reads[int(len(reads) * 0.95)] if reads else float("nan"),
+        "read_p99_ms": reads[int(len(reads) * 0.99)] if reads else float("nan"),
+    }
+
+
+def server_footprint(pid):
+    import psutil
+
+    process = psutil.Process(pid)
+    procs = [process] + process.children(recursive=True)
+    return {
+        "threads": process.num_threads(),
+        "rss_mb": sum(p.memory_info().rss for p in procs) / 2 ** 20,
+    }
+
+
+def run(mode, db_path, seeded, args):
+    team_id, email, token = seeded
+    port = free_port()
+    server = start(mode, port, server_env(db_path, args), args)
+    streams = []
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}")
+        streams, accepted = open_idle_streams(port, team_id, token, args.idle)
+        result = drive(port, team_id, email, token, args)
+        result.update(server_footprint(server.pid), idle_accepted=accepted)
+        return result
+    finally:
+        for s in streams:
+            s.close()
+        os.killpg(server.pid, signal.SIGTERM)
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(server.pid, signal.SIGKILL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--idle", type=int, default=1000, help="idle /events streams held open")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads sending requests")
+    parser.add_argument("--login-every", type=int, default=50, help="every Nth request is a login (0: none)")
+    parser.add_argument("--pool-size", type=int, default=5000, help="gevent greenlet pool")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt work factor")
+    parser.add_argument("--serve-threads", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve_threads:
+        serve_threads(args.serve_threads)
+        return
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="concurrency-"), "bench.db")
+    seeded = seed(db_path, args)
+    print(f"{'mode':<8} {'idle ok':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7} {'threads':>8} {'RSS MB':>8}")
+    for mode in args.modes:
+        r = run(mode, db_path, seeded, args)
+        print(f"{mode:<8} {r['idle_accepted']:>8} {r['rps']:>8.1f} {r['read_p50_ms']:>8.1f} "
+              f"{r['read_p95_ms']:>8.1f} {r['read_p99_ms']:>8.1f} {r['errors']:>7} "
+              f"{r['threads']:>8} {r['rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
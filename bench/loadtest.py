@@ -0,0 +1,233 @@
+"""Headless load test with regression thresholds.
+
+Seeds a throwaway SQLite database, serves the app from a separate process,
+runs locustfile.py headless against it and compares per-endpoint p95
+latency and overall throughput with bench/loadtest_baselines.json. Exits
+non-zero when p95 grows, or throughput drops, by more than --tolerance.
+
+    python -m bench.loadtest                       # check against baselines
+    python -m bench.loadtest --update-baselines    # record this machine's numbers
+
+Baselines are only comparable on the machine (and settings) that recorded
+them; re-record after changing hardware or the scenario mix.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES = os.path.join(ROOT, "bench", "loadtest_baselines.json")
+PASSWORD = "loadtest-pass"
+
+
+def server_env(db_path, args):
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "SECRET_KEY": "loadtest",
+        "JWT_SECRET_KEY": "loadtest-jwt",
+        "RATELIMIT_ENABLED": "False",
+        # logins only happen once per account at test start
+        "BCRYPT_LOG_ROUNDS": str(args.rounds),
+        "DB_ENGINE_PROFILE": "production",
+        "LOADTEST_ACCOUNTS": str(args.accounts),
+        "LOADTEST_PASSWORD": PASSWORD,
+    }
+
+
+def seed(args):
+    """Users load{i}@bench.local spread over teams with issues and comments."""
+    from sqlalchemy import insert
+
+    from app import counters, create_app, db
+    from app.hashing import PasswordHasher
+    from app.models import Comment, Issue, Team, TeamMember, User
+
+    rng = random.Random(args.seed)
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        pw_hash = PasswordHasher(rounds=args.rounds, offload="inline").hash(PASSWORD)
+        db.session.execute(insert(User), [
+            {"id": i + 1, "username": f"load{i}", "email": f"load{i}@bench.local", "password_hash": pw_hash}
+            for i in range(args.accounts)
+        ])
+        db.session.execute(insert(Team), [{"id": t + 1, "name": f"loadteam{t}"} for t in range(args.teams)])
+        members = set()
+        for user_id in range(1, args.accounts + 1):
+            for team_id in rng.sample(range(1, args.teams + 1), k=min(args.teams, rng.randint(1, 3))):
+                members.add((user_id, team_id))
+        db.session.execute(insert(TeamMember), [
+            {"user_id": u, "team_id": t, "role": "member"} for u, t in sorted(members)
+        ])
+
+        base = datetime(2025, 1, 1)
+        issues, comments, issue_id = [], [], 0
+        for team_id in range(1, args.teams + 1):
+            for n in range(args.issues_per_team):
+                issue_id += 1
+                issues.append({
+                    "id": issue_id,
+                    "title": f"seeded issue {issue_id}",
+                    "description": "seeded for load testing",
+                    "status": rng.choice(("open", "open", "working", "resolved")),
+                    "user_id": rng.randint(1, args.accounts),
+                    "team_id": team_id,
+                    "created_at": base + timedelta(minutes=issue_id),
+                })
+                for _ in range(rng.randint(0, 3)):
+                    comments.append({"content": "seeded comment", "issue_id": issue_id,
+                                     "user_id": rng.randint(1, args.accounts)})
+        db.session.execute(insert(Issue), issues)
+        db.session.execute(insert(Comment), comments)
+        db.session.commit()
+        counters.repair()
+        counters.repair_comment_counts()
+        db.engine.dispose()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            probe = urllib.request.Request(f"{url}/api/auth/me", headers={"X-Forwarded-Proto": "https"})
+            urllib.request.urlopen(probe, timeout=1)
+        except urllib.error.HTTPError:
+            return  # any HTTP answer (401) means the server is serving
+        except OSError:
+            time.sleep(0.2)
+        else:
+            return
+    raise RuntimeError(f"server at {url} did not come up")
+
+
+def serve(port):
+    import logging
+
+    from werkzeug.serving import run_simple
+
+    from app import create_app
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no per-request access log
+    run_simple("127.0.0.1", port, create_app(), threaded=True)
+
+
+def read_stats(prefix):
+    stats = {}
+    with open(f"{prefix}_stats.csv", newline="") as f:
+        for row in csv.DictReader(f):
+            stats[row["Name"]] = {
+                "requests": int(row["Request Count"]),
+                "failures": int(row["Failure Count"]),
+                "p95_ms": float(row["95%"]),
+                "rps": float(row["Requests/s"]),
+            }
+    return stats
+
+
+def compare(stats, baselines, tolerance):
+    """Human-readable regressions of `stats` against `baselines`."""
+    problems = []
+    for name, base in baselines.items():
+        current = stats.get(name)
+        if current is None:
+            problems.append(f"{name}: no requests recorded")
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {current['p95_ms']:.0f} ms > baseline {base['p95_ms']:.0f} ms")
+        if name == "Aggregated" and current["rps"] < base["rps"] * (1 - tolerance):
+            problems.append(f"{name}: {current['rps']:.1f} req/s < baseline {base['rps']:.1f} req/s")
+    failures = stats.get("Aggregated", {}).get("failures", 0)
+    if failures:
+        problems.append(f"{failures} failed request(s)")
+    return problems
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    db_path = os.path.join(workdir, "loadtest.db")
+    env = server_env(db_path, args)
+    os.environ.update(env)
+    seed(args)
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    # own process group, so the bcrypt pool's forkserver goes down with it
+    server = subprocess.Popen([sys.executable, "-m", "bench.loadtest", "--serve", str(port)],
+                              cwd=ROOT, env=env, start_new_session=True)
+    try:
+        wait_until_up(url)
+        prefix = os.path.join(workdir, "locust")
+        subprocess.run([
+            sys.executable, "-m", "locust", "-f", os.path.join(ROOT, "locustfile.py"),
+            "--headless", "--only-summary", "--host", url,
+            "-u", str(args.users), "-r", str(args.spawn_rate), "-t", args.run_time,
+            "--csv", prefix,
+        ], cwd=ROOT, env=env, check=False)
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=10)
+    return read_stats(prefix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="concurrent simulated users")
+    parser.add_argument("--spawn-rate", type=float, default=10)
+    parser.add_argument("--run-time", default="30s")
+    parser.add_argument("--accounts", type=int, default=20, help="seeded accounts in the token pool")
+    parser.add_argument("--teams", type=int, default=10)
+    parser.add_argument("--issues-per-team", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=4, help="bcrypt work factor of the seeded accounts")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression, as a fraction")
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve)
+
+    stats = run(args)
+    print(f"{'endpoint':<45} {'reqs':>7} {'fail':>5} {'p95 ms':>8} {'req/s':>8}")
+    for name, s in stats.items():
+        print(f"{name:<45} {s['requests']:>7} {s['failures']:>5} {s['p95_ms']:>8.0f} {s['rps']:>8.1f}")
+
+    if args.update_baselines:
+        with open(BASELINES, "w") as f:
+            json.dump({name: {"p95_ms": s["p95_ms"], "rps": s["rps"]} for name, s in stats.items()},
+                      f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baselines written to {os.path.relpath(BASELINES, ROOT)}")
+        return
+
+    if not os.path.exists(BASELINES):
+        sys.exit("no baselines recorded yet; run with --update-baselines first")
+    with open(BASELINES) as f:
+        problems = compare(stats, json.load(f), args.tolerance)
+    if problems:
+        print("\nREGRESSIONS:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("\nwithin baselines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Read-path tail latency during a login burst, inline vs. offloaded bcrypt.
+
+Emulates one app worker with a fixed number of request threads (like a
+gthread gunicorn worker) over a throwaway SQLite database. A burst of logins
+is submitted together with a steady stream of cheap authenticated reads, and
+the read latency - including time spent queued for a free thread - is
+reported per bcrypt mode.
+
+    python -m bench.login_burst --rounds 12 --threads 8 --logins 64
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def build_app(mode, rounds, pool_size, db_path):
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench",
+        "JWT_SECRET_KEY": "bench-jwt",
+        "RATELIMIT_ENABLED": "False",
+        "BCRYPT_LOG_ROUNDS": str(rounds),
+        "BCRYPT_OFFLOAD": mode,
+        "BCRYPT_POOL_SIZE": str(pool_size),
+        "BCRYPT_QUEUE_SIZE": str(pool_size),
+    })
+    from app import create_app, db
+    from app.models import User
+    from flask_jwt_extended import create_access_token
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        reader = User(username="reader", email="reader@bench.local")
+        db.session.add(reader)
+        for i in range(4):
+            user = User(username=f"login{i}", email=f"login{i}@bench.local")
+            user.set_password("benchpass")
+            db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(reader.id))
+    return app, token
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(mode, args):
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    app, token = build_app(mode, args.rounds, args.pool_size, db_path)
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        return local.client
+
+    def timed(submitted, fn):
+        response = fn()
+        return time.perf_counter() - submitted, response.status_code
+
+    def login(i):
+        return client().post("/api/auth/login", base_url="https://localhost", json={
+            "email": f"login{i % 4}@bench.local", "password": "benchpass"
+        })
+
+    def read():
+        return client().get("/api/auth/me", base_url="https://localhost",
+                            headers={"Authorization": f"Bearer {token}"})
+
+    with ThreadPoolExecutor(max_workers=args.threads) as server:
+        read(); login(0)  # warm up (and start the hashing pool)
+        started = time.perf_counter()
+        logins = [server.submit(timed, time.perf_counter(), lambda i=i: login(i)) for i in range(args.logins)]
+        reads = []
+        for _ in range(args.reads):
+            reads.append(server.submit(timed, time.perf_counter(), read))
+            time.sleep(args.read_interval)
+        read_results = [f.result() for f in reads]
+        login_results = [f.result() for f in logins]
+        elapsed = time.perf_counter() - started
+
+    latencies = [lat * 1000 for lat, _ in read_results]
+    codes = [code for _, code in login_results]
+    return {
+        "mode": mode,
+        "read_p50_ms": statistics.median(latencies),
+        "read_p95_ms": percentile(latencies, 95),
+        "read_p99_ms": percentile(latencies, 99),
+        "logins_ok": codes.count(200),
+        "logins_503": codes.count(503),
+        "elapsed_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt work factor")
+    parser.add_argument("--threads", type=int, default=8, help="request threads in the emulated worker")
+    parser.add_argument("--pool-size", type=int, default=2, help="bcrypt processes in offload mode")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--read-interval", type=float, default=0.005, help="seconds between reads")
+    parser.add_argument("--mode", choices=["inline", "process", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["inline", "process"] if args.mode == "both" else [args.mode]
+    print(f"{'mode':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'login ok':>9} {'login 503':>10} {'elapsed s':>10}")
+    for mode in modes:
+        r = run(mode, args)
+        print(f"{r['mode']:<8} {r['read_p50_ms']:>8.1f} {r['read_p95_ms']:>8.1f} {r['read_p99_ms']:>8.1f} "
+              f"{r['logins_ok']:>9} {r['logins_503']:>10} {r['elapsed_s']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""In-process route benchmarks with per-route SQL budgets.
+
+Drives every blueprint route through the Flask test client against an
+in-memory SQLite database seeded at several sizes (app/datagen.py), and
+records each route's median latency and SQL statement count. Fails when
+
+  - a route issues more statements than its budget (the budgets don't grow
+    with the data, so an N+1 shows up as soon as a page has >1 row), or
+  - a route's median is slower than bench/micro_baselines.json by more than
+    --tolerance (plus --slack-ms, to absorb timer noise on fast routes).
+
+    python -m bench.micro                       # all sizes
+    python -m bench.micro --sizes small medium --repeat 10
+    python -m bench.micro --update-baselines
+
+Query budgets are also enforced by the test suite (test/test_route_budgets.py);
+the timing check only means something on the machine that recorded the
+baselines.
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES = os.path.join(ROOT, "bench", "micro_baselines.json")
+STATUSES = ("open", "working", "resolved")
+
+SIZES = {
+    "small": {"users": 50, "teams": 5, "issues": 500},
+    "medium": {"users": 500, "teams": 20, "issues": 10000},
+    "large": {"users": 2000, "teams": 50, "issues": 100000},
+}
+
+# auth: "jwt" (bearer access token), "refresh" (bearer refresh token),
+# "session" (web login) or None. path/json/data may use {team}, {issue},
+# {invite}, {email}, {n} (a running request counter) and {status} (cycles).
+# Issue/comment writes, bulk ones included, add one INSERT into the team_event
+# outbox (app/events.py).
+# Login/refresh read the caller's memberships into the token claims, and
+# membership changes bump User.membership_version (app/membership.py).
+Route = namedtuple("Route", "name method path budget auth json data", defaults=(None, None, None))
+
+ROUTES = [
+    # api_auth
+    Route("api_auth.login", "POST", "/api/auth/login", 2,
+          json={"email": "{email}", "password": "password"}),
+    Route("api_auth.refresh", "POST", "/api/auth/refresh", 1, auth="refresh"),
+    Route("api_auth.me", "GET", "/api/auth/me", 0, auth="jwt"),
+    # api_issues
+    Route("api_issues.teams_dashboard", "GET", "/api/issues/teams", 1, auth="jwt"),
+    Route("api_issues.api_dashboard[offset]", "GET", "/api/issues/teams/{team}?page=2&per_page=20", 3, auth="jwt"),
+    Route("api_issues.api_dashboard[cursor]", "GET", "/api/issues/teams/{team}?cursor=1&per_page=20", 2, auth="jwt"),
+    Route("api_issues.search_issues", "GET", "/api/issues/teams/{team}/search?q=generated", 2, auth="jwt"),
+    Route("api_issues.export_issues", "GET", "/api/issues/teams/{team}/export?format=ndjson", 1, auth="jwt"),
+    Route("api_issues.get_issue", "GET", "/api/issues/teams/issue_detail/{issue}", 3, auth="jwt"),
+    Route("api_issues.list_comments", "GET", "/api/issues/issue_detail/{issue}/comments?per_page=20", 2, auth="jwt"),
+    Route("api_issues.create_issue", "POST", "/api/issues/teams/create", 5, auth="jwt",
+          json={"title": "bench {n}", "description": "micro benchmark", "team_id": "{team}"}),
+    Route("api_issues.create_issues_bulk", "POST", "/api/issues/teams/create/bulk", 5, auth="jwt",
+          json=[{"title": "bulk {n}", "description": "micro benchmark", "team_id": "{team}"}] * 20),
+    Route("api_issues.add_comment", "POST", "/api/issues/issue_detail/{issue}/comment", 7, auth="jwt",
+          json={"content": "bench comment {n}"}),
+    Route("api_issues.toggle_status", "POST", "/api/issues/{issue}/toggle", 5, auth="jwt"),
+    Route("api_issues.bulk_status", "POST", "/api/issues/teams/{team}/status/bulk", 5, auth="jwt",
+          json={"status": "{status}", "issue_ids": ["{issue}"]}),
+    Route("api_issues.cache_stats", "GET", "/api/issues/cache/stats", 0, auth="jwt"),
+    # web_auth
+    Route("web_auth.login", "POST", "/", 1, data={"email": "{email}", "password": "password"}),
+    Route("web_auth.register[form]", "GET", "/register", 0),
+    # web_teams
+    Route("web_teams.view_teams", "GET", "/teams", 1, auth="session"),
+    Route("web_teams.create_team", "POST", "/team/create", 6, auth="session", data={"name": "bench team {n}"}),
+    Route("web_teams.join_team", "POST", "/team/join", 2, auth="session", data={"invite_code": "{invite}"}),
+    # web_issues
+    Route("web_issues.dashboard", "GET", "/teams/{team}/dashboard", 1, auth="session"),
+    Route("web_issues.issue_detail", "GET", "/issue/{issue}", 2, auth="session"),
+    Route("web_issues.create_issue", "POST", "/issue/create", 4, auth="session",
+          data={"title": "web bench {n}", "description": "micro benchmark"}),
+    Route("web_issues.add_comment", "POST", "/issue/{issue}/comment", 5, auth="session",
+          data={"content": "web bench comment {n}"}),
+    Route("web_issues.toggle_status", "POST", "/issue/{issue}/toggle", 4, auth="session"),
+]
+
+
+def _fill(value, ctx):
+    if isinstance(value, str):
+        filled = value.format(**ctx)
+        return int(filled) if filled.isdigit() and value.startswith("{") else filled
+    if isinstance(value, list):
+        return [_fill(v, ctx) for v in value]
+    if isinstance(value, dict):
+        return {k: _fill(v, ctx) for k, v in value.items()}
+    return value
+
+
+def build(size):
+    """A seeded app plus the ids/credentials the routes need."""
+    from sqlalchemy import select
+
+    from app import counters, create_app, datagen, db
+    from app.cache import NullBackend, ResponseCache
+    from app.models import Issue, Team, TeamMember, User
+
+    app = create_app("testing")
+    # measure the database path, not the listing cache
+    app.extensions["response_cache"] = ResponseCache(NullBackend())
+    with app.app_context():
+        db.create_all()
+        with db.engine.connect() as connection:
+            datagen.generate(connection, seed=1, comments_per_issue=2, **SIZES[size])
+        counters.repair()
+        # the biggest team (datagen puts it first) and its manager
+        team = db.session.scalar(select(Team).order_by(Team.id))
+        manager = db.session.scalar(
+            select(User).join(TeamMember).where(TeamMember.team_id == team.id, TeamMember.role == "manager")
+        )
+        issue_id = db.session.scalar(select(Issue.id).where(Issue.team_id == team.id).order_by(Issue.id.desc()))
+        other = db.session.scalar(select(Team).where(Team.id != team.id).order_by(Team.id))
+        ctx = {"team": team.id, "issue": issue_id, "email": manager.email,
+               "user_id": manager.id, "invite": (other or team).invite_code}
+    return app, ctx
+
+
+def _clients(app, ctx):
+    from flask_jwt_extended import create_access_token, create_refresh_token
+
+    with app.app_context():
+        tokens = {
+            "jwt": create_access_token(identity=str(ctx["user_id"])),
+            "refresh": create_refresh_token(identity=str(ctx["user_id"])),
+        }
+    client = app.test_client()
+    web = app.test_client()
+    with web.session_transaction() as session:
+        session["user_id"] = ctx["user_id"]
+        session["current_team_id"] = ctx["team"]
+    return client, web, tokens
+
+
+def _counter(app):
+    from sqlalchemy import event
+
+    from app import db
+
+    state = {"count": 0}
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        # the revocation cache's periodic refresh (app/revocation.py) lands on
+        # whichever request happens to run when it's due; it isn't route cost
+        if "token_blocklist" not in statement:
+            state["count"] += 1
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    return state
+
+
+def measure(app, ctx, routes=ROUTES, repeat=20, warmup=3):
+    """{route name: {"median_ms", "statements", "status"}} for one seeded app."""
+    client, web, tokens = _clients(app, ctx)
+    counter = _counter(app)
+    sequence = itertools.count()
+    results = {}
+    for route in routes:
+        c = web if route.auth == "session" else client
+        headers = {"Authorization": f"Bearer {tokens[route.auth]}"} if route.auth in tokens else {}
+        timings, statements, statuses = [], 0, set()
+        for i in range(warmup + repeat):
+            n = next(sequence)
+            rctx = {**ctx, "n": n, "status": STATUSES[n % len(STATUSES)]}
+            counter["count"] = 0
+            started = time.perf_counter()
+            response = c.open(_fill(route.path, rctx), method=route.method, headers=headers,
+                              json=_fill(route.json, rctx), data=_fill(route.data, rctx))
+            response.get_data()  # drain streamed responses inside the window
+            elapsed = time.perf_counter() - started
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+                statements = max(statements, counter["count"])
+                statuses.add(response.status_code)
+        results[route.name] = {
+            "median_ms": statistics.median(timings),
+            "statements": statements,
+            "status": max(statuses),
+        }
+    return results
+
+
+def check(size, results, baselines, tolerance, slack_ms):
+    """Human-readable failures for one size."""
+    budgets = {route.name: route.budget for route in ROUTES}
+    problems = []
+    for name, r in results.items():
+        if r["status"] >= 400:
+            problems.append(f"[{size}] {name}: HTTP {r['status']}")
+        if r["statements"] > budgets[name]:
+            problems.append(f"[{size}] {name}: {r['statements']} statements > budget {budgets[name]}")
+        base = (baselines or {}).get(size, {}).get(name)
+        if base is not None and r["median_ms"] > base * (1 + tolerance) + slack_ms:
+            problems.append(f"[{size}] {name}: {r['median_ms']:.2f} ms > baseline {base:.2f} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, as a fraction")
+    parser.add_argument("--slack-ms", type=float, default=1.0)
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+
+    problems = []
+    for size in args.sizes:
+        started = time.perf_counter()
+        app, ctx = build(size)
+        print(f"\n== {size}: {SIZES[size]} (seeded in {time.perf_counter() - started:.1f}s)")
+        results = measure(app, ctx, repeat=args.repeat)
+        print(f"{'route':<38} {'median ms':>10} {'stmts':>6} {'budget':>7} {'baseline':>9}")
+        for route in ROUTES:
+            r = results[route.name]
+            base = baselines.get(size, {}).get(route.name)
+            print(f"{route.name:<38} {r['median_ms']:>10.2f} {r['statements']:>6} {route.budget:>7} "
+                  f"{'' if base is None else f'{base:.2f}':>9}")
+        if args.update_baselines:
+            baselines[size] = {name: round(r["median_ms"], 3) for name, r in results.items()}
+        else:
+            problems += check(size, results, baselines, args.tolerance, args.slack_ms)
+
+    if args.update_baselines:
+        with open(BASELINES, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbaselines written to {os.path.relpath(BASELINES, ROOT)}")
+        return
+    if problems:
+        print("\nFAILURES:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("\nall routes within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,10 @@
-from app import create_app, db
+from app import create_app
 
+# config profile from APP_CONFIG (app/config.py). Nothing touches the
+# database at import: create tables once with `flask --app run init-db`.
+# This is the development server; production runs serve.py (gevent).
 app = create_app()
 
-from app.models import User, Issue, Comment
-
-with app.app_context():
-    db.create_all()
-
 
 if __name__ == "__main__":
     app.run(debug=True)
-    
\ No newline at end of file
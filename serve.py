@@ -0,0 +1,72 @@
+"""Production entrypoint: the app on gevent's WSGI server.
+
+One process serves many concurrent connections, each on a greenlet from a
+bounded pool; mostly idle ones (keep-alive clients, /events streams) cost a
+greenlet, not a thread. Once the pool is full, new connections wait in the
+listen backlog instead of piling more work onto the process. Run one per CPU
+behind a load balancer.
+
+    python serve.py --port 8000 --pool-size 2000
+
+Defaults (all overridable from the environment):
+    APP_CONFIG=production        config profile (app/config.py)
+    DB_ENGINE_PROFILE=gevent     capped connection pool (app/database.py)
+    BCRYPT_OFFLOAD=thread        bcrypt on native threads (app/hashing.py)
+    GEVENT_POOL_SIZE=2000        concurrent connections per process
+
+Create the tables first with `flask --app run init-db`.
+"""
+# must run before anything imports socket, ssl, threading or time
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import logging
+import os
+import signal
+
+import gevent
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+
+DEFAULTS = {
+    "APP_CONFIG": "production",
+    "DB_ENGINE_PROFILE": "gevent",
+    "BCRYPT_OFFLOAD": "thread",
+}
+
+
+def build_server(host, port, pool_size, access_log=False):
+    for key, value in DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    from app import create_app
+
+    app = create_app()
+    return WSGIServer(
+        (host, port), app,
+        spawn=Pool(pool_size),
+        log=logging.getLogger("serve.access") if access_log else None,
+        error_log=logging.getLogger("serve.error"),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--pool-size", type=int, default=int(os.getenv("GEVENT_POOL_SIZE", 2000)))
+    parser.add_argument("--access-log", action="store_true", default=os.getenv("ACCESS_LOG") == "True")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = build_server(args.host, args.port, args.pool_size, args.access_log)
+    # finish in-flight requests (up to 10s) on SIGTERM/SIGINT
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        gevent.signal_handler(sig, server.stop, 10)
+    logging.getLogger("serve").info("serving on %s:%s (pool %d)", args.host, args.port, args.pool_size)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
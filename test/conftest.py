@@ -20,3 +20,34 @@ def client():
             db.drop_all()
 
 
+
+
+@pytest.fixture
+def query_counter(client):
+    """Counts SQL statements issued while the returned counter is active."""
+    from sqlalchemy import event
+
+    class Counter:
+        def __init__(self):
+            self.count = 0
+            self.active = False
+
+        def __enter__(self):
+            self.count = 0
+            self.active = True
+            return self
+
+        def __exit__(self, *exc):
+            self.active = False
+
+    counter = Counter()
+
+    def before_cursor_execute(*args):
+        if counter.active:
+            counter.count += 1
+
+    with client.application.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield counter
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
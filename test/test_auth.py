@@ -36,3 +36,30 @@ def test_login_user(client):
     assert response.status_code == 200
     data = response.get_json()
     assert "access_token" in data
+
+
+def test_me_is_served_from_identity_cache(client, query_counter):
+    client.post("/api/auth/register", json={
+        "username": "cacheduser",
+        "email": "cached@example.com",
+        "password": "securepass"
+    })
+    token = client.post("/api/auth/login", json={
+        "email": "cached@example.com",
+        "password": "securepass"
+    }).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/auth/me", headers=headers).get_json()["username"] == "cacheduser"
+    with query_counter as counter:
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+    assert counter.count == 0
+
+    # a write to the user drops the cached record
+    from app import db
+    from app.models import User
+    with client.application.app_context():
+        user = User.query.filter_by(email="cached@example.com").first()
+        user.username = "renamed"
+        db.session.commit()
+    assert client.get("/api/auth/me", headers=headers).get_json()["username"] == "renamed"
@@ -0,0 +1,48 @@
+from app.models import Issue
+from test_issues import auth_headers, seed_team
+
+
+def test_listing_etag_answers_304_until_the_team_changes(client, query_counter):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 3)
+    url = f"/api/issues/teams/{team_id}?per_page=2"
+
+    first = client.get(url, headers=headers)
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+
+    with query_counter as counter:
+        again = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert counter.count == 1  # just the version stamp
+
+    # another page of the same team has its own etag
+    assert client.get(url + "&page=2", headers=headers).headers["ETag"] != etag
+
+    client.post("/api/issues/teams/create", json={
+        "title": "new", "description": "d", "team_id": team_id
+    }, headers=headers)
+    changed = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_issue_etag_changes_on_comment_and_toggle(client):
+    headers = auth_headers(client)
+    seed_team(client, 1)
+    with client.application.app_context():
+        issue_id = Issue.query.first().id
+    url = f"/api/issues/teams/issue_detail/{issue_id}"
+
+    etag = client.get(url, headers=headers).headers["ETag"]
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    client.post(f"/api/issues/issue_detail/{issue_id}/comment", json={"content": "hi"}, headers=headers)
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    client.post(f"/api/issues/{issue_id}/toggle", headers=headers)
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 200
+
+    assert client.get("/api/issues/teams/issue_detail/9999", headers=headers).status_code == 404
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from sqlalchemy import inspect
+
+from app import create_app, db, google
+
+
+def test_profiles_apply_on_top_of_the_environment(monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "from-env")
+    app = create_app("testing")
+    assert app.config["CONFIG_PROFILE"] == "testing"
+    assert app.config["SQLALCHEMY_DATABASE_URI"] == "sqlite:///:memory:"
+    assert app.config["SECRET_KEY"] == "from-env"  # only filled in when unset
+    assert app.config["RATELIMIT_ENABLED"] is False
+
+    monkeypatch.setenv("APP_CONFIG", "testing")
+    assert create_app().config["CONFIG_PROFILE"] == "testing"
+
+    with pytest.raises(ValueError):
+        create_app("staging")
+
+
+def test_production_requires_secrets(monkeypatch):
+    monkeypatch.delenv("JWT_SECRET_KEY", raising=False)
+    monkeypatch.setenv("SECRET_KEY", "s")
+    with pytest.raises(RuntimeError, match="JWT_SECRET_KEY"):
+        create_app("production")
+
+
+def test_google_client_is_registered_on_first_use():
+    app = create_app("testing")
+    assert "google_oauth" not in app.extensions
+    with app.test_request_context():
+        assert google.name == "google"
+        assert app.extensions["google_oauth"] is google._get_current_object()
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'issues.db'}")
+    monkeypatch.setenv("RATELIMIT_STORAGE_URI", "memory://")
+    monkeypatch.setenv("SECRET_KEY", "test")
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-jwt")
+    app = create_app("development")
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_init_db_creates_the_schema(file_app):
+    with file_app.app_context():
+        assert inspect(db.engine).get_table_names() == []
+    result = file_app.test_cli_runner().invoke(args=["init-db"])
+    assert result.exit_code == 0, result.output
+    with file_app.app_context():
+        assert {"user", "issue", "team_event"} <= set(inspect(db.engine).get_table_names())
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_child_gets_a_fresh_pool(file_app):
+    with file_app.app_context():
+        engine = db.engine
+        engine.connect().close()  # leave a pooled connection behind
+        parent_pool = id(engine.pool)
+        pid = os.fork()
+        if pid == 0:  # child: never return into pytest
+            os._exit(0 if id(engine.pool) != parent_pool and engine.pool.checkedin() == 0 else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert id(engine.pool) == parent_pool
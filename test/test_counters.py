@@ -0,0 +1,85 @@
+from app import counters, db
+from app.models import Issue, TeamIssueCounts
+from test_issues import auth_headers, seed_team
+
+
+def team_counts(client, headers, team_id):
+    teams = client.get("/api/issues/teams", headers=headers).get_json()["teams"]
+    return next(t["issue_counts"] for t in teams if t["id"] == team_id)
+
+
+def test_counters_follow_creates_and_transitions(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 0)
+    assert team_counts(client, headers, team_id) == {"open": 0, "working": 0, "resolved": 0}
+
+    issue_id = client.post("/api/issues/teams/create", json={
+        "title": "t", "description": "d", "team_id": team_id
+    }, headers=headers).get_json()["issue"]["id"]
+    client.post("/api/issues/teams/create/bulk", json=[
+        {"title": f"b{i}", "description": "d", "team_id": team_id} for i in range(3)
+    ], headers=headers)
+    assert team_counts(client, headers, team_id) == {"open": 4, "working": 0, "resolved": 0}
+
+    client.post(f"/api/issues/{issue_id}/toggle", headers=headers)
+    client.post(f"/api/issues/{issue_id}/toggle", headers=headers)
+    assert team_counts(client, headers, team_id) == {"open": 3, "working": 0, "resolved": 1}
+
+    client.post(f"/api/issues/teams/{team_id}/status/bulk",
+                json={"status": "working", "filter": {"status": "open"}}, headers=headers)
+    assert team_counts(client, headers, team_id) == {"open": 0, "working": 3, "resolved": 1}
+
+
+def test_repair_counters_fixes_drift(client):
+    auth_headers(client)
+    team_id = seed_team(client, 5, statuses=("open", "resolved"))  # written without counters
+
+    runner = client.application.test_cli_runner()
+    result = runner.invoke(args=["repair-counters"])
+    assert f"1 team(s): {team_id}" in result.output
+    with client.application.app_context():
+        assert db.session.get(TeamIssueCounts, team_id).as_dict() == {"open": 3, "working": 0, "resolved": 2}
+
+    assert "consistent" in runner.invoke(args=["repair-counters"]).output
+
+
+def test_counters_are_deleted_with_team(client):
+    auth_headers(client)
+    team_id = seed_team(client, 2)
+    client.application.test_cli_runner().invoke(args=["repair-counters"])
+
+    with client.application.app_context():
+        from app.models import Team
+        db.session.delete(db.session.get(Team, team_id))
+        db.session.commit()
+        assert db.session.get(TeamIssueCounts, team_id) is None
+        assert Issue.query.count() == 0
+
+
+def test_first_counters_write_is_a_single_upsert(client, query_counter):
+    auth_headers(client)
+    team_id = seed_team(client, 2)
+    with client.application.app_context():
+        with query_counter as counter:
+            counters.recount(team_id)
+        assert counter.count == 2  # the COUNT and the upsert, no UPDATE-then-INSERT
+        counters.recount(team_id)
+        db.session.commit()
+        rows = TeamIssueCounts.query.filter_by(team_id=team_id).all()
+        assert [(r.open, r.working, r.resolved) for r in rows] == [(2, 0, 0)]
+
+
+def test_toggling_an_unknown_status_recounts(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 2, statuses=("open", "closed"))
+    with client.application.app_context():
+        counters.recount(team_id)
+        db.session.commit()
+        closed_id = Issue.query.filter_by(status="closed").one().id
+    assert team_counts(client, headers, team_id) == {"open": 1, "working": 0, "resolved": 0}
+
+    response = client.post(f"/api/issues/{closed_id}/toggle", headers=headers)
+    assert response.get_json()["issue"]["status"] == "open"
+    assert team_counts(client, headers, team_id) == {"open": 2, "working": 0, "resolved": 0}
+    with client.application.app_context():
+        assert counters.repair() == []
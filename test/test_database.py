@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import event, text
+
+from app import create_app, db
+from app.database import read_engine
+from test_issues import auth_headers, seed_team
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'issues.db'}")
+    monkeypatch.setenv("DB_ENGINE_PROFILE", "development")
+    monkeypatch.setenv("DB_READ_ROUTING", "True")
+    monkeypatch.setenv("RATELIMIT_ENABLED", "False")
+    monkeypatch.setenv("BCRYPT_OFFLOAD", "inline")
+    monkeypatch.setenv("BCRYPT_LOG_ROUNDS", "4")
+    monkeypatch.setenv("SECRET_KEY", "test")
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-jwt")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+        db.engine.dispose()
+        read_engine().dispose()
+
+
+def test_sqlite_pragmas_applied_on_connect(file_app):
+    with file_app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert db.engine.pool.size() == 5
+
+
+def test_api_gets_use_read_bind_and_writes_use_primary(file_app):
+    client = file_app.test_client()
+    client.environ_base["HTTP_X_FORWARDED_PROTO"] = "https"  # Talisman forces https outside testing
+    headers = auth_headers(client)
+    team_id = seed_team(client, 3)
+
+    with file_app.app_context():
+        primary, replica = db.engine, read_engine()
+    seen = []
+    listeners = [
+        (primary, lambda conn, cursor, statement, *args: seen.append(("primary", statement))),
+        (replica, lambda conn, cursor, statement, *args: seen.append(("replica", statement))),
+    ]
+    for engine, fn in listeners:
+        event.listen(engine, "before_cursor_execute", fn)
+    try:
+        response = client.get(f"/api/issues/teams/{team_id}", headers=headers)
+        assert response.status_code == 200
+        assert len(response.get_json()["issues"]) == 3
+        # the revocation check reads the blocklist from the primary on purpose
+        reads = [bind for bind, statement in seen if "token_blocklist" not in statement]
+        assert reads and set(reads) == {"replica"}
+
+        seen.clear()
+        response = client.post("/api/issues/teams/create", headers=headers,
+                               json={"title": "new", "description": "write", "team_id": team_id})
+        assert response.status_code == 201
+        binds = {bind for bind, statement in seen}
+        assert binds == {"primary"}
+    finally:
+        for engine, fn in listeners:
+            event.remove(engine, "before_cursor_execute", fn)
@@ -0,0 +1,79 @@
+from sqlalchemy import func, select, text
+
+from app import counters, db
+from app.datagen import zipf_shares
+from app.models import Comment, Issue, TeamMember, User
+
+
+def generated_rows(client, seed):
+    runner = client.application.test_cli_runner()
+    result = runner.invoke(args=["generate-data", "--users", "40", "--teams", "8", "--issues", "600",
+                                 "--comments-per-issue", "0.5", "--skew", "1.2", "--seed", str(seed),
+                                 "--batch-size", "100", "--commit-every", "250"])
+    assert result.exit_code == 0, result.output
+    with client.application.app_context():
+        return [tuple(row) for row in db.session.execute(
+            select(Issue.id, Issue.team_id, Issue.user_id, Issue.status, Issue.created_at).order_by(Issue.id)
+        )]
+
+
+def test_zipf_shares_sum_and_skew():
+    shares = zipf_shares(1000, 10, 1.0)
+    assert sum(shares) == 1000
+    assert shares == sorted(shares, reverse=True) and shares[0] > 5 * shares[-1]
+    assert zipf_shares(100, 4, 0) == [25, 25, 25, 25]
+    assert min(zipf_shares(12, 10, 2.0, minimum=1)) == 1
+
+
+def test_generate_data_is_skewed_consistent_and_searchable(client):
+    rows = generated_rows(client, seed=7)
+    assert len(rows) == 600
+
+    with client.application.app_context():
+        assert db.session.scalar(select(func.count(User.id))) == 40
+        per_team = dict(db.session.execute(
+            select(Issue.team_id, func.count()).group_by(Issue.team_id)
+        ).all())
+        assert max(per_team.values()) > 5 * min(per_team.values())
+        # every issue's author is a member of its team
+        orphans = db.session.scalar(
+            select(func.count()).select_from(Issue).outerjoin(
+                TeamMember, (TeamMember.team_id == Issue.team_id) & (TeamMember.user_id == Issue.user_id)
+            ).where(TeamMember.id.is_(None))
+        )
+        assert orphans == 0
+        assert db.session.scalar(select(func.count(Comment.id))) > 0
+        assert counters.repair() == []
+        assert counters.repair_comment_counts() == 0
+        # the first issue's author is a member of its team
+        email = db.session.get(User, rows[0][2]).email
+
+    response = client.post("/api/auth/login", json={"email": email, "password": "password"})
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    team_id = rows[0][1]
+    found = client.get(f"/api/issues/teams/{team_id}/search?q=generated", headers=headers).get_json()
+    assert found["issues"]
+
+
+def test_generate_data_is_deterministic(client):
+    first = generated_rows(client, seed=3)
+    with client.application.app_context():
+        db.drop_all()
+        db.create_all()
+    assert generated_rows(client, seed=3) == first
+
+
+def test_failed_generate_data_restores_search_triggers(client, monkeypatch):
+    from app import datagen
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("load failed")
+
+    monkeypatch.setattr(datagen, "generate", fail)
+    result = client.application.test_cli_runner().invoke(args=["generate-data", "--users", "2", "--teams", "1"])
+    assert isinstance(result.exception, RuntimeError)
+    with client.application.app_context():
+        triggers = set(db.session.scalars(select(text("name")).select_from(text("sqlite_master"))
+                                          .where(text("type = 'trigger'"))))
+    assert {"issue_fts_ai", "comment_fts_ai"} <= triggers
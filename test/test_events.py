@@ -0,0 +1,163 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.models import TeamEvent
+
+from test_issues import auth_headers, seed_team
+
+
+@pytest.fixture
+def hub(client):
+    hub = client.application.extensions["event_hub"]
+    # drive the dispatcher by hand; the background thread stays asleep
+    hub.poll_seconds = 3600
+    hub.keepalive_seconds = 0.05
+    return hub
+
+
+def frames(response):
+    chunks = iter(response.response)
+
+    def next_frame():
+        chunk = next(chunks)
+        return chunk.decode() if isinstance(chunk, bytes) else chunk
+
+    return next_frame
+
+
+def parse(frame):
+    fields = dict(line.split(": ", 1) for line in frame.strip().splitlines())
+    return int(fields["id"]), fields["event"], json.loads(fields["data"])
+
+
+def test_team_events_stream_issue_changes(client, hub):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 1)
+
+    response = client.get(f"/api/issues/teams/{team_id}/events", headers=headers, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    next_frame = frames(response)
+    assert next_frame().startswith("retry:")
+
+    created = client.post("/api/issues/teams/create", headers=headers,
+                          json={"title": "live", "description": "pushed", "team_id": team_id})
+    issue_id = created.get_json()["issue"]["id"]
+    client.post(f"/api/issues/{issue_id}/toggle", headers=headers)
+    client.post(f"/api/issues/issue_detail/{issue_id}/comment", headers=headers, json={"content": "hi"})
+    assert hub.poll() == 3
+
+    _, kind, data = parse(next_frame())
+    assert (kind, data["issue_id"], data["title"], data["status"]) == ("issue_created", issue_id, "live", "open")
+    _, kind, data = parse(next_frame())
+    assert (kind, data) == ("status_changed", {"issue_id": issue_id, "status": "working"})
+    _, kind, data = parse(next_frame())
+    assert kind == "comment_added" and data["issue_id"] == issue_id
+    # idle streams get comment frames so proxies keep them open
+    assert next_frame() == ": keepalive\n\n"
+
+    response.close()
+    assert hub.subscriber_count() == 0
+
+
+def test_team_events_replay_after_last_event_id(client, hub):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 1)
+    ids = [client.post("/api/issues/teams/create", headers=headers,
+                       json={"title": f"t{i}", "description": "d", "team_id": team_id}).get_json()["issue"]["id"]
+           for i in range(3)]
+
+    first = client.get(f"/api/issues/teams/{team_id}/events", headers=headers, buffered=False)
+    next_frame = frames(first)
+    next_frame()
+    first.close()
+
+    response = client.get(f"/api/issues/teams/{team_id}/events",
+                          headers={**headers, "Last-Event-ID": "1"}, buffered=False)
+    next_frame = frames(response)
+    next_frame()  # retry
+    replayed = [parse(next_frame()) for _ in range(2)]
+    assert [data["issue_id"] for _, _, data in replayed] == ids[1:]
+    response.close()
+
+
+def test_bulk_writes_publish_one_event_per_team(client, hub):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 0)
+
+    response = client.get(f"/api/issues/teams/{team_id}/events", headers=headers, buffered=False)
+    next_frame = frames(response)
+    next_frame()  # retry
+
+    ids = client.post("/api/issues/teams/create/bulk", headers=headers, json=[
+        {"title": f"b{i}", "description": "d", "team_id": team_id} for i in range(3)
+    ]).get_json()["ids"]
+    client.post(f"/api/issues/teams/{team_id}/status/bulk", headers=headers,
+                json={"status": "resolved", "issue_ids": ids[:2]})
+    assert hub.poll() == 2
+
+    _, kind, data = parse(next_frame())
+    assert (kind, data["issue_ids"], data["status"]) == ("issue_created", ids, "open")
+    _, kind, data = parse(next_frame())
+    assert (kind, data) == ("status_changed", {"issue_ids": ids[:2], "status": "resolved"})
+    response.close()
+
+
+def test_team_events_require_membership(client, hub):
+    owner = auth_headers(client)
+    team_id = seed_team(client, 1)
+    outsider = auth_headers(client, username="outsider", email="outsider@example.com")
+
+    assert client.get(f"/api/issues/teams/{team_id}/events", headers=outsider).status_code == 403
+    # EventSource can't send headers, so the token may come in the query string
+    response = client.get(f"/api/issues/teams/{team_id}/events?jwt={owner['Authorization'][7:]}",
+                          buffered=False)
+    assert response.status_code == 200
+    response.close()
+
+
+def test_lagging_subscriber_is_cut_off(client, hub):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 1)
+    hub.queue_size = 2
+
+    response = client.get(f"/api/issues/teams/{team_id}/events", headers=headers, buffered=False)
+    next_frame = frames(response)
+    next_frame()
+    for i in range(3):
+        client.post("/api/issues/teams/create", headers=headers,
+                    json={"title": f"t{i}", "description": "d", "team_id": team_id})
+    hub.poll()
+
+    assert hub.subscriber_count() == 0
+    # whatever was buffered is flushed, then the stream ends; the client reconnects
+    with pytest.raises(StopIteration):
+        for _ in range(3):
+            next_frame()
+
+
+def test_old_events_are_pruned_without_subscribers(client, hub):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 0)
+    old = datetime.now(timezone.utc) - timedelta(seconds=hub.retention_seconds + 60)
+    with client.application.app_context():
+        db.session.add_all([TeamEvent(team_id=team_id, kind="issue_created", payload="{}", created_at=old)
+                            for _ in range(2)])
+        db.session.commit()
+    assert hub.subscriber_count() == 0
+
+    hub._next_prune = 0.0  # due now
+    client.post("/api/issues/teams/create", headers=headers,
+                json={"title": "t", "description": "d", "team_id": team_id})
+    hub._pruner.join(5)
+    with client.application.app_context():
+        assert [e.kind for e in TeamEvent.query.all()] == ["issue_created"]  # just the new one
+
+    with client.application.app_context():
+        db.session.add(TeamEvent(team_id=team_id, kind="issue_created", payload="{}", created_at=old))
+        db.session.commit()
+    result = client.application.test_cli_runner().invoke(args=["prune-events"])
+    assert "Pruned 1 expired team events." in result.output
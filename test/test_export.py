@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+
+from app import db
+from app.models import Comment, Issue
+from test_issues import auth_headers, seed_team
+
+
+def add_comment(client, team_id):
+    with client.application.app_context():
+        issue = Issue.query.filter_by(team_id=team_id).order_by(Issue.id).first()
+        db.session.add(Comment(content="first!", user_id=issue.user_id, issue_id=issue.id))
+        db.session.commit()
+        return issue.id
+
+
+def test_export_ndjson_streams_every_issue(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 25)
+    first_id = add_comment(client, team_id)
+
+    response = client.get(f"/api/issues/teams/{team_id}/export?comments=1", headers=headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 25
+    assert rows[0]["id"] == first_id
+    assert rows[0]["comments"][0]["content"] == "first!"
+    assert rows[1]["comments"] == []
+    assert rows[0]["username"] == "issueuser"
+
+
+def test_export_csv(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 3)
+
+    response = client.get(f"/api/issues/teams/{team_id}/export?format=csv", headers=headers)
+    assert response.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [r["title"] for r in rows] == ["issue 0", "issue 1", "issue 2"]
+
+    assert client.get(f"/api/issues/teams/{team_id}/export?format=xml", headers=headers).status_code == 400
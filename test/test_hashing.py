@@ -0,0 +1,82 @@
+import threading
+
+from app.hashing import HasherBusy, PasswordHasher
+
+
+def test_process_pool_hashes_compatible_with_inline():
+    pooled = PasswordHasher(rounds=4, offload="process", pool_size=1)
+    inline = PasswordHasher(rounds=4, offload="inline")
+
+    pw_hash = pooled.hash("s3cret")
+    assert pw_hash.startswith("$2b$04$")
+    assert inline.check(pw_hash, "s3cret")
+    assert pooled.check(inline.hash("s3cret"), "s3cret")
+    assert not pooled.check(pw_hash, "wrong")
+
+
+def test_saturated_pool_rejects_instead_of_queueing():
+    hasher = PasswordHasher(rounds=4, offload="process", pool_size=1, queue_size=0)
+    hasher._slots.acquire()  # simulate a job occupying the only slot
+    try:
+        try:
+            hasher.hash("s3cret")
+        except HasherBusy as e:
+            assert e.code == 503
+        else:
+            raise AssertionError("expected HasherBusy")
+        assert hasher.busy_rejections == 1
+    finally:
+        hasher._slots.release()
+
+
+def test_login_returns_503_with_retry_after_when_busy(client):
+    client.post("/api/auth/register", json={
+        "username": "busyuser", "email": "busy@example.com", "password": "securepass"
+    })
+    hasher = client.application.extensions["password_hasher"]
+    hasher.offload, hasher.queue_size = "process", 0
+    hasher._slots = threading.BoundedSemaphore(1)
+    hasher._slots.acquire()
+
+    response = client.post("/api/auth/login", json={"email": "busy@example.com", "password": "securepass"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_thread_offload_hashes_compatible_with_inline():
+    threaded = PasswordHasher(rounds=4, offload="thread", pool_size=1)
+    inline = PasswordHasher(rounds=4, offload="inline")
+
+    assert inline.check(threaded.hash("s3cret"), "s3cret")
+    assert threaded.check(inline.hash("s3cret"), "s3cret")
+
+
+GEVENT_PROBE = """
+from gevent import monkey; monkey.patch_all()
+import gevent
+from app.hashing import PasswordHasher
+
+hasher = PasswordHasher(rounds=11, offload="thread", pool_size=1)
+ticks = []
+def ticker():
+    while True:
+        ticks.append(1)
+        gevent.sleep(0.005)
+background = gevent.spawn(ticker)
+gevent.sleep(0)
+assert hasher.check(hasher.hash("s3cret"), "s3cret")
+background.kill()
+print(len(ticks))
+"""
+
+
+def test_thread_offload_keeps_the_gevent_loop_running():
+    import os
+    import subprocess
+    import sys
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", GEVENT_PROBE], cwd=root, capture_output=True,
+                         text=True, timeout=60, check=True).stdout
+    # two bcrypt runs of ~0.1s each; an event loop blocked by them would tick once or twice
+    assert int(out) > 10
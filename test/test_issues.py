@@ -0,0 +1,284 @@
+from datetime import datetime, timedelta
+
+from app import counters, db
+from app.models import Issue, Team, TeamMember, User
+
+
+def auth_headers(client, username="issueuser", email="issue@example.com"):
+    client.post("/api/auth/register", json={
+        "username": username,
+        "email": email,
+        "password": "securepass"
+    })
+    response = client.post("/api/auth/login", json={"email": email, "password": "securepass"})
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+def seed_team(client, n_issues, statuses=("open",)):
+    with client.application.app_context():
+        user = User.query.first()
+        team = Team(name="core")
+        db.session.add(team)
+        db.session.flush()
+        db.session.add(TeamMember(user_id=user.id, team_id=team.id, role="manager"))
+        base = datetime(2025, 1, 1)
+        for i in range(n_issues):
+            db.session.add(Issue(
+                title=f"issue {i}",
+                description="seeded",
+                status=statuses[i % len(statuses)],
+                user_id=user.id,
+                team_id=team.id,
+                # every pair shares a timestamp so the id tiebreak is exercised
+                created_at=base + timedelta(minutes=i // 2),
+            ))
+        db.session.commit()
+        return team.id
+
+
+def test_cursor_pagination_walks_all_issues(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 25)
+
+    seen = []
+    response = client.get(f"/api/issues/teams/{team_id}?cursor=1&per_page=10", headers=headers)
+    data = response.get_json()
+    assert response.status_code == 200
+    assert "total" not in data
+    assert data["prev_cursor"] is None
+    seen += [i["issue_id"] for i in data["issues"]]
+
+    while data["next_cursor"]:
+        response = client.get(
+            f"/api/issues/teams/{team_id}?per_page=10&after={data['next_cursor']}", headers=headers
+        )
+        data = response.get_json()
+        seen += [i["issue_id"] for i in data["issues"]]
+
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    # newest first: ids were inserted in created_at order
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_cursor_pagination_before_returns_previous_page(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 12)
+
+    first = client.get(f"/api/issues/teams/{team_id}?cursor=1&per_page=5", headers=headers).get_json()
+    second = client.get(
+        f"/api/issues/teams/{team_id}?per_page=5&after={first['next_cursor']}", headers=headers
+    ).get_json()
+    back = client.get(
+        f"/api/issues/teams/{team_id}?per_page=5&before={second['prev_cursor']}", headers=headers
+    ).get_json()
+
+    assert [i["issue_id"] for i in back["issues"]] == [i["issue_id"] for i in first["issues"]]
+    assert back["prev_cursor"] is None
+
+
+def test_cursor_pagination_status_filter_and_total(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 9, statuses=("open", "working", "resolved"))
+
+    response = client.get(
+        f"/api/issues/teams/{team_id}?cursor=1&status=working&include_total=1", headers=headers
+    )
+    data = response.get_json()
+    assert data["total"] == 3
+    assert {i["status"] for i in data["issues"]} == {"working"}
+    assert data["next_cursor"] is None
+
+
+def test_cursor_pagination_rejects_bad_cursor(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 1)
+
+    response = client.get(f"/api/issues/teams/{team_id}?after=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+
+
+def test_bulk_create_inserts_all_in_one_transaction(client, query_counter):
+    auth_headers(client)
+    team_id = seed_team(client, 0)
+    headers = auth_headers(client)  # a token that carries the new membership
+
+    payload = {"issues": [{"title": f"bulk {i}", "description": "d", "team_id": team_id} for i in range(50)]}
+    with query_counter as counter:
+        response = client.post("/api/issues/teams/create/bulk", json=payload, headers=headers)
+    assert response.status_code == 201
+    ids = response.get_json()["ids"]
+    assert len(ids) == 50
+    # the insert is a single batched statement, not one per issue
+    assert counter.count < 10
+
+    with client.application.app_context():
+        assert [i.title for i in Issue.query.order_by(Issue.id)] == [f"bulk {i}" for i in range(50)]
+
+
+def test_bulk_create_reports_per_item_errors_and_inserts_nothing(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 0)
+
+    payload = [
+        {"title": "ok", "description": "d", "team_id": team_id},
+        {"title": "missing description", "team_id": team_id},
+        {"title": "bad team", "description": "d", "team_id": 9999},
+    ]
+    response = client.post("/api/issues/teams/create/bulk", json=payload, headers=headers)
+    assert response.status_code == 400
+    assert [e["index"] for e in response.get_json()["errors"]] == [1, 2]
+    with client.application.app_context():
+        assert Issue.query.count() == 0
+
+
+def test_bulk_create_rejects_non_string_fields(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 0)
+
+    payload = [
+        {"title": "ok", "description": "d", "team_id": team_id},
+        {"title": 5, "description": "d", "team_id": team_id},
+        {"title": "t", "description": {"a": 1}, "team_id": team_id},
+    ]
+    response = client.post("/api/issues/teams/create/bulk", json=payload, headers=headers)
+    assert response.status_code == 400
+    assert [e["index"] for e in response.get_json()["errors"]] == [1, 2]
+    with client.application.app_context():
+        assert Issue.query.count() == 0
+
+
+def test_bulk_create_enforces_batch_cap(client):
+    headers = auth_headers(client)
+    client.application.config["BULK_ISSUE_MAX"] = 2
+    payload = [{"title": "t", "description": "d", "team_id": 1}] * 3
+    response = client.post("/api/issues/teams/create/bulk", json=payload, headers=headers)
+    assert response.status_code == 413
+
+
+def test_toggle_status_cycles_in_one_statement(client, query_counter):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 1)
+    with client.application.app_context():
+        issue_id = Issue.query.first().id
+
+    seen = []
+    for _ in range(3):
+        with query_counter as counter:
+            response = client.post(f"/api/issues/{issue_id}/toggle", headers=headers)
+        seen.append(response.get_json()["issue"]["status"])
+    assert seen == ["working", "resolved", "open"]
+    # the issue's team for the membership check, the status UPDATE itself
+    # plus the team stamp, counter bookkeeping and the team_event row for
+    # live subscribers
+    assert counter.count <= 5
+
+    assert client.post("/api/issues/9999/toggle", headers=headers).status_code == 404
+
+
+def test_bulk_status_by_ids_and_by_filter(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 6, statuses=("open", "working"))
+    with client.application.app_context():
+        ids = [i.id for i in Issue.query.order_by(Issue.id)]
+
+    url = f"/api/issues/teams/{team_id}/status/bulk"
+    response = client.post(url, json={"status": "resolved", "issue_ids": ids[:2]}, headers=headers)
+    assert response.get_json()["issue_ids"] == ids[:2]
+
+    response = client.post(url, json={"status": "resolved", "filter": {"status": "open"}}, headers=headers)
+    # ids[0] was open but is already resolved; ids[2] and ids[4] are still open
+    assert response.get_json()["issue_ids"] == [ids[2], ids[4]]
+
+    with client.application.app_context():
+        statuses = [i.status for i in Issue.query.order_by(Issue.id)]
+    assert statuses == ["resolved", "resolved", "resolved", "working", "resolved", "working"]
+
+    assert client.post(url, json={"status": "closed", "issue_ids": ids}, headers=headers).status_code == 400
+    assert client.post(url, json={"status": "open"}, headers=headers).status_code == 400
+    assert client.post(url, json={"status": "open", "filter": "x"}, headers=headers).status_code == 400
+    assert client.post(url, json=["open"], headers=headers).status_code == 400
+
+
+def test_listing_and_detail_serialize_projected_rows_with_iso_timestamps(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 3)
+
+    response = client.get(f"/api/issues/teams/{team_id}?per_page=2", headers=headers)
+    listed = response.get_json()["issues"]
+    assert list(listed[0]) == ["issue_id", "title", "description", "status", "user_id", "username",
+                               "created_at", "comment_count"]
+    assert listed[0]["created_at"] == "2025-01-01T00:01:00"
+    assert listed[0]["username"] == "issueuser"
+
+    issue_id = listed[0]["issue_id"]
+    client.post(f"/api/issues/issue_detail/{issue_id}/comment", json={"content": "hi"}, headers=headers)
+    detail = client.get(f"/api/issues/teams/issue_detail/{issue_id}", headers=headers).get_json()
+    assert detail["author"] == "issueuser" and detail["team_id"] == team_id
+    assert detail["comment_count"] == 1
+    assert [c["content"] for c in detail["comments"]] == ["hi"]
+    assert detail["comments"][0]["author"] == "issueuser"
+
+    teams = client.get("/api/issues/teams", headers=headers).get_json()["teams"]
+    assert teams == [{"id": team_id, "name": "core", "role": "manager", "joined_at": teams[0]["joined_at"],
+                      # seed_team bypasses the write path, so there's no counters row yet
+                      "issue_counts": {"open": 0, "working": 0, "resolved": 0}}]
+
+
+def test_listing_shows_new_comment_counts(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 2)
+    url = f"/api/issues/teams/{team_id}"
+    first = client.get(url, headers=headers)
+    assert [i["comment_count"] for i in first.get_json()["issues"]] == [0, 0]
+    issue_id = first.get_json()["issues"][0]["issue_id"]
+
+    client.post(f"/api/issues/issue_detail/{issue_id}/comment", json={"content": "hi"}, headers=headers)
+    # neither the cached page nor the old ETag may hide the new count
+    assert client.get(url, headers=dict(headers, **{"If-None-Match": first.headers["ETag"]})).status_code == 200
+    listed = client.get(url, headers=headers)
+    assert [i["comment_count"] for i in listed.get_json()["issues"]] == [1, 0]
+    assert listed.headers["ETag"] != first.headers["ETag"]
+
+    # a repair that rewrites counts invalidates the listing the same way
+    with client.application.app_context():
+        db.session.execute(db.update(Issue).values(comment_count=0))
+        db.session.commit()
+        assert counters.repair_comment_counts() == 1
+    assert client.get(url, headers=dict(headers, **{"If-None-Match": listed.headers["ETag"]})).status_code == 200
+
+
+def test_comments_are_paged_newest_first_and_counted(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 1)
+    client.application.config["COMMENTS_PER_PAGE"] = 2
+    with client.application.app_context():
+        issue_id = Issue.query.first().id
+
+    for i in range(5):
+        client.post(f"/api/issues/issue_detail/{issue_id}/comment", json={"content": f"c{i}"}, headers=headers)
+
+    detail = client.get(f"/api/issues/teams/issue_detail/{issue_id}", headers=headers).get_json()
+    assert detail["comment_count"] == 5
+    assert [c["content"] for c in detail["comments"]] == ["c4", "c3"]
+
+    url = f"/api/issues/issue_detail/{issue_id}/comments"
+    seen, cursor = [], detail["comments_next_cursor"]
+    while cursor:
+        body = client.get(f"{url}?after={cursor}", headers=headers).get_json()
+        seen += [c["content"] for c in body["comments"]]
+        cursor = body["next_cursor"]
+    assert seen == ["c2", "c1", "c0"]
+
+    assert client.get(f"{url}?after=garbage", headers=headers).status_code == 400
+    assert client.get("/api/issues/issue_detail/9999/comments", headers=headers).status_code == 404
+
+    listed = client.get(f"/api/issues/teams/{team_id}", headers=headers).get_json()["issues"]
+    assert listed[0]["comment_count"] == 5
+
+    # counts that drifted (e.g. rows written behind the app's back) are repaired
+    with client.application.app_context():
+        db.session.execute(db.update(Issue).values(comment_count=0))
+        db.session.commit()
+        assert counters.repair_comment_counts() == 1
+        assert db.session.get(Issue, issue_id).comment_count == 5
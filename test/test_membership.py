@@ -0,0 +1,86 @@
+from flask_jwt_extended import decode_token
+
+from app.models import Issue, Team, User
+from test_issues import auth_headers, seed_team
+
+
+def login(client, email, password="securepass"):
+    return client.post("/api/auth/login", json={"email": email, "password": password}).get_json()
+
+
+def test_tokens_carry_team_claims_and_non_members_are_refused(client):
+    auth_headers(client)
+    team_id = seed_team(client, 1)
+    outsider = auth_headers(client, username="outsider", email="outsider@example.com")
+    token = login(client, "issue@example.com")["access_token"]
+    with client.application.app_context():
+        issue_id = Issue.query.first().id
+        claims = decode_token(token)
+    assert claims["teams"] == {str(team_id): "manager"}
+
+    for url in (f"/api/issues/teams/{team_id}", f"/api/issues/teams/{team_id}/search?q=issue",
+                f"/api/issues/teams/issue_detail/{issue_id}", f"/api/issues/issue_detail/{issue_id}/comments"):
+        assert client.get(url, headers=outsider).status_code == 403, url
+    assert client.post(f"/api/issues/issue_detail/{issue_id}/comment", json={"content": "x"},
+                       headers=outsider).status_code == 403
+    assert client.post(f"/api/issues/{issue_id}/toggle", headers=outsider).status_code == 403
+    assert client.post("/api/issues/teams/create", json={"title": "t", "description": "d", "team_id": team_id},
+                       headers=outsider).status_code == 403
+    # bulk create answers other teams exactly like teams that don't exist
+    response = client.post("/api/issues/teams/create/bulk", headers=outsider, json=[
+        {"title": "t", "description": "d", "team_id": team_id},
+        {"title": "t", "description": "d", "team_id": 9999},
+    ])
+    assert response.status_code == 400
+    assert [e["error"] for e in response.get_json()["errors"]] == ["team not found"] * 2
+    with client.application.app_context():
+        assert Issue.query.count() == 1
+        assert Issue.query.first().status == "open"  # the refused toggle never ran
+
+
+def test_member_checks_cost_no_queries(client, query_counter):
+    auth_headers(client)
+    team_id = seed_team(client, 1)
+    headers = auth_headers(client)
+    url = f"/api/issues/teams/{team_id}?cursor=1"
+    client.get(url, headers=headers)
+
+    client.application.extensions["membership_cache"].clear()  # a fresh worker
+    with query_counter as counter:
+        assert client.get(url, headers=headers).status_code == 200
+    # just the team stamp (the page is in the response cache); the
+    # membership came from the token
+    assert counter.count == 1
+
+
+def test_joined_team_is_usable_before_the_token_is_refreshed(client, query_counter):
+    auth_headers(client, username="owner", email="owner@example.com")
+    auth_headers(client, username="newcomer", email="newcomer@example.com")
+    tokens = login(client, "newcomer@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    client.post("/", data={"email": "owner@example.com", "password": "securepass"})
+    client.post("/team/create", data={"name": "platform"})
+    with client.application.app_context():
+        team = Team.query.filter_by(name="platform").one()
+        team_id, invite = team.id, team.invite_code
+    url = f"/api/issues/teams/{team_id}?cursor=1"
+    assert client.get(url, headers=headers).status_code == 403
+
+    client.post("/", data={"email": "newcomer@example.com", "password": "securepass"})
+    client.post("/team/join", data={"invite_code": invite})
+
+    # the old token doesn't list the team; the bumped version sends this one
+    # request to the database, after which the cached memberships answer
+    assert client.get(url, headers=headers).status_code == 200
+    with query_counter as counter:
+        assert client.get(url, headers=headers).status_code == 200
+    assert counter.count == 1
+
+    refreshed = client.post("/api/auth/refresh",
+                            headers={"Authorization": f"Bearer {tokens['refresh_token']}"}).get_json()
+    with client.application.app_context():
+        claims = decode_token(refreshed["access_token"])
+        version = User.query.filter_by(email="newcomer@example.com").one().membership_version
+    assert claims["teams"] == {str(team_id): "member"}
+    assert claims["mv"] == version == 1
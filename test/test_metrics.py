@@ -0,0 +1,63 @@
+import re
+
+from app import create_app
+from app.metrics import Histogram
+from test_issues import auth_headers, seed_team
+
+
+def sample(text, name, **labels):
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("t_seconds", "test", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        h.observe(value, "a")
+    text = "\n".join(h.samples())
+    assert sample(text, "t_seconds_bucket", route="a", le="0.1") == 1
+    assert sample(text, "t_seconds_bucket", route="a", le="1.0") == 3
+    assert sample(text, "t_seconds_bucket", route="a", le="+Inf") == 4
+    assert sample(text, "t_seconds_count", route="a") == 4
+    assert sample(text, "t_seconds_sum", route="a") == 6.05
+
+
+def test_metrics_endpoint_reports_requests_sql_and_bcrypt(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 3)
+    client.get(f"/api/issues/teams/{team_id}", headers=headers)
+    client.get("/api/issues/teams/issue_detail/999999", headers=headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+
+    endpoint = "api_issues.api_dashboard"
+    assert sample(text, "http_requests_total", method="GET", endpoint=endpoint, status="200") == 1
+    assert sample(text, "http_requests_total", method="GET", endpoint="api_issues.get_issue", status="404") == 1
+    assert sample(text, "http_request_duration_seconds_count", method="GET", endpoint=endpoint) == 1
+    assert sample(text, "sql_statements_total", endpoint=endpoint) >= 1
+    assert sample(text, "sql_statement_seconds_total", endpoint=endpoint) > 0
+    assert sample(text, "db_pool_checkout_wait_seconds_count", engine="primary") >= 1
+    # register + login
+    assert re.search(r"^bcrypt_operations_total 2$", text, re.M)
+    assert "# TYPE http_request_duration_seconds histogram" in text
+
+
+def test_metrics_token_and_production_default(monkeypatch):
+    monkeypatch.setenv("METRICS_TOKEN", "scrape")
+    client = create_app("testing").test_client()
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape"}).status_code == 200
+
+    monkeypatch.delenv("METRICS_TOKEN")
+    monkeypatch.setenv("SECRET_KEY", "s")
+    monkeypatch.setenv("JWT_SECRET_KEY", "j")
+    monkeypatch.setenv("RATELIMIT_STORAGE_URI", "memory://")
+    app = create_app("production")
+    assert "metrics" not in app.extensions and "metrics" not in app.view_functions
+    monkeypatch.setenv("METRICS_ENABLED", "True")
+    assert "metrics" in create_app("production").view_functions
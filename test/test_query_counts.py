@@ -0,0 +1,62 @@
+from app import db
+from app.models import Comment, Issue, Team, TeamMember, User
+from test_issues import auth_headers
+
+
+def seed(client, n):
+    """One team with n issues, each issue with two comments, all by distinct authors."""
+    with client.application.app_context():
+        owner = User.query.first()
+        authors = [User(username=f"author{i}", email=f"author{i}@example.com") for i in range(n)]
+        db.session.add_all(authors)
+        teams = [Team(name=f"team{i}") for i in range(n)]
+        db.session.add_all(teams)
+        db.session.flush()
+        for team in teams:
+            db.session.add(TeamMember(user_id=owner.id, team_id=team.id))
+        issue = None
+        for author in authors:
+            issue = Issue(title="t", description="d", user_id=author.id, team_id=teams[0].id)
+            db.session.add(issue)
+            db.session.flush()
+            for commenter in authors[:2]:
+                db.session.add(Comment(content="c", user_id=commenter.id, issue_id=issue.id))
+        db.session.commit()
+        return owner.id, teams[0].id, issue.id
+
+
+def count_queries(client, query_counter, url, **kwargs):
+    with query_counter as counter:
+        response = client.get(url, **kwargs)
+    assert response.status_code == 200
+    return counter.count
+
+
+def test_api_endpoints_use_constant_queries(client, query_counter):
+    auth_headers(client)
+    _, team_id, issue_id = seed(client, 20)
+    headers = auth_headers(client)  # a token that carries the new memberships
+
+    budgets = {
+        "/api/issues/teams": 3,
+        f"/api/issues/teams/{team_id}?per_page=20": 3,
+        f"/api/issues/teams/{team_id}?cursor=1&per_page=20": 2,
+        f"/api/issues/teams/issue_detail/{issue_id}": 3,
+    }
+    for url, budget in budgets.items():
+        assert count_queries(client, query_counter, url, headers=headers) <= budget, url
+
+
+def test_web_pages_use_constant_queries(client, query_counter):
+    auth_headers(client)
+    owner_id, team_id, issue_id = seed(client, 20)
+    with client.session_transaction() as session:
+        session["user_id"] = owner_id
+
+    budgets = {
+        "/teams": 1,
+        f"/teams/{team_id}/dashboard": 1,
+        f"/issue/{issue_id}": 3,
+    }
+    for url, budget in budgets.items():
+        assert count_queries(client, query_counter, url) <= budget, url
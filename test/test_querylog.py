@@ -0,0 +1,64 @@
+import json
+import logging
+
+from app import create_app, db, querylog
+from app.models import Issue
+from test_issues import auth_headers, seed_team
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    a = querylog.fingerprint("SELECT * FROM issue WHERE id IN (?, ?, ?) AND title = 'x' LIMIT 10")
+    b = querylog.fingerprint("SELECT *  FROM issue\n WHERE id IN (?, ?) AND title = 'it''s' LIMIT 20")
+    assert a == b == "SELECT * FROM issue WHERE id IN (?...) AND title = ? LIMIT ?"
+    assert querylog.fingerprint("SELECT anon_1.id FROM t AS anon_1") == "SELECT anon_1.id FROM t AS anon_1"
+
+
+def diagnosed_client(**config):
+    app = create_app("testing")
+    app.config.update(QUERY_DIAGNOSTICS_SAMPLE_RATE=1.0, **config)
+    querylog.init_app(app)
+
+    @app.route("/_lazy_comments/<int:team_id>")
+    def lazy_comments(team_id):
+        # one lazy load of issue.comments per row: a textbook N+1
+        return {"comments": sum(len(i.comments) for i in Issue.query.filter_by(team_id=team_id))}
+
+    with app.app_context():
+        db.create_all()
+    return app.test_client()
+
+
+def records(caplog):
+    return [json.loads(r.getMessage()) for r in caplog.records if r.name == "app.querylog"]
+
+
+def test_repeated_statement_shape_is_reported(caplog):
+    client = diagnosed_client(QUERY_REPEAT_THRESHOLD=3, SLOW_QUERY_MS=10_000)
+    auth_headers(client)
+    team_id = seed_team(client, 6)
+
+    with caplog.at_level(logging.WARNING, logger="app.querylog"):
+        assert client.get(f"/_lazy_comments/{team_id}").status_code == 200
+    found = [r for r in records(caplog) if r["event"] == "n_plus_one"]
+    assert len(found) == 1
+    assert found[0]["count"] == 6 and found[0]["endpoint"] == "lazy_comments"
+    assert "FROM comment" in found[0]["fingerprint"] and "?" in found[0]["fingerprint"]
+
+    caplog.clear()
+    headers = auth_headers(client)  # the team's manager; a non-member would only get a 403
+    with caplog.at_level(logging.WARNING, logger="app.querylog"):
+        assert client.get(f"/api/issues/teams/{team_id}", headers=headers).status_code == 200
+    assert records(caplog) == []
+
+
+def test_slow_statements_logged_with_plan(caplog):
+    client = diagnosed_client(SLOW_QUERY_MS=0)
+    headers = auth_headers(client)
+    team_id = seed_team(client, 2)
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="app.querylog"):
+        client.get(f"/api/issues/teams/{team_id}", headers=headers)
+    slow = [r for r in records(caplog) if r["event"] == "slow_query"]
+    assert slow and all(r["endpoint"] == "api_issues.api_dashboard" for r in slow)
+    assert any("USING INDEX ix_issue_team_created" in " ".join(r["plan"]) for r in slow)
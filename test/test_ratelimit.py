@@ -0,0 +1,74 @@
+import pytest
+
+from app import create_app, db
+from app.ratelimit import BatchedSQLiteStorage
+
+
+def storage(tmp_path):
+    return BatchedSQLiteStorage(f"batched+sqlite:///{tmp_path / 'limits.db'}", flush_interval=3600)
+
+
+def test_workers_share_counts_after_a_flush(tmp_path):
+    a, b = storage(tmp_path), storage(tmp_path)  # two worker processes' storages
+
+    assert [a.incr("k", 60) for _ in range(3)] == [1, 2, 3]
+    # b's first hit goes straight to the shared row, which holds a's first hit
+    assert b.incr("k", 60) == 2
+    assert b.incr("k", 60) == 3
+
+    a.flush()
+    b.flush()
+    a.flush()
+    assert a.get("k") == b.get("k") == 5
+    assert a.incr("k", 60) == 6
+
+
+def test_expired_window_starts_over(tmp_path, monkeypatch):
+    import app.ratelimit as ratelimit
+
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "time", lambda: now[0])
+    s = storage(tmp_path)
+    for _ in range(4):
+        s.incr("k", 10)
+    s.flush()
+    assert s.get_expiry("k") == 1010.0
+
+    now[0] = 1011.0
+    assert s.get("k") == 0
+    assert s.incr("k", 10) == 1
+    assert s.get_expiry("k") == 1021.0
+
+    s.clear("k")
+    assert s.get("k") == 0
+
+
+@pytest.fixture
+def limited_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    monkeypatch.setenv("RATELIMIT_STORAGE_URI", f"batched+sqlite:///{tmp_path / 'limits.db'}")
+    monkeypatch.setenv("RATELIMIT_LOGIN", "3 per minute")
+    monkeypatch.setenv("BCRYPT_OFFLOAD", "inline")
+    monkeypatch.setenv("BCRYPT_LOG_ROUNDS", "4")
+    monkeypatch.setenv("SECRET_KEY", "test")
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-jwt")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+def test_login_has_its_own_limit_shared_by_api_and_web(limited_app):
+    client = limited_app.test_client()
+    client.environ_base["HTTP_X_FORWARDED_PROTO"] = "https"  # Talisman forces https outside testing
+    credentials = {"email": "nobody@example.com", "password": "wrong"}
+
+    assert client.post("/api/auth/login", json=credentials).status_code == 401
+    assert client.post("/api/auth/login", json=credentials).status_code == 401
+    assert client.post("/", data=credentials).status_code == 200  # form re-rendered
+    assert client.post("/api/auth/login", json=credentials).status_code == 429
+    assert client.post("/", data=credentials).status_code == 429
+    # showing the forms is not counted
+    assert client.get("/register").status_code == 200
@@ -0,0 +1,64 @@
+from app.cache import SQLiteBackend
+from test_issues import auth_headers, seed_team
+
+
+def stats(client, headers):
+    return client.get("/api/issues/cache/stats", headers=headers).get_json()
+
+
+def test_listing_is_cached_until_team_write(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 3)
+    url = f"/api/issues/teams/{team_id}?per_page=2"
+
+    first = client.get(url, headers=headers).get_json()
+    assert client.get(url, headers=headers).get_json() == first
+    assert stats(client, headers)["hits"] == 1
+
+    client.post("/api/issues/teams/create", json={
+        "title": "fresh", "description": "d", "team_id": team_id
+    }, headers=headers)
+    after = client.get(url, headers=headers).get_json()
+    assert after["total"] == 4
+    assert stats(client, headers)["invalidations"] == 1
+
+
+def test_bare_cursor_flag_is_not_served_the_offset_page(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 3)
+    url = f"/api/issues/teams/{team_id}"
+
+    assert "total" in client.get(url, headers=headers).get_json()
+    body = client.get(f"{url}?cursor", headers=headers).get_json()
+    assert "next_cursor" in body and "total" not in body
+
+
+def test_web_writes_invalidate_listing(client):
+    headers = auth_headers(client)
+    team_id = seed_team(client, 1)
+    url = f"/api/issues/teams/{team_id}"
+    client.get(url, headers=headers)
+
+    with client.application.app_context():
+        from app.models import User
+        user_id = User.query.first().id
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["current_team_id"] = team_id
+    client.post("/issue/create", data={"title": "from web", "description": "d"})
+
+    titles = [i["title"] for i in client.get(url, headers=headers).get_json()["issues"]]
+    assert "from web" in titles
+
+
+def test_sqlite_backend_is_shared_and_invalidates_per_team(tmp_path):
+    path = str(tmp_path / "cache.db")
+    one, two = SQLiteBackend(path), SQLiteBackend(path)
+
+    one.set(1, "page=1", "team one")
+    one.set(2, "page=1", "team two")
+    assert two.get(1, "page=1") == "team one"
+
+    two.invalidate_team(1)
+    assert one.get(1, "page=1") is None
+    assert one.get(2, "page=1") == "team two"
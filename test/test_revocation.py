@@ -0,0 +1,91 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from app import db
+from app.models import TokenBlocklist
+from app.revocation import BloomFilter, get_cache, prune_expired
+from test_issues import auth_headers
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_revoked_access_token_is_rejected(client):
+    headers = auth_headers(client)
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    assert client.delete("/api/auth/logout_access", headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+
+def test_revocation_check_skips_db_for_live_tokens(client, query_counter):
+    headers = auth_headers(client)
+    client.get("/api/auth/me", headers=headers)  # warm the caches
+
+    with query_counter as counter:
+        client.get("/api/auth/me", headers=headers)
+    # no blocklist query (and the user comes from the identity cache)
+    assert counter.count == 0
+
+
+def test_revocations_from_other_workers_are_picked_up(client):
+    headers = auth_headers(client)
+    me = client.get("/api/auth/me", headers=headers)
+    assert me.status_code == 200
+
+    with client.application.app_context():
+        from flask_jwt_extended import decode_token
+        jti = decode_token(headers["Authorization"].split()[1])["jti"]
+        # simulate another worker writing the row directly
+        db.session.add(TokenBlocklist(jti=jti, token_type="access"))
+        db.session.commit()
+        get_cache().refresh()
+
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+
+def test_prune_removes_expired_rows(client):
+    with client.application.app_context():
+        now = datetime.now(timezone.utc)
+        db.session.add(TokenBlocklist(jti="old", expires_at=now - timedelta(days=1)))
+        db.session.add(TokenBlocklist(jti="live", expires_at=now + timedelta(days=1)))
+        db.session.commit()
+
+        assert prune_expired() == 1
+        assert [t.jti for t in TokenBlocklist.query.all()] == ["live"]
+        assert get_cache().is_revoked("live")
+
+
+def test_scheduled_prune_runs_off_the_request_path(client):
+    headers = auth_headers(client)
+    with client.application.app_context():
+        db.session.add(TokenBlocklist(jti="old", expires_at=datetime.now(timezone.utc) - timedelta(days=1)))
+        db.session.commit()
+        cache = get_cache()
+        cache._next_refresh = cache._next_prune = 0  # refresh and prune are due
+        engine = db.engine
+
+    deletes = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.startswith("DELETE FROM token_blocklist"):
+            deletes.append(threading.current_thread().name)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+        cache._pruner.join(5)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert deletes == ["revocation-prune"]
+    with client.application.app_context():
+        assert TokenBlocklist.query.filter_by(jti="old").count() == 0
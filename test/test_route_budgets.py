@@ -0,0 +1,9 @@
+from bench import micro
+
+
+def test_every_route_within_its_query_budget():
+    app, ctx = micro.build("small")
+    results = micro.measure(app, ctx, repeat=2, warmup=1)
+    assert set(results) == {route.name for route in micro.ROUTES}
+    # timing baselines are machine-specific; only budgets and statuses here
+    assert micro.check("small", results, baselines=None, tolerance=0, slack_ms=0) == []
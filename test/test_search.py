@@ -0,0 +1,82 @@
+from app import db
+from app.models import Comment, Issue, Team, TeamMember, User
+from test_issues import auth_headers
+
+
+def seed(client):
+    with client.application.app_context():
+        user = User.query.first()
+        team, other = Team(name="search"), Team(name="elsewhere")
+        db.session.add_all([team, other])
+        db.session.flush()
+        db.session.add_all([TeamMember(user_id=user.id, team_id=team.id),
+                            TeamMember(user_id=user.id, team_id=other.id)])
+        crash = Issue(title="Login page crashes", description="stack trace on submit",
+                      user_id=user.id, team_id=team.id)
+        slow = Issue(title="Dashboard is slow", description="the login redirect takes ages",
+                     user_id=user.id, team_id=team.id)
+        quiet = Issue(title="Typo in footer", description="copyright year",
+                      user_id=user.id, team_id=team.id)
+        foreign = Issue(title="Login broken", description="other team", user_id=user.id, team_id=other.id)
+        db.session.add_all([crash, slow, quiet, foreign])
+        db.session.flush()
+        db.session.add(Comment(content="seeing a crash when exporting too", user_id=user.id, issue_id=quiet.id))
+        db.session.commit()
+        return team.id, crash.id, slow.id, quiet.id
+
+
+def search(client, headers, team_id, q, **params):
+    query = "&".join(f"{k}={v}" for k, v in params.items())
+    return client.get(f"/api/issues/teams/{team_id}/search?q={q}&{query}", headers=headers)
+
+
+def test_search_ranks_title_matches_and_scopes_to_team(client):
+    headers = auth_headers(client)
+    team_id, crash_id, slow_id, _ = seed(client)
+
+    data = search(client, headers, team_id, "login").get_json()
+    ids = [i["issue_id"] for i in data["issues"]]
+    assert ids == [crash_id, slow_id]
+
+
+def test_search_covers_comments_and_follows_updates(client):
+    headers = auth_headers(client)
+    team_id, crash_id, _, quiet_id = seed(client)
+
+    ids = [i["issue_id"] for i in search(client, headers, team_id, "crash").get_json()["issues"]]
+    assert set(ids) == {crash_id, quiet_id}
+
+    with client.application.app_context():
+        issue = db.session.get(Issue, crash_id)
+        issue.title = "Login page freezes"
+        issue.description = "no error shown"
+        db.session.commit()
+
+    ids = [i["issue_id"] for i in search(client, headers, team_id, "crash").get_json()["issues"]]
+    assert ids == [quiet_id]
+
+
+def test_search_paginates_and_rejects_empty_query(client):
+    headers = auth_headers(client)
+    team_id, *_ = seed(client)
+
+    first = search(client, headers, team_id, "login", per_page=1).get_json()
+    second = search(client, headers, team_id, "login", per_page=1, page=2).get_json()
+    assert first["has_more"] and not second["has_more"]
+    assert first["issues"][0]["issue_id"] != second["issues"][0]["issue_id"]
+
+    assert search(client, headers, team_id, "").status_code == 400
+
+
+def test_rebuild_search_command(client):
+    headers = auth_headers(client)
+    team_id, crash_id, slow_id, _ = seed(client)
+    with client.application.app_context():
+        db.session.execute(db.text("DELETE FROM issue_fts"))
+        db.session.commit()
+
+    result = client.application.test_cli_runner().invoke(args=["rebuild-search"])
+    assert result.exit_code == 0, result.output
+
+    ids = [i["issue_id"] for i in search(client, headers, team_id, "login").get_json()["issues"]]
+    assert ids == [crash_id, slow_id]